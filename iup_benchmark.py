@@ -0,0 +1,354 @@
+import argparse
+import contextlib
+import copy
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+import iup_regression_model as iup
+
+# Benchmarks of the IUP Regression Model. The micro benchmarks time single functions of the model, the end-to-end
+# benchmarks run iup_reg_model on synthetic data cubes of increasing size. Every run is added as one line of JSON to the
+# history file, and the times are compared with the last run on the same machine to spot regressions between versions
+#
+# python iup_benchmark.py                   runs every benchmark
+# python iup_benchmark.py --suite micro     runs only the micro benchmarks
+# python iup_benchmark.py --quick           runs only the smallest cube and fewer repeats
+# python iup_benchmark.py -s engine=batched sets (or overrides) a setting of every benchmark
+# python iup_benchmark.py --check           compares the fits of the solver "inv" with the first version of calc_trend
+#                                           and the sensitivity windows with fits of only the window
+
+# Settings of every benchmark, the proxies are the default proxies of the data folder
+base_settings = {'proxy_path': 'data/Proxies_Timeseries_202503.txt', 'aod_path': 'data/AOD_timeseries_1980-2022_10lat.txt', 'skip_percentage': '0.65', 'default_proxy_method': '1', 'intercept_method': '2', 'trend_method': '1'}
+
+# Sizes of the synthetic data cubes (years, levels, latitudes). The month-of-the-year methods need more than 11 years
+cube_sizes = {'small': (20, 4, 6), 'medium': (30, 12, 18), 'large': (35, 24, 36)}
+
+# Settings of the end-to-end benchmarks on top of the base settings. The inflection point is in the middle of the cube
+e2e_cases = {
+    'default': {},
+    'inflection_ind': {'inflection_method': 'ind'},
+    'inflection_pwl': {'inflection_method': 'pwl'},
+    'yearly_average': {'averaging_window': 'yearly'},
+    'anomalies': {'anomaly': 'True', 'anomaly_method': 'rel'},
+    'month_of_the_year': {'trend_method': '3', 'intercept_method': '3', 'default_proxy_method': '3'},
+    'bootstrap': {'bootstrap_replicates': '1000'},
+    'sensitivity': {'sensitivity_start_years': '1985, 2000'},
+    'inflection_scan': {'inflection_method': 'ind', 'inflection_scan': '1990-01, 2009-12'},
+}
+
+# Cases of --check on top of the end-to-end cases. Yearly data with independent trends has cells with phi > 1
+check_cases = dict(e2e_cases, inflection_yearly={'inflection_method': 'ind', 'averaging_window': 'yearly'})
+
+# Cases of --check that compare the trends of the sensitivity windows with fits of only the window (start_date and
+# end_date). The windows start before and at the inflection point (fits of only the window can't start after it, or at
+# it with piece-wise linear trends). Without anomalies they are the same fits
+sensitivity_windows = {'sensitivity_start_years': '1990, 1995', 'sensitivity_end_years': '2001, 2004'}
+sensitivity_cases = {
+    'sensitivity': dict(sensitivity_windows),
+    'sensitivity_ind': dict(sensitivity_windows, inflection_method='ind'),
+    'sensitivity_pwl': dict(sensitivity_windows, sensitivity_start_years='1990, 1994', inflection_method='pwl', intercept_method='3', trend_method='2'),
+}
+
+
+def make_dataset(n_years, n_lev, n_lat, seed=0):
+    # Synthetic ozone cube (time, lev, lat) starting in 1985, with a seasonal cycle, a trend, noise and 5% missing values
+    rng = np.random.default_rng(seed)
+    n_time = n_years * 12
+    months = np.arange(n_time)
+    lev = np.arange(10, 10 + 2 * n_lev, 2, dtype=float)
+    lat = np.linspace(-85, 85, n_lat)
+
+    seasonal = np.sin(2 * np.pi * months / 12)[:, None, None] * np.cos(np.deg2rad(lat))[None, None, :]
+    trend = (months / 120)[:, None, None] * rng.normal(0, 0.05, (1, n_lev, n_lat))
+    o3 = 5 + 0.5 * seasonal + trend + rng.normal(0, 0.2, (n_time, n_lev, n_lat))
+    o3[rng.random(o3.shape) < 0.05] = np.nan
+
+    data = iup.Dataset('Synthetic_' + str(n_years) + 'x' + str(n_lev) + 'x' + str(n_lat))
+    data.o3 = np.ma.masked_invalid(o3)
+    data.time = np.array([dt.date(1985 + i // 12, i % 12 + 1, 1) for i in months])
+    data.lev = lev
+    data.lat = lat
+    data.lev_unit = 'km'
+    data.lev_tag = ''
+    data.lat_tag = 'lat'
+    data.dim_array = ['time', 'lev', 'lat']
+    return data
+
+
+def get_settings(case_settings, overrides):
+    ini = dict(base_settings)
+    ini.update(case_settings)
+    ini.update(overrides)
+    return ini
+
+
+def time_function(function, number=1, repeat=3):
+    # Runs the function number times per repeat and returns the fastest and the median time of one call in seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return {'seconds': min(times), 'median': float(np.median(times)), 'number': number, 'repeat': repeat}
+
+
+def prepare_fit(data, proxies, ini):
+    # Repeats the steps of iup_reg_model before the fits, so that the functions of single cells can be timed
+    data, proxies = iup.get_proxy_time_overlap(ini, proxies, data)
+    data = iup.set_data_limits(data, ini)
+    data.inflection_index = [iup.get_inflection_index(ini, data)]
+    X_1_string = iup.calc_new_Xstring(['intercept', 'trend'], ini)
+    X_proxy_size, X_2_string = iup.calc_proxy_size(proxies)
+    iup.set_proxy_tag_series(proxies, data)
+    data.o3 = data.o3[data.date_start:data.date_end]
+    data.time = data.time[data.date_start:data.date_end]
+    data.date_start, data.date_end = 0, data.o3.shape[0]
+    return data, proxies, X_1_string, X_proxy_size, X_1_string + X_2_string
+
+
+def run_micro(overrides, repeat):
+    results = {}
+    ini = get_settings({}, overrides)
+    data = make_dataset(*cube_sizes['small'])
+    proxies = iup.load_default_proxies(ini)
+
+    yyyymm = np.array([(1985 + i // 12) * 100 + i % 12 + 1 for i in range(1200)])
+    results['parse_time'] = time_function(lambda: [iup.parse_time(i) for i in yyyymm], repeat=repeat)
+    results['convert_to_datetime'] = time_function(lambda: iup.convert_to_datetime(yyyymm, {'time_format': '%Y%m'}), number=10, repeat=repeat)
+    results['convert_to_datetime_detect'] = time_function(lambda: iup.convert_to_datetime(yyyymm, {}), number=10, repeat=repeat)
+    results['load_default_proxies'] = time_function(lambda: iup.load_default_proxies(ini), number=10, repeat=repeat)
+    with tempfile.TemporaryDirectory() as folder:
+        cache_ini = dict(ini, proxy_cache_path=folder)
+        iup.load_default_proxies(cache_ini)
+        results['load_default_proxies_cached'] = time_function(lambda: iup.load_default_proxies(cache_ini), number=10, repeat=repeat)
+
+    data, proxies, X_1_string, X_proxy_size, X_string = prepare_fit(data, proxies, ini)
+    data_arr = data.o3[:, 0, 0]
+    nanmask = ~np.isnan(data_arr.filled(np.nan))
+    it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+    results['get_X_1'] = time_function(lambda: iup.get_X_1(nanmask, ini, X_1_string, data), number=100, repeat=repeat)
+    results['get_X_2'] = time_function(lambda: iup.get_X_2(proxies, nanmask, X_proxy_size, it, data), number=100, repeat=repeat)
+
+    # X matrix of the cell without the empty columns, like in fit_cell
+    X = np.concatenate([iup.get_X_1(nanmask, ini, X_1_string, data), iup.get_X_2(proxies, nanmask, X_proxy_size, it, data)], axis=1)
+    keep = np.sum((X[nanmask] != 0) & ~np.isnan(X[nanmask]), axis=0) > 2
+    X_clean = np.nan_to_num(X[nanmask][:, keep])
+    n_1 = int(keep[:len(X_1_string)].sum())
+    results['normalize'] = time_function(lambda: iup.normalize(X_clean[:, n_1:].copy()), number=100, repeat=repeat)
+
+    X_clean[:, n_1:] = iup.normalize(X_clean[:, n_1:])
+    results['calc_trend'] = time_function(lambda: iup.calc_trend(X_clean, data_arr, ini, np.array(X_string)[keep], data.inflection_index), number=20, repeat=repeat)
+
+    # save_netCDF of a complete model run of the medium cube
+    data = make_dataset(*cube_sizes['medium'])
+    proxies = iup.load_default_proxies(ini)
+    trends, signi, diagnostic = iup.iup_reg_model(data, proxies, ini)
+    with tempfile.TemporaryDirectory() as folder:
+        save_ini = dict(ini, save_folder_path=folder)
+        results['save_netCDF'] = time_function(lambda: iup.save_netCDF(iup.set_data_limits(copy.copy(data), save_ini), trends, signi, diagnostic, save_ini), repeat=repeat)
+
+    return {'micro/' + name: result for name, result in results.items()}
+
+
+def run_e2e(overrides, repeat, sizes):
+    results = {}
+    for size in sizes:
+        for case, case_settings in e2e_cases.items():
+            ini = get_settings(case_settings, overrides)
+            if 'inflection_method' in ini:
+                ini.setdefault('inflection_point', str(1985 + cube_sizes[size][0] // 2) + '-01')
+            data = make_dataset(*cube_sizes[size])
+            proxies = iup.load_default_proxies(ini)
+            # iup_reg_model changes the ini and averages the proxies, so every repeat gets new copies
+            result = time_function(lambda: iup.iup_reg_model(data, [copy.copy(i) for i in proxies], dict(ini)), repeat=repeat)
+            result['cells'] = int(np.prod(data.o3.shape[1:]))
+            results['e2e/' + size + '/' + case] = result
+    return results
+
+
+def reference_fit(X_clean, data):
+    # The fit of the first version of calc_trend, with the inverses of the normal equations and the dense Prais-Winsten
+    # matrix P, for the X matrix and the time series (with NaN) of a cell. Returns beta, betaa and the diagonal of the
+    # covariance of betaa
+    nanmask = ~np.isnan(data)
+    y = data[nanmask]
+    beta = np.linalg.inv(X_clean.T @ X_clean) @ X_clean.T @ y
+    N = y - X_clean @ beta
+    pairs = np.sum(nanmask[1:] & nanmask[:-1])
+    phi = (1.0 / np.var(N)) * (np.sum(N[1:pairs + 1] * N[:pairs]) / (len(y) - 1))
+
+    P, epsilon = np.zeros((len(y), len(y))), np.zeros(len(y))
+    P[0, 0] = np.sqrt(1 - phi ** 2)
+    epsilon[0] = N[0] * np.sqrt(1 - phi ** 2)
+    for i in range(1, len(y)):
+        if X_clean[i, 1] - X_clean[i - 1, 1] > 1:
+            P[i, i] = np.sqrt(1 - phi ** 2)
+            epsilon[i] = N[i] * np.sqrt(1 - phi ** 2)
+        else:
+            P[i, i], P[i, i - 1] = 1, -phi
+            epsilon[i] = N[i] - phi * N[i - 1]
+    Xstar, Ystar = P @ X_clean, P @ y
+    betaa = np.linalg.inv(Xstar.T @ Xstar) @ Xstar.T @ Ystar
+    covbetaa = np.var(epsilon) * np.linalg.inv(Xstar.T @ Xstar)
+    return beta, betaa, np.diag(covbetaa)
+
+
+def run_check(overrides):
+    # Fits every cell of the check cases on the smallest cube with the solver "inv" and compares beta, betaa and their
+    # uncertainty with reference_fit of the same X matrix and data. Returns the names of the cases that differ
+    calc_trend = iup.calc_trend
+    fits = []
+
+    def recorded_calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
+        result = calc_trend(X_clean, data_arr, ini, X_string, inflection_index)
+        fits.append((X_clean, np.ma.filled(data_arr, np.nan), result))
+        return result
+
+    failed = []
+    iup.calc_trend = recorded_calc_trend
+    try:
+        for case, case_settings in check_cases.items():
+            # The single cell fits of the default engine, without cache or other processes
+            ini = {key: value for key, value in get_settings(case_settings, overrides).items() if key not in ['engine', 'jobs', 'cache_path']}
+            ini['solver'] = 'inv'
+            if 'inflection_method' in ini:
+                ini.setdefault('inflection_point', str(1985 + cube_sizes['small'][0] // 2) + '-01')
+            fits.clear()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                iup.iup_reg_model(make_dataset(*cube_sizes['small']), iup.load_default_proxies(ini), ini)
+
+            differences = 0
+            for X_clean, data, result in fits:
+                with np.errstate(all='ignore'):
+                    reference = reference_fit(X_clean, data)
+                for new, old in zip(result[2:5], reference):
+                    new, old = np.broadcast_to(np.asarray(new, dtype=float), np.shape(old)), np.asarray(old, dtype=float)
+                    scale = np.nanmax(np.abs(old), initial=0)
+                    if not np.allclose(new, old, rtol=1e-6, atol=1e-9 * scale, equal_nan=True):
+                        differences += 1
+            print(f"{case:<40}{len(fits):>8} fits{differences:>8} differ")
+            if differences:
+                failed.append(case)
+    finally:
+        iup.calc_trend = calc_trend
+    return failed
+
+
+def run_sensitivity_check(overrides):
+    # Compares the trends of every sensitivity window of the sensitivity cases on the smallest cube with a fit of only
+    # the window. Returns the names of the cases that differ
+    failed = []
+    for case, case_settings in sensitivity_cases.items():
+        ini = {key: value for key, value in get_settings(case_settings, overrides).items() if key not in ['cache_path']}
+        if 'inflection_method' in ini:
+            ini.setdefault('inflection_point', str(1985 + cube_sizes['small'][0] // 2) + '-01')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            trends, signi, diagnostic = iup.iup_reg_model(make_dataset(*cube_sizes['small']), iup.load_default_proxies(ini), ini)
+            windows = iup.get_sensitivity_windows(ini, diagnostic[5])
+            differences = 0
+            for w, (start, end) in enumerate(windows):
+                window_ini = {key: value for key, value in ini.items() if not key.startswith('sensitivity_')}
+                window_ini.update(start_date=str(start) + '-01', end_date=str(end) + '-12')
+                refit = iup.iup_reg_model(make_dataset(*cube_sizes['small']), iup.load_default_proxies(window_ini), window_ini)[0]
+                window = diagnostic[11][..., w]
+                # A window that starts at the inflection point is fitted with a single trend, which the window repeats
+                refit = np.reshape(refit, np.shape(refit) + (1,) * (window.ndim - np.ndim(refit)))
+                scale = np.nanmax(np.abs(refit), initial=0)
+                if not np.allclose(window, refit, rtol=1e-6, atol=1e-9 * scale, equal_nan=True):
+                    differences += 1
+        print(f"{case:<40}{len(windows):>8} windows{differences:>5} differ")
+        if differences:
+            failed.append(case)
+    return failed
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_results(results, previous):
+    # Prints the times with the change to the last run of the same benchmark on the same machine
+    print(f"{'benchmark':<40}{'seconds':>12}{'previous':>12}{'ratio':>8}")
+    for name, result in results.items():
+        line = f"{name:<40}{result['seconds']:>12.4g}"
+        old = next((i['results'][name]['seconds'] for i in reversed(previous) if name in i['results']), None)
+        if old:
+            line += f"{old:>12.4g}{result['seconds'] / old:>8.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the IUP Regression Model. The results are added to a history file to compare the performance between versions.')
+    parser.add_argument('--suite', type=str, choices=['micro', 'e2e', 'all'], default='all', help='Which benchmarks to run.')
+    parser.add_argument('--quick', action='store_true', help='Only run the smallest data cube, with one repeat.')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Number of repeats of every benchmark, the fastest is kept.')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='KEY=VALUE', help='Setting of the config.ini that is used in every benchmark (e.g. engine=batched). Can be given several times.')
+    parser.add_argument('--history', type=str, default='benchmark_history.jsonl', help='File to which the results are added, one line of JSON per run.')
+    parser.add_argument('--check', action='store_true', help='Only compare the fits of the solver "inv" with the first version of calc_trend and the sensitivity windows with fits of only the window, nothing is timed.')
+    args = parser.parse_args()
+
+    overrides = dict(i.split('=', 1) for i in args.set)
+    if args.check:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            failed = run_check(overrides)
+            failed_windows = run_sensitivity_check(overrides)
+        if failed:
+            raise SystemExit('The fits of ' + ', '.join(failed) + ' differ from the first version of calc_trend')
+        if failed_windows:
+            raise SystemExit('The sensitivity windows of ' + ', '.join(failed_windows) + ' differ from fits of only the window')
+        return
+    repeat = 1 if args.quick else args.repeat
+    sizes = ['small'] if args.quick else list(cube_sizes)
+
+    results = {}
+    # The model prints its messages and warns about empty cells, only the results of the benchmarks are shown
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if args.suite in ('micro', 'all'):
+            results.update(run_micro(overrides, repeat))
+        if args.suite in ('e2e', 'all'):
+            results.update(run_e2e(overrides, repeat, sizes))
+
+    record = {
+        'date': dt.datetime.now().isoformat(timespec='seconds'),
+        'version': iup.ver,
+        'commit': get_commit(),
+        'machine': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'settings': overrides,
+        'results': results,
+    }
+
+    history = load_history(args.history)
+    previous = [i for i in history if i['machine'] == record['machine'] and i['settings'] == overrides]
+    print_results(results, previous)
+
+    with open(args.history, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1882 @@
+import os
+
+import numpy as np
+import pandas as pd
+import copy
+import netCDF4 as nc
+import datetime as dt
+import re
+
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+import matplotlib
+import matplotlib.patheffects as pe
+import matplotlib.patches as patches
+from cmcrameri import cm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+from PyQt5 import QtWidgets, uic
+from PyQt5.QtGui import QPalette, QColor, QIcon
+from PyQt5.QtCore import pyqtSignal, QTimer
+from PyQt5.QtWidgets import QTableWidgetItem, QVBoxLayout, QHBoxLayout, QHeaderView, QFileDialog, QMessageBox
+# from regression_model_ui import Ui_MainWindow
+
+from iup_regression_model import ver, load_config_ini, load_netCDF, load_default_proxies, load_add_proxy_file, load_additional_proxies, set_data_limits, averaging_window_text_check, get_string_groups, convert_datetime_to_fractional, iup_reg_model, set_progress_callback, format_progress
+
+# Graphical user interface of the IUP Regression Model. The model itself is in iup_regression_model.py, which doesn't
+# import Qt or matplotlib, this module is only loaded when the user interface is used
+
+
+class ComboMethod(QtWidgets.QComboBox):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.addItems(['disabled', 'single', 'harmonics', '12 months'])
+
+
+class ComboSeasonal(QtWidgets.QComboBox):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.addItems(['annual (2 terms)', 'semi-annual (4 terms)', 'tri-annual (6 terms)', 'quarter-annual (8 terms)'])
+
+
+# Empty "canvas" for plotting
+class MplCanvas(FigureCanvas):
+    def __init__(self, parent=None):
+        fig = Figure()
+        # self.axes =fig.add_subplot(111)
+        super().__init__(fig)
+        self.axes_list = []
+
+
+class PreviewWindow(QtWidgets.QDialog):
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        # super(PreviewWindow, self).__init__()
+        uic.loadUi('preview_table.ui', self)
+
+        self.activateWindow()
+        self.raise_()
+
+        self.fill_table(data)
+
+        self.btn_exit.clicked.connect(self.close)
+
+    def fill_table(self, data):
+        self.preview_table.setRowCount(data.shape[0])
+        self.preview_table.setColumnCount(data.shape[1] if data.shape[1] else 0)
+
+        for row_idx, row_data in enumerate(data):
+            for col_idx, value in enumerate(row_data):
+                self.preview_table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
+
+
+class SavePlotWindow(QtWidgets.QDialog):
+    def __init__(self, original_size, parent=None):
+        super(SavePlotWindow, self).__init__()
+        uic.loadUi('save_plot.ui', self)
+        self.width_line.setText(str(original_size[0]))
+        self.height_line.setText(str(original_size[1]))
+
+        self.btn_cancel.clicked.connect(self.close)
+        self.btn_save.clicked.connect(self.accept)
+
+    def get_options(self):
+        try:
+            size = (float(self.width_line.text()), float(self.height_line.text()))
+        except:
+            size = False
+        include_title = self.radio_with.isChecked()
+        return size, include_title
+
+
+# Popup window to set the variable names to load data
+class VariableWindow(QtWidgets.QDialog):
+    ini_signal = pyqtSignal(dict)
+    def __init__(self, settings_ini, filename):
+        super(VariableWindow, self).__init__()
+        uic.loadUi('data_load.ui', self)
+
+        self.ini = settings_ini
+        self.data = nc.Dataset(filename[0], 'r')
+
+        self.load_variable_keys()
+
+        self.dim_layout = self.findChild(QtWidgets.QWidget, 'variable_stacked_widget').layout()
+        self.o3_var_combo.currentTextChanged.connect(self.populate_dim_widget)
+        self.variable_bttn.clicked.connect(self.show_options)
+
+        # connect buttons
+        self.bttn_ok.clicked.connect(self.save_settings)
+        self.bttn_cancel.clicked.connect(self.close)
+
+
+    def show_options(self):
+        current_index = self.variable_widget.currentIndex()
+        if current_index == 0:
+            self.variable_widget.setCurrentIndex(1)
+        else:
+            self.variable_widget.setCurrentIndex(0)
+
+    def clear_dim_widget(self):
+        while self.dim_layout.count():
+            item = self.dim_layout.takeAt(0)
+            widget = item.widget()
+            if widget is not None:
+                widget.deleteLater()
+
+    def populate_dim_widget(self):
+        self.clear_dim_widget()
+        if self.o3_var_combo.currentIndex() == 0:
+            self.clear_dim_widget()
+            return
+
+        dims = self.data.variables[self.o3_var_combo.currentText()].dimensions
+
+        o3_ln = getattr(self.data.variables[self.o3_var_combo.currentText()], 'long_name', getattr(self.data.variables[self.o3_var_combo.currentText()], 'name', ''))
+        o3_units = getattr(self.data.variables[self.o3_var_combo.currentText()], 'units', '')
+        if o3_ln or o3_units:
+            self.o3_unit.setText(o3_ln + ' [' + o3_units + ']')
+
+        self.combo_boxes = []
+        self.line_edits = []
+        for k, i in enumerate(dims):
+            try:
+                dim_index = self.o3_keys.index(i)
+            except:
+                dim_index = 0
+            frame = QtWidgets.QFrame()
+            frame.setFrameShape(QtWidgets.QFrame.StyledPanel)
+            frame.setFrameShadow(QtWidgets.QFrame.Raised)
+            frame_layout = QVBoxLayout(frame)
+
+            # Add widget with variable input
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel(i + ' variable: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            combo = QtWidgets.QComboBox()
+            combo.addItems(self.o3_keys)
+            combo.currentIndexChanged.connect(self.update_OK)
+            combo.setCurrentIndex(dim_index)
+            self.combo_boxes.append(combo)
+            row_layout.addWidget(combo)
+            frame_layout.addWidget(row_widget)
+
+            # Add widget with unit input
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel(i + ' unit: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            unit_line = QtWidgets.QLineEdit()
+            try:
+                ln = getattr(self.data.variables[i], 'long_name', getattr(self.data.variables[i], 'name', ''))
+                units = getattr(self.data.variables[i], 'units', '')
+                if ln or units:
+                    unit_line.setText(ln + ' [' + units + ']')
+            except:
+                unit_line.setText('')
+            row_layout.addWidget(unit_line)
+            frame_layout.addWidget(row_widget)
+
+            # Add widget with tag input
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel(i + ' tag: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            line = QtWidgets.QLineEdit()
+            row_layout.addWidget(line)
+            frame_layout.addWidget(row_widget)
+
+            match_key = [key for key in self.ini if 'tag_name_' in key]
+            for ii in match_key:
+                if i in [s.strip() for s in self.ini[ii].split(',')]:
+                    line.setText(ii.split('_')[-1])
+                    if ii.split('_')[-1] == 'time':
+                        row_widget = QtWidgets.QWidget()
+                        row_layout = QHBoxLayout(row_widget)
+                        label = QtWidgets.QLabel('Time format: ')
+                        row_layout.addWidget(label)
+                        spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+                        row_layout.addItem(spacer)
+                        line_time = QtWidgets.QLineEdit()
+                        line_time.setText('%Y/%m')
+                        row_layout.addWidget(line_time)
+                        frame_layout.addWidget(row_widget)
+            line.textChanged.connect(self.tag_change)
+
+            self.dim_layout.addWidget(frame)
+
+    def load_variable_keys(self):
+        self.o3_keys = list(self.data.variables.keys())
+        self.o3_keys.insert(0, '-None-')
+        self.o3_var_combo.addItems(self.o3_keys)
+
+    def update_OK(self):
+        self.bttn_ok.setEnabled(not any(combo.currentIndex() == 0 for combo in self.combo_boxes))
+        var_name = self.sender().currentText()
+
+        if self.sender().parent():
+            ln = getattr(self.data.variables[var_name], 'long_name', getattr(self.data.variables[var_name], 'name', ''))
+            units = getattr(self.data.variables[var_name], 'units', '')
+            if ln or units:
+                self.sender().parent().parent().layout().itemAt(1).widget().layout().itemAt(2).widget().setText(ln + ' [' + units + ']')
+
+    def tag_change(self):
+        line_text = self.sender().text()
+        if line_text == 'time':
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel('Time format: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            line = QtWidgets.QLineEdit()
+            line.setText('%Y/%m')
+            row_layout.addWidget(line)
+            self.sender().parent().parent().layout().addWidget(row_widget)
+        else:
+            if self.sender().parent().parent().layout().itemAt(3):
+                self.sender().parent().parent().layout().removeWidget(self.sender().parent().parent().layout().itemAt(3).widget())
+
+    def save_settings(self):
+        # Saves all settings and closes the settings window
+
+        # Change ini
+        if self.o3_var_combo.currentIndex() != 0:
+            self.ini['o3_var'] = self.o3_var_combo.currentText()
+            self.ini['o3_var_unit'] = self.o3_unit.text()
+        else:
+            self.ini['o3_var'] = None
+
+        for i in range(self.dim_layout.count()):
+            combo_text = self.dim_layout.itemAt(i).widget().layout().itemAt(0).widget().layout().itemAt(2).widget().currentText()
+            unit_text = self.dim_layout.itemAt(i).widget().layout().itemAt(1).widget().layout().itemAt(2).widget().text()
+            line_text = self.dim_layout.itemAt(i).widget().layout().itemAt(2).widget().layout().itemAt(2).widget().text()
+
+            if line_text == 'time':
+                self.ini['time_var'] = combo_text
+                self.ini['time_dim'] = i + 1
+                self.ini['time_format'] = self.dim_layout.itemAt(i).widget().layout().itemAt(2).widget().layout().itemAt(2).widget().text()
+            else:
+                self.ini['additional_var_' + str(i + 1) + '_index'] = combo_text
+                self.ini['additional_var_' + str(i + 1) + '_tag'] = line_text
+                self.ini['additional_var_' + str(i + 1) + '_unit'] = unit_text
+
+        self.ini_signal.emit(self.ini)
+        self.accept()
+
+    def closeEvent(self, event):
+        if self.data is not None:
+            self.data.close()
+        super().closeEvent(event)
+
+
+class ProxyWindow(QtWidgets.QDialog):
+    ini_signal = pyqtSignal(dict)
+    def __init__(self, settings_ini, filename):
+        super(ProxyWindow, self).__init__()
+        uic.loadUi('proxy_load.ui', self)
+        self.ini = settings_ini
+        self.file = filename[0]
+
+        # Distinguish between ascii file and netCDF file
+        if self.file.endswith('.nc'):
+            self.proxy_widget.setCurrentIndex(0)
+            self.data = nc.Dataset(self.file, 'r')
+            self.load_nc_file()
+            self.dim_layout = self.findChild(QtWidgets.QWidget, 'variable_stacked_widget').layout()
+            self.proxy_var_combo.currentTextChanged.connect(self.populate_dim_widget)
+            self.variable_bttn.clicked.connect(self.show_options)
+        else:
+            self.proxy_widget.setCurrentIndex(1)
+            self.btn_preview.clicked.connect(self.open_preview)
+            self.is2d_check.toggled.connect(self.toggle_2d)
+            self.bttn_ok.setEnabled(True)
+
+        # Set Proxy Name
+        self.proxy_name.setText(self.file.split('/')[-1].split('.')[0])
+
+        # connect buttons
+        self.bttn_ok.clicked.connect(self.save_settings)
+        self.bttn_cancel.clicked.connect(self.close)
+
+        if isinstance(self.ini.get('additional_proxy_path', None), (list, np.ndarray)):
+            if not self.ini.get('additional_proxy_path', None).all():
+                self.create_add_proxy_list()
+        else:
+            if not self.ini.get('additional_proxy_path', None):
+                self.create_add_proxy_list()
+
+    def show_options(self):
+        current_index = self.variable_widget.currentIndex()
+        if current_index == 0:
+            self.variable_widget.setCurrentIndex(1)
+        else:
+            self.variable_widget.setCurrentIndex(0)
+
+    def create_add_proxy_list(self):
+        self.ini['additional_proxy_name'] = np.array([], dtype='object')
+        self.ini['additional_proxy_path'] = np.array([], dtype='object')
+        self.ini['additional_proxy_time_col'] = np.array([], dtype='object')
+        self.ini['additional_proxy_data_col'] = np.array([], dtype=int)
+        self.ini['additional_proxy_method'] = np.array([], dtype=int)
+        self.ini['additional_proxy_seas_comp'] = np.array([], dtype='object')
+        self.ini['additional_proxy_time_format'] = np.array([], dtype='object')
+        self.ini['additional_proxy_header_size'] = np.array([], dtype=int)
+        self.ini['additional_proxy_tag'] = np.array([], dtype='object')
+        self.ini['additional_proxy_tag_array'] = np.array([], dtype='object')
+
+    def toggle_2d(self):
+        if self.is2d_check.isChecked() == True:
+            self.tag_widget_1.setEnabled(True)
+            self.tag_widget_2.setEnabled(True)
+        else:
+            self.tag_widget_1.setEnabled(False)
+            self.tag_widget_2.setEnabled(False)
+
+    def clear_dim_widget(self):
+        while self.dim_layout.count():
+            item = self.dim_layout.takeAt(0)
+            widget = item.widget()
+            if widget is not None:
+                widget.deleteLater()
+
+    def populate_dim_widget(self):
+        self.clear_dim_widget()
+        if self.proxy_var_combo.currentIndex() == 0:
+            self.clear_dim_widget()
+            return
+
+        dims = self.data.variables[self.proxy_var_combo.currentText()].dimensions
+
+        self.combo_boxes = []
+        self.line_edits = []
+        for k, i in enumerate(dims):
+            try:
+                dim_index = self.keys.index(i)
+            except:
+                dim_index = 0
+            frame = QtWidgets.QFrame()
+            frame.setFrameShape(QtWidgets.QFrame.StyledPanel)
+            frame.setFrameShadow(QtWidgets.QFrame.Raised)
+            frame_layout = QVBoxLayout(frame)
+
+            # Add widget with variable input
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel(i + ' variable: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            combo = QtWidgets.QComboBox()
+            combo.addItems(self.keys)
+            combo.currentIndexChanged.connect(self.update_OK)
+            combo.setCurrentIndex(dim_index)
+            self.combo_boxes.append(combo)
+            row_layout.addWidget(combo)
+            frame_layout.addWidget(row_widget)
+
+            # Add widget with tag input
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel(i + ' tag: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            line = QtWidgets.QLineEdit()
+            row_layout.addWidget(line)
+            frame_layout.addWidget(row_widget)
+
+            match_key = [key for key in self.ini if 'tag_name_' in key]
+            for ii in match_key:
+                if i in [s.strip() for s in self.ini[ii].split(',')]:
+                    line.setText(ii.split('_')[-1])
+                    if ii.split('_')[-1] == 'time':
+                        row_widget = QtWidgets.QWidget()
+                        row_layout = QHBoxLayout(row_widget)
+                        label = QtWidgets.QLabel('Time format: ')
+                        row_layout.addWidget(label)
+                        spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+                        row_layout.addItem(spacer)
+                        line_time = QtWidgets.QLineEdit()
+                        line_time.setText('%Y/%m')
+                        row_layout.addWidget(line_time)
+                        frame_layout.addWidget(row_widget)
+            line.textChanged.connect(self.tag_change)
+            self.dim_layout.addWidget(frame)
+
+    def load_nc_file(self):
+        self.keys = list(self.data.variables.keys())
+        self.keys.insert(0, '-None-')
+        self.proxy_var_combo.addItems(self.keys)
+
+    def open_preview(self):
+        try:
+            proxy_raw = pd.read_csv(self.file, sep='\s+', header=None, skiprows=int(self.header_rows.text()))
+            proxy_raw.dropna(axis=1, how='all', inplace=True)
+        except:
+            print('Could not load the proxy data. Please try changing the header rows.')
+            return
+
+        self.preview_window = PreviewWindow(np.array(proxy_raw))
+        self.preview_window.show()
+
+    def update_OK(self):
+        self.bttn_ok.setEnabled(not any(combo.currentIndex() == 0 for combo in self.combo_boxes))
+
+    def tag_change(self):
+        line_text = self.sender().text()
+        if line_text == 'time':
+            row_widget = QtWidgets.QWidget()
+            row_layout = QHBoxLayout(row_widget)
+            label = QtWidgets.QLabel('Time format: ')
+            row_layout.addWidget(label)
+            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+            row_layout.addItem(spacer)
+            line = QtWidgets.QLineEdit()
+            line.setText('%Y/%m')
+            row_layout.addWidget(line)
+            self.sender().parent().parent().layout().addWidget(row_widget)
+        else:
+            if self.sender().parent().parent().layout().itemAt(2):
+                self.sender().parent().parent().layout().removeWidget(self.sender().parent().parent().layout().itemAt(2).widget())
+
+    def save_settings(self):
+        # Saves all settings and closes the settings window
+        # Save depending on current open page
+        self.ini['additional_proxy_path'] = np.append(self.ini['additional_proxy_path'], self.file)
+        self.ini['additional_proxy_name'] = np.append(self.ini['additional_proxy_name'], self.proxy_name.text())
+        if self.proxy_widget.currentIndex() == 0:
+            for widget in self.variable_stacked_widget.children():
+                if isinstance(widget, QtWidgets.QFrame):
+                    if widget.layout().itemAt(1).widget().layout().itemAt(2).widget().text() == 'time':
+                        self.ini['additional_proxy_time_col'] = np.append(self.ini['additional_proxy_time_col'], widget.layout().itemAt(0).widget().layout().itemAt(2).widget().currentText())
+                        self.ini['additional_proxy_time_format'] = np.append(self.ini['additional_proxy_time_format'], widget.layout().itemAt(2).widget().layout().itemAt(2).widget().text())
+                    else:
+                        self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], widget.layout().itemAt(0).widget().layout().itemAt(2).widget().currentText())
+                        self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], widget.layout().itemAt(1).widget().layout().itemAt(2).widget().text())
+            self.ini['additional_proxy_data_col'] = np.append(self.ini['additional_proxy_data_col'], self.proxy_var_combo.currentText())
+            self.ini['additional_proxy_method'] = np.append(self.ini['additional_proxy_method'], self.ini.get('default_proxy_method', 1))
+            self.ini['additional_proxy_seas_comp'] = np.append(self.ini['additional_proxy_seas_comp'], self.ini.get('intercept_method', 2))
+            self.ini['additional_proxy_header_size'] = np.append(self.ini['additional_proxy_header_size'], 0)
+        else:
+            self.ini['additional_proxy_time_col'] = np.append(self.ini['additional_proxy_time_col'], self.proxy_time.text())
+            if self.is2d_check.isChecked():
+                self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], self.tag_values.text())
+                self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], self.tag.text())
+            else:
+                self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], False)
+                self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], False)
+            self.ini['additional_proxy_data_col'] = np.append(self.ini['additional_proxy_data_col'], self.proxy_data.text())
+            self.ini['additional_proxy_method'] = np.append(self.ini['additional_proxy_method'], self.ini.get('default_proxy_method', 1))
+            self.ini['additional_proxy_seas_comp'] = np.append(self.ini['additional_proxy_seas_comp'], self.ini.get('intercept_method', 2))
+            self.ini['additional_proxy_header_size'] = np.append(self.ini['additional_proxy_header_size'], self.header_rows.text())
+            self.ini['additional_proxy_time_format'] = np.append(self.ini['additional_proxy_time_format'], '%Y%m')
+
+        self.ini_signal.emit(self.ini)
+        self.accept()
+
+    def closeEvent(self, event):
+        if self.data is not None:
+            self.data.close()
+        super().closeEvent(event)
+
+
+
+# The UI and its functions
+class AppWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+        uic.loadUi(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.ui'), self)
+        self.setWindowTitle("IUP Regression Model")
+        self.setWindowIcon(QIcon('iupLogo.png'))
+
+        # Progress of the trend calculation in the status bar, see update_progress
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusbar.addPermanentWidget(self.progress_bar)
+
+        # Loading default data and proxies
+        self.ini = load_config_ini(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config folder/config.ini'))
+        self.list_of_data = []
+        if 'data_path' in self.ini:
+            try:
+                data = load_netCDF(self.ini['data_path'], self.ini)
+            except:
+                print('Error in loading the data file.')
+        self.list_of_data.append(data)
+        self.data_list.addItem(data.name)
+        if self.data_list.count() > 0:
+            self.data_list.setCurrentRow(0)
+
+        self.combo_pairs = {}
+        self.populate_dim_limits()
+
+        self.load_presets()
+
+        self.proxies = load_default_proxies(self.ini)
+        self.proxies = load_additional_proxies(self.proxies, self.ini)
+        self.infl_method_list = ['ind', 'pwl']
+
+        # Fill lists with proxies and data
+        self.update_trend_table()
+        self.update_proxy_table()
+
+        # Create important variables
+        self.X = None
+        self.beta = None
+        self.betaa = None
+        self.time = None
+
+        self.define_palettes()
+
+        # main UI functions
+        self.infl_check.toggled.connect(self.inflection_enable)
+        self.start_date.textChanged.connect(self.format_check)
+        self.end_date.textChanged.connect(self.format_check)
+        self.inflection_point.textChanged.connect(self.format_check)
+        self.inflection_method.currentIndexChanged.connect(self.inflection_method_change)
+        self.all_proxy_method.currentIndexChanged.connect(self.all_proxy_method_change)
+        self.mean_line.textChanged.connect(self.text_check)
+        self.anomaly_check.toggled.connect(self.anomaly_enable)
+        self.radio_rel.toggled.connect(self.anomaly_method_toggle)
+        self.radio_abs.toggled.connect(self.anomaly_method_toggle)
+        self.preset_combo.currentIndexChanged.connect(self.change_preset)
+        self.data_list.currentItemChanged.connect(self.data_change)
+
+        # Diagnostic UI functions
+        self.dia_proxy_combo.currentIndexChanged.connect(self.proxy_diagnostic)
+        self.dim_data_layout = self.data_dim_widget.layout()
+        self.dim_data_boxes = []
+        self.dia_data_combo.currentIndexChanged.connect(self.populate_data_dim_widget)
+        self.add_data_dia()
+        self.dim_X_layout = self.X_dim_widget.layout()
+        self.dim_X_boxes = []
+
+        # Start trend analysis
+        self.compute_button.clicked.connect(self.compute_trends)
+
+        # Plotting Model
+        self.dim_model_layout = self.dim_model_widget.layout()
+        self.dim_model_boxes = []
+        self.plot_button_model.clicked.connect(self.plot_model_figure)
+        self.model_layout = QVBoxLayout(self.model_fig_widget)
+        self.model_canvas = MplCanvas(self.model_fig_widget)
+        self.model_layout.addWidget(self.model_canvas)
+
+        # Plotting Contour
+        self.dim_con_layout = self.dim_con_widget.layout()
+        self.dim_con_boxes = []
+        self.plot_button_con.clicked.connect(self.plot_contour_figure)
+        self.con_layout = QVBoxLayout(self.contour_fig_widget)
+        self.con_canvas = MplCanvas(self.contour_fig_widget)
+        self.con_layout.addWidget(self.con_canvas)
+
+        # Plotting Residuals
+        self.dim_resi_layout = self.dim_resi_widget.layout()
+        self.dim_resi_boxes = []
+        self.plot_button_resi.clicked.connect(self.plot_resi_figure)
+        self.resi_layout = QVBoxLayout(self.resi_fig_widget)
+        self.resi_canvas = MplCanvas(self.resi_fig_widget)
+        self.resi_layout.addWidget(self.resi_canvas)
+
+        # Plotting Measurement Density
+        self.dim_cell_layout = self.dim_cell_widget.layout()
+        self.dim_cell_boxes = []
+        # self.plot_button_cell.clicked.connect(self.plot_observations_figure)
+        self.cell_layout = QVBoxLayout(self.cell_fig_widget)
+        self.cell_canvas = MplCanvas(self.cell_fig_widget)
+        self.cell_layout.addWidget(self.cell_canvas)
+
+        # Plotting Proxies
+        self.dim_proxy_layout = self.dim_proxy_widget.layout()
+        self.dim_proxy_layout_checks = self.dim_proxy_widget_checks.layout()
+        self.dim_proxy_boxes = []
+        self.dim_proxy_checks = []
+        self.plot_button_proxy.clicked.connect(self.plot_proxy_figure)
+        self.proxy_layout = QVBoxLayout(self.proxy_fig_widget)
+        self.proxy_canvas = MplCanvas(self.proxy_fig_widget)
+        self.proxy_layout.addWidget(self.proxy_canvas)
+
+        # Plotting Proxy Contour
+        self.dim_proxy_con_layout = self.dim_proxy_con_widget.layout()
+        self.dim_proxy_con_boxes = []
+        self.plot_button_proxy_con.clicked.connect(self.plot_proxy_con_figure)
+        self.proxy_con_layout = QVBoxLayout(self.proxy_con_fig_widget)
+        self.proxy_con_canvas = MplCanvas(self.proxy_con_fig_widget)
+        self.proxy_con_layout.addWidget(self.proxy_con_canvas)
+
+        # Menu button connection
+        self.menu_help.triggered.connect(self.print_ini)
+        self.menu_load_data.triggered.connect(self.open_data_dialog)
+        self.menu_load_proxy.triggered.connect(self.open_proxy_dialog)
+        self.menu_save.triggered.connect(self.save_file)
+        self.menu_save_plot.triggered.connect(self.save_plot)
+
+        self.frozen_list.horizontalHeader().sectionResized.connect(self.sync_frozen_to_main)
+
+        # Load ini settings and input the data into the UI
+        self.load_ini_settings()
+        QTimer.singleShot(0, self.sync_tables)
+
+    def load_ini_settings(self):
+
+        if 'inflection_point' in self.ini:
+            self.inflection_point.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['inflection_point'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.inflection_point.setText('YYYY-MM')
+
+        if 'inflection_point' in self.ini and 'inflection_method' in self.ini:
+            if self.ini['inflection_method'] == 'ind':
+                self.inflection_method.setCurrentIndex(0)
+            elif self.ini['inflection_method'] == 'pwl':
+                self.inflection_method.setCurrentIndex(1)
+            self.infl_check.setChecked(True)
+
+        if 'start_date' in self.ini:
+            self.start_date.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['start_date'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.start_date.setText('YYYY-MM')
+
+        if 'end_date' in self.ini:
+            self.end_date.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['end_date'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.end_date.setText('YYYY-MM')
+
+        self.frozen_list.cellWidget(0, 1).setCurrentIndex(int(self.ini.get('trend_method', self.ini.get('default_method', 1))))
+        self.frozen_list.cellWidget(1, 1).setCurrentIndex(int(self.ini.get('intercept_method', self.ini.get('default_method', 1))))
+
+        self.mean_line.setText(self.ini.get('averaging_window', ''))
+
+        if self.ini.get('anomaly', 'False') == 'True':
+            self.anomaly_check.setChecked(True)
+        else:
+            self.anomaly_check.setChecked(False)
+
+        for k, dim in enumerate(self.list_of_data[self.data_list.currentRow()].dim_array):
+            if dim == 'time':
+                continue
+            else:
+                min_combo, max_combo = self.combo_pairs[dim]
+                limits = self.ini.get('additional_var_' + str(k + 1) + '_limit', None)
+                if not limits:
+                    continue
+                elif ',' in limits:
+                    min, max = list(map(int, self.ini.get('additional_var_' + str(k + 1) + '_limit', None).split(",")))
+                    min_combo.setCurrentIndex(min)
+                    max_combo.setCurrentIndex(max)
+                else:
+                    limits = int(self.ini.get('additional_var_' + str(k + 1) + '_limit', None))
+                    min_combo.setCurrentIndex(limits)
+                    max_combo.setCurrentIndex(limits)
+
+    def save_file(self):
+        # Stop the function if nothing was computed yet
+        if self.X is None:
+            QMessageBox.warning(self, "Warning", "No data to save yet. Please compute the data first.")
+            return
+
+        # Open a file dialog to select the save location
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "NetCDF Files (*.nc)")
+
+        data = self.current_data
+        # If a path was selected, save the file
+        if save_path:
+            lat = data.lat
+            alt = data.lev
+            lon = data.lon
+            dims = data.dim_array
+
+            with nc.Dataset(save_path + '.nc', 'w') as f:
+                var_list = []
+                for k, i in enumerate(dims[1:]):
+                    f.createDimension(i, data.o3.shape[k+1])
+                    var_list.append(f.createVariable(i, 'f8', (i,)))
+                    var_list[k][:] = getattr(data, i)
+                    # var_list[k].units = 'degrees_north'
+                    # lat_var.long_name = 'latitude'
+
+                max_length = max(len(s) for s in self.proxy_string)
+                f.createDimension('n_coefficients', len(self.proxy_string))
+                f.createDimension('string_length', max_length)
+                f.createDimension('time', len(self.time))
+                f.createDimension('infl', 2)
+
+                ind_var = f.createVariable('independent_variable_names', 'str', ('n_coefficients',))
+                ind_var[:] = np.array(self.proxy_string)
+
+                time_var = f.createVariable('date', 'S10', 'time')
+                time_var.unit = 'YYYYMMDD'
+                frac_var = f.createVariable('fractional_year', 'f4', ('time',), compression="zlib")
+
+                dim_tuple = tuple(dim_name for dim_name in dims)
+                X_var = f.createVariable('independent_variable_matrix', 'f4', dim_tuple + ('n_coefficients',), compression="zlib")
+                X_var[:] = self.X
+                beta_var = f.createVariable('beta', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
+                beta_var[:] = self.betaa
+                # covb_var = f.createVariable('beta_uncertainty', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
+                # print(self.convbeta)
+                # covb_var[:] = self.convbeta
+
+                if len(self.trends.shape) == len(dim_tuple):
+                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:] + ('infl',))
+                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:] + ('infl',))
+                else:
+                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:])
+                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:])
+                trend_var[:] = self.trends
+                sig_var[:] = self.signi
+
+                X_var.long_name = 'Independent Variable matrix'
+                beta_var.long_name = 'Fit Parameters'
+
+                frac_year = convert_datetime_to_fractional(self.time)
+
+                time_int = np.array([str_time.strftime('%Y-%m-%d') for str_time in self.time])
+                time_var[:] = time_int
+                frac_var[:] = frac_year
+
+                f.program = 'IUP_regression_model'
+                f.version = ver
+                f.contact = '''Name: Brian Auffarth\rAffiliation: University of Bremen\rE-mail: brian@iup.physik.uni-bremen.de'''
+                f.date_of_creation = dt.datetime.today().strftime('%Y-%m-%d')
+                f.configuration_settings = "\n".join([f"{key} = {value}" for key, value in self.ini.items()])
+
+    def save_plot(self):
+        canvas = self.figure_tabs.widget(self.figure_tabs.currentIndex()).findChild(FigureCanvas)
+        if canvas:
+            if not canvas.figure.axes:
+                print('Canvas is empty. Please plto something before saving.')
+                return
+            save_path, _ = QFileDialog.getSaveFileName(self, "Save Figure", canvas.figure.axes[0].get_title().replace('\n', ' ') + '.png', "PNG Files (*.png);;All Files (*)")
+            if save_path:
+                original_size = tuple(canvas.figure.get_size_inches())
+                dialog = SavePlotWindow(original_size, self)
+                if dialog.exec_() == QtWidgets.QDialog.Accepted:
+                    fig_size, include_title = dialog.get_options()
+                    if not fig_size:
+                        return
+                else:
+                    return  # User canceled the operation
+                canvas.figure.set_size_inches(fig_size)
+                original_title = canvas.figure.axes[0].get_title()
+                if not include_title:
+                    canvas.figure.axes[0].set_title('')
+                self.model_canvas.figure.tight_layout()
+                canvas.figure.savefig(save_path, dpi=300)
+                canvas.figure.set_size_inches(original_size)
+                canvas.figure.axes[0].set_title(original_title)
+                self.model_canvas.figure.tight_layout()
+
+    def add_data_dia(self):
+        self.dia_data_combo.clear()
+        for i in self.list_of_data:
+            self.dia_data_combo.addItem(i.name)
+
+    def populate_data_dim_widget(self):
+        self.clear_dim_widgets(self.dim_data_layout)
+        self.dim_data_boxes.clear()
+
+        for dim_index in range(1, len(self.list_of_data[self.dia_data_combo.currentIndex()].o3.shape)):
+            col_layout = QVBoxLayout()
+            label = QtWidgets.QLabel(self.list_of_data[self.dia_data_combo.currentIndex()].dim_array[dim_index])
+            col_layout.addWidget(label)
+
+            combo = QtWidgets.QComboBox()
+            values = getattr(self.list_of_data[self.dia_data_combo.currentIndex()], self.list_of_data[self.dia_data_combo.currentIndex()].dim_array[dim_index])
+            combo.addItems([str(value) for value in values])
+            col_layout.addWidget(combo)
+            combo.currentIndexChanged.connect(self.data_diagnostic)
+
+            self.dim_data_boxes.append(combo)
+
+            self.dim_data_layout.addLayout(col_layout)
+        self.data_diagnostic()
+        # data = self.list_of_data[self.data_list.currentRow()]
+
+    def proxy_diagnostic(self, index):
+        start_date = str(np.array(self.proxies[index].time)[0])
+        end_date = str(np.array(self.proxies[index].time)[-1])
+        self.dia_proxy_start.setText(start_date)
+        self.dia_proxy_end.setText(end_date)
+        dim_str = ' '.join(map(str, self.proxies[index].data.shape))
+        self.dia_proxy.setText(dim_str)
+
+        # Fill Table
+        if len(self.proxies[index].data.shape) >= 2:
+            sec_dim = self.proxies[index].data.shape[1]
+            self.dia_proxy_table.setColumnCount(sec_dim)
+            self.dia_proxy_table.setHorizontalHeaderLabels(getattr(self.proxies[index], self.proxies[index].tag).astype(str))
+        else:
+            sec_dim = 1
+            self.dia_proxy_table.setColumnCount(sec_dim)
+        self.dia_proxy_table.setRowCount(self.proxies[index].data.shape[0])
+
+        self.dia_proxy_table.setVerticalHeaderLabels(self.proxies[index].time.astype(str))
+
+
+        for k, i in enumerate(self.proxies[index].data):
+            if sec_dim == 1:
+                self.dia_proxy_table.setItem(k, 0, QTableWidgetItem(str(self.proxies[index].data[k])))
+            else:
+                for kk in range(sec_dim):
+                    self.dia_proxy_table.setItem(k, kk, QTableWidgetItem(str(self.proxies[index].data[k, kk])))
+
+    def update_trend_table(self):
+        # Update of the frozen table
+        self.frozen_list.setRowCount(2)
+        # Add method combo boxes for trend and intercept
+        self.frozen_list.setItem(0, 0, QTableWidgetItem('Trend'))
+        methodBox = ComboMethod(self)
+        self.frozen_list.setCellWidget(0, 1, methodBox)
+        methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=0: self.method_update(methodBox, row))
+        methodBox.setCurrentIndex(int(self.ini.get('trend_method', 1)))
+
+        self.frozen_list.setItem(1, 0, QTableWidgetItem('Intercept'))
+        methodBox = ComboMethod(self)
+        self.frozen_list.setCellWidget(1, 1, methodBox)
+        methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=1: self.method_update(methodBox, row))
+        methodBox.setCurrentIndex(int(self.ini.get('intercept_method', 1)))
+
+        # Add seasonal component combo boxes for trend and intercept
+        seasBox = ComboSeasonal(self)
+        self.frozen_list.setCellWidget(0, 2, seasBox)
+        seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=0: self.seas_update(seasBox, row))
+        seasBox.setCurrentIndex(int(self.ini.get('trend_seasonal_component', self.ini.get('default_seasonal_component', 2))) - 1)
+        if self.frozen_list.cellWidget(0, 1).currentIndex() != 2:
+            seasBox.setDisabled(True)
+
+        seasBox = ComboSeasonal(self)
+        self.frozen_list.setCellWidget(1, 2, seasBox)
+        seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=1: self.seas_update(seasBox, row))
+        seasBox.setCurrentIndex(int(self.ini.get('intercept_seasonal_component', self.ini.get('intercept_seasonal_component', 2))) - 1)
+        if self.frozen_list.cellWidget(1, 1).currentIndex() != 2:
+            seasBox.setDisabled(True)
+        self.frozen_list.setHorizontalHeaderLabels(["Variable", "Method", "Seasonal Component"])
+
+        total_height = sum(self.frozen_list.rowHeight(row) for row in range(self.frozen_list.rowCount()))
+        total_height += self.frozen_list.horizontalHeader().height()  # Add header height
+        self.frozen_list.setFixedHeight(total_height)
+
+        self.frozen_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+
+    def update_proxy_table(self):
+        # Update of the main proxy table
+        self.proxy_list.setRowCount(len(self.proxies))
+        # Add method combo boxes for each available proxy
+        for k, i in enumerate(self.proxies):
+            self.proxy_list.setItem(k, 0, QTableWidgetItem(i.name))
+            methodBox = ComboMethod(self)
+            self.proxy_list.setCellWidget(k, 1, methodBox)
+            methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=k: self.method_update(methodBox, row))
+            methodBox.setCurrentIndex(int(i.method))
+
+        # Add seasonal component combo boxes for each available proxy
+        for k, i in enumerate(self.proxies):
+            # self.proxy_list.setItem(k, 0, QTableWidgetItem(i.name))
+            seasBox = ComboSeasonal(self)
+            self.proxy_list.setCellWidget(k, 2, seasBox)
+            seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=k: self.seas_update(seasBox, row))
+            seasBox.setCurrentIndex(i.seas_comp - 1)
+            if self.proxy_list.cellWidget(k, 1).currentIndex() != 2:
+                seasBox.setDisabled(True)
+        self.proxy_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.proxy_list.setHorizontalHeaderLabels(["Proxy", "Method", "Seas. Comp."])
+
+        # Update of the combo box for diagnostic
+        self.dia_proxy_combo.clear()
+        for k, i in enumerate(self.proxies):
+            self.dia_proxy_combo.addItem(i.name)
+        self.proxy_diagnostic(0)
+
+    def sync_tables(self):
+        for col in range(self.proxy_list.columnCount()):
+            self.frozen_list.horizontalHeader().resizeSection(col, self.proxy_list.horizontalHeader().sectionSize(col))
+        self.proxy_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        for col in range(self.proxy_list.columnCount()):
+            self.proxy_list.horizontalHeader().resizeSection(col, self.frozen_list.horizontalHeader().sectionSize(col))
+
+    def sync_frozen_to_main(self, logical_index, old_size, new_size):
+        self.proxy_list.horizontalHeader().resizeSection(logical_index, new_size)
+
+    def open_data_dialog(self):
+        dialog = QFileDialog(self)
+        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
+        dialog.setNameFilters(["NetCDF (*.nc)", "ASCII files (*.*)"])
+        dialog.setViewMode(QFileDialog.Detail)
+
+        if dialog.exec_():
+            fileName = dialog.selectedFiles()
+        else:
+            return
+
+        self.open_data_settings_dialog(fileName)
+
+        for i in fileName:
+            data = load_netCDF(i, self.ini)
+            if data == None:
+                continue
+            else:
+                self.list_of_data.append(data)
+        self.reload_data_list()
+
+    def open_proxy_dialog(self):
+        dialog = QFileDialog(self)
+        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
+        dialog.setNameFilters(["ASCII files (*.*)", "NetCDF (*.nc)"])
+        dialog.setViewMode(QFileDialog.Detail)
+
+        if dialog.exec_():
+            fileName = dialog.selectedFiles()
+        else:
+            return
+
+        self.open_proxy_settings_dialog(fileName)
+
+        for k, i in enumerate(fileName):
+            new_proxy = load_add_proxy_file(self.ini, -1)
+            if new_proxy == None:
+                continue
+            else:
+                self.proxies.append(new_proxy)
+
+        self.update_proxy_table()
+
+    def open_data_settings_dialog(self, filename):
+        var_window = VariableWindow(self.ini, filename)
+        var_window.ini_signal.connect(self.update_ini_settings)
+        var_window.setWindowTitle('Variable Settings')
+        var_window.exec_()
+
+    def open_proxy_settings_dialog(self, filename):
+        proxy_window = ProxyWindow(self.ini, filename)
+        proxy_window.ini_signal.connect(self.update_ini_settings)
+        proxy_window.setWindowTitle('Proxy Settings')
+        proxy_window.exec_()
+
+    def update_ini_settings(self, ini):
+        self.ini = ini
+
+    def reload_data_list(self):
+        self.data_list.clear()
+        for i in self.list_of_data:
+            self.data_list.addItem(i.name)
+
+        self.add_data_dia()
+
+    def define_palettes(self):
+        # Set palette
+        self.palette_wrong = QPalette()
+        self.palette_wrong.setColor(QPalette.Background, QColor(212, 19, 22))
+        self.palette_wrong.setColor(QPalette.Base, QColor(212, 19, 22))
+
+        self.palette_right = QPalette()
+        self.palette_right.setColor(QPalette.ColorRole.WindowText, QColor(0, 170, 0))
+        self.palette_right.setColor(QPalette.Text, QColor(0, 170, 0))
+        self.palette_right.setColor(QPalette.Background, QColor(255, 255, 255, 0))
+
+    def inflection_enable(self):
+        # Enables/Disables the date entry
+        if self.infl_check.isChecked() == True:
+            self.inflection_point.setEnabled(True)
+            self.inflection_method.setEnabled(True)
+            self.ini['inflection_method'] = self.infl_method_list[self.inflection_method.currentIndex()]
+            self.ini['inflection_point'] = self.inflection_point.text()
+        else:
+            self.inflection_point.setEnabled(False)
+            self.ini.pop('inflection_point', None)
+            self.inflection_method.setEnabled(False)
+            self.ini.pop('inflection_method', None)
+
+    def anomaly_enable(self):
+        if self.anomaly_check.isChecked() == True:
+            self.ini['anomaly'] = 'True'
+            self.anom_frame.setEnabled(True)
+        else:
+            self.ini['anomaly'] = 'False'
+            self.anom_frame.setEnabled(False)
+
+    def anomaly_method_toggle(self):
+        if self.radio_rel.isChecked():
+            self.ini['anomaly_method'] = 'rel'
+        elif self.radio_abs.isChecked():
+            self.ini['anomaly_method'] = 'abs'
+
+    def format_check(self):
+        # Changes the checkmarks if the format of the date is being recongnized
+        checkbox = getattr(self, 'check_' + str(self.sender().objectName()).split('_')[0], None)
+
+        if str(self.sender().text()) == '':
+            checkbox.setChecked(False)
+            checkbox.setPalette(self.palette_wrong)
+            self.ini.pop(self.sender().objectName(), None)
+            return
+        try:
+            date = pd.to_datetime(str(self.sender().text()), format='%Y-%m').date()
+            checkbox.setChecked(True)
+            checkbox.setPalette(self.palette_right)
+            self.ini[self.sender().objectName()] = dt.datetime.strftime(dt.datetime.strptime(str(self.sender().text()), '%Y-%m'), '%Y-%m')
+        except:
+            checkbox.setChecked(False)
+            checkbox.setPalette(self.palette_wrong)
+            self.ini.pop(self.sender().objectName(), None)
+
+    def text_check(self):
+        # Changes the checkmarks if the format of the input is being recognized
+        check = averaging_window_text_check(str(self.sender().text()))
+        self.ini['averaging_window'] = str(self.sender().text())
+
+        months_str = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+        if check == 0:
+            self.check_mean.setChecked(False)
+            self.check_mean.setPalette(self.palette_wrong)
+            self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
+        else:
+            self.check_mean.setChecked(True)
+            self.check_mean.setPalette(self.palette_right)
+            if check == 2:
+                month_list = re.split(r',\s*', str(self.sender().text()))
+                month_list = np.array([int(num) for num in month_list])
+                string = [months_str[i-1] for i in month_list]
+                self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p>' + ', '.join(string) + '</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
+            else:
+                self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p>' + 'all' + '</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
+            for row in range(self.frozen_list.rowCount()):
+                if int(self.frozen_list.cellWidget(row, 1).currentIndex()) >= 2:
+                    self.frozen_list.cellWidget(row, 1).setCurrentIndex(1)
+            for row in range(self.proxy_list.rowCount()):
+                if int(self.proxy_list.cellWidget(row, 1).currentIndex()) >= 2:
+                    self.proxy_list.cellWidget(row, 1).setCurrentIndex(1)
+
+    def method_update(self, methodBox, row):
+        table = self.sender().parent().parent()
+        if table.objectName() != 'frozen_list':
+            self.proxies[row].method = int(methodBox.currentIndex())
+            if int(methodBox.currentIndex()) > int(self.frozen_list.cellWidget(1, 1).currentIndex()):
+                self.frozen_list.cellWidget(1, 1).setCurrentIndex(int(methodBox.currentIndex()))
+        else:
+            if table.indexAt(methodBox.pos()).row() == 0:
+                self.ini['trend_method'] = int(methodBox.currentIndex())
+            elif table.indexAt(methodBox.pos()).row() == 1:
+                self.ini['intercept_method'] = int(methodBox.currentIndex())
+
+        if table.cellWidget(row, 2) is not None:
+            if int(methodBox.currentIndex()) == 2:
+                table.cellWidget(row, 2).setEnabled(True)
+            else:
+                table.cellWidget(row, 2).setEnabled(False)
+            # Reset the method to single method if the user also wants to average over the year
+            if self.check_mean.isChecked() == True and int(methodBox.currentIndex()) >= 2:
+                table.cellWidget(row, 1).setCurrentIndex(1)
+
+    def seas_update(self, seasBox, row):
+        table = self.sender().parent().parent()
+        if table.objectName() != 'frozen_list':
+            self.proxies[row].seas_comp = seasBox.currentIndex() + 1
+        else:
+            if table.indexAt(seasBox.pos()).row() == 0:
+                self.ini['trend_seasonal_component'] = seasBox.currentIndex() + 1
+            elif table.indexAt(seasBox.pos()).row() == 1:
+                self.ini['intercept_seasonal_component'] = seasBox.currentIndex() + 1
+
+    def load_presets(self):
+        self.preset_list = ['-None-']
+        for file in os.listdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config folder')):
+            if file.endswith('.ini'):
+                self.preset_list.append(file.split('.')[0])
+        self.preset_combo.clear()
+        self.preset_combo.addItems(self.preset_list)
+
+    def change_preset(self):
+        if self.preset_combo.currentIndex() == 0:
+            return
+
+        file_name = './config folder/' + self.preset_list[self.preset_combo.currentIndex()] + '.ini'
+
+        ini = {}
+
+        with open(file_name, 'r') as f:
+            # Count the number of additional_proxy_path keys
+            add_proxy_count = 0
+            for line in f:
+                if '=' not in line or line[0] == '#':
+                    # Skip line in config file if no = sign is in there or if it starts with #
+                    continue
+                (key, val) = line.split('=')
+                # cleaning the input data
+                key = key.strip()
+                if key == 'additional_proxy_path':
+                    add_proxy_count += 1
+
+            # Creating empty lists for the additional proxy data
+            ini['additional_proxy_name'] = np.empty(add_proxy_count, dtype='object')
+            ini['additional_proxy_path'] = np.empty(add_proxy_count, dtype='object')
+            ini['additional_proxy_time_col'] = np.zeros(add_proxy_count, dtype='object')
+            ini['additional_proxy_data_col'] = np.ones(add_proxy_count, dtype=int)
+            ini['additional_proxy_method'] = np.ones(add_proxy_count, dtype=int)
+            ini['additional_proxy_comment_symbol'] = np.empty(add_proxy_count, dtype='object')
+            ini['additional_proxy_header_size'] = np.empty(add_proxy_count, dtype=int)
+            ini['additional_proxy_time_format'] = np.empty(add_proxy_count, dtype='object')
+
+        with open(file_name, 'r') as f:
+            add_proxy_count = -1
+            for line in f:
+                if '=' not in line or line[0] == '#':
+                    # Skip line in config file if no = sign is in there or if it starts with #
+                    continue
+                (key, val) = line.split('=')
+                # cleaning the input data
+                key = key.strip()
+                val = val.strip()
+                if key in ini.keys():
+                    if key == 'additional_proxy_path':
+                        add_proxy_count += 1
+                    ini[key][add_proxy_count] = val
+                else:
+                    ini[key] = val
+
+        ini['additional_proxy_method'] = ini.get('additional_proxy_method', ini.get('default_proxy_method', 1))
+
+        # config ini loaded
+
+        if 'inflection_point' in ini:
+            self.inflection_point.setText(dt.datetime.strftime(dt.datetime.strptime(ini['inflection_point'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.inflection_point.setText('YYYY-MM')
+
+        if 'inflection_point' in ini and 'inflection_method' in ini:
+            if ini['inflection_method'] == 'ind':
+                self.inflection_method.setCurrentIndex(0)
+            elif ini['inflection_method'] == 'pwl':
+                self.inflection_method.setCurrentIndex(1)
+            self.infl_check.setChecked(True)
+
+        if 'start_date' in ini:
+            self.start_date.setText(dt.datetime.strftime(dt.datetime.strptime(ini['start_date'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.start_date.setText('YYYY-MM')
+
+        if 'end_date' in ini:
+            self.end_date.setText(dt.datetime.strftime(dt.datetime.strptime(ini['end_date'], '%Y-%m').date(), '%Y-%m'))
+        else:
+            self.end_date.setText('YYYY-MM')
+
+        if 'trend_method' in ini:
+            self.trend_method_combo.setCurrentIndex(int(ini['trend_method']))
+        else:
+            self.trend_method_combo.setCurrentIndex(1)
+        if int(self.intercept_method_combo.currentIndex()) == 2:
+            self.intercept_seas_combo.setDisabled(False)
+        else:
+            self.intercept_seas_combo.setDisabled(True)
+
+        if 'intercept_method' in ini:
+            self.intercept_method_combo.setCurrentIndex(int(ini['intercept_method']))
+        else:
+            self.intercept_method_combo.setCurrentIndex(1)
+        if int(self.intercept_method_combo.currentIndex()) == 2:
+            self.intercept_seas_combo.setDisabled(False)
+        else:
+            self.intercept_seas_combo.setDisabled(True)
+
+        self.mean_line.setText(self.ini.get('averaging_window', ''))
+
+        if ini.get('anomaly', 'False') == 'True':
+            self.anomaly_check.setChecked(True)
+        else:
+            self.anomaly_check.setChecked(False)
+
+    def all_proxy_method_change(self):
+        index = int(self.all_proxy_method.currentIndex()) - 1
+        if index < 0:       # Doesn't do anything if ComboBox changes to "mixed"
+            return
+
+        for row in range(self.proxy_list.rowCount()):
+            combo_box = self.proxy_list.cellWidget(row, 1)
+            combo_box.setCurrentIndex(index)
+        for row in range(self.frozen_list.rowCount()):
+            combo_box = self.frozen_list.cellWidget(row, 1)
+            combo_box.setCurrentIndex(index)
+
+    def inflection_method_change(self):
+        self.ini['inflection_method'] = self.infl_method_list[self.inflection_method.currentIndex()]
+
+    def data_change(self):
+        # self.ini['time_format'] = self.list_of_data[self.data_list.currentRow()].time_format
+
+        self.populate_dim_limits()
+
+    def clear_dim_widgets(self, layout):
+        if layout is not None:
+            while layout.count():
+                item = layout.takeAt(0)
+                widget = item.widget()
+                if widget is not None:
+                    widget.deleteLater()
+                else:
+                    child_layout = item.layout()
+                    if child_layout is not None:
+                        self.clear_dim_widgets(child_layout)
+
+    def populate_dim_widgets_1d(self, var_string):
+        boxes_name = 'dim_' + var_string + '_boxes'
+        layout_name = 'dim_' + var_string + '_layout'
+        button_name = 'plot_button_' + var_string
+
+        boxes = getattr(self, boxes_name, None)
+        layout = getattr(self, layout_name, None)
+        button = getattr(self, button_name, None)
+
+        button.setDisabled(False)
+
+        boxes.clear()
+
+        for dim_index in range(1, len(self.current_data.o3.shape)):
+            col_layout = QVBoxLayout()
+            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
+            col_layout.addWidget(label)
+
+            combo = QtWidgets.QComboBox()
+            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
+            combo.addItems([str(value) for value in values])
+            col_layout.addWidget(combo)
+
+            boxes.append(combo)
+
+            layout.addLayout(col_layout)
+
+    def populate_dim_widgets_2d(self, var_string):
+        boxes_name = 'dim_' + var_string + '_boxes'
+        layout_name = 'dim_' + var_string + '_layout'
+        button_name = 'plot_button_' + var_string
+
+        boxes = getattr(self, boxes_name, None)
+        layout = getattr(self, layout_name, None)
+        button = getattr(self, button_name, None)
+
+        boxes.clear()
+
+        for dim_index in range(1, len(self.current_data.o3.shape)):
+            col_layout = QVBoxLayout()
+            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
+            col_layout.addWidget(label)
+
+            combo = QtWidgets.QComboBox()
+            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
+            combo.addItem('---X Axis---')
+            combo.addItem('---Y Axis---')
+            combo.addItems([str(value) for value in values])
+            col_layout.addWidget(combo)
+            combo.currentIndexChanged.connect(lambda: self.sync_combo_boxes(var_string))
+
+            boxes.append(combo)
+
+            layout.addLayout(col_layout)
+        for k, i in enumerate(self.dim_con_boxes):
+            i.setCurrentIndex(k)
+
+    def populate_dim_widgets_proxy(self):
+        checks = self.dim_proxy_checks
+        layout = self.dim_proxy_layout_checks
+
+        checks.clear()
+
+        str_groups = get_string_groups(self.proxy_string)
+        for key, i in str_groups.items():
+            if key[0] == 'proxy':
+                col_layout = QVBoxLayout()
+
+                check = QtWidgets.QCheckBox()
+                check.setText(key[3])
+                col_layout.addWidget(check)
+
+                checks.append(check)
+
+                layout.addLayout(col_layout)
+
+    def populate_dim_widgets_proxy_con(self):
+        self.proxy_con_combo.clear()
+        combo = self.proxy_con_combo
+
+        proxies = []
+
+        str_groups = get_string_groups(self.proxy_string)
+        for key, i in str_groups.items():
+            if key[0] == 'proxy':
+                proxies.append(key[3])
+
+        combo.addItems(proxies)
+
+    def populate_X_dim_widget(self):
+        self.dim_X_boxes.clear()
+
+        for dim_index in range(1, len(self.current_data.o3.shape)):
+            col_layout = QVBoxLayout()
+            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
+            col_layout.addWidget(label)
+
+            combo = QtWidgets.QComboBox()
+            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
+            combo.addItems([str(value) for value in values])
+            col_layout.addWidget(combo)
+            combo.currentIndexChanged.connect(self.X_diagnostic)
+
+            self.dim_X_boxes.append(combo)
+
+            self.dim_X_layout.addLayout(col_layout)
+        self.X_diagnostic()
+
+    def lim_update_min(self, dim, index):
+        min_combo, max_combo = self.combo_pairs[dim]
+        if index > max_combo.currentIndex():
+            max_combo.setCurrentIndex(index)  # Adjust max to match min
+        dim_index = self.list_of_data[self.data_list.currentRow()].dim_array.index(dim)
+        self.ini['additional_var_' + str(dim_index + 1) + '_limit'] = str(min_combo.currentIndex()) + ', ' + str(max_combo.currentIndex())
+
+    def lim_update_max(self, dim, index):
+        min_combo, max_combo = self.combo_pairs[dim]
+        if index < min_combo.currentIndex():
+            min_combo.setCurrentIndex(index)  # Adjust min to match max
+        dim_index = self.list_of_data[self.data_list.currentRow()].dim_array.index(dim)
+        self.ini['additional_var_' + str(dim_index + 1) + '_limit'] = str(min_combo.currentIndex()) + ', ' + str(max_combo.currentIndex())
+
+    def populate_dim_limits(self):
+        data = self.list_of_data[self.data_list.currentRow()]
+        # Clear existing widgets in data_lim_box
+        for i in reversed(range(self.data_lim_box.layout().count())):
+            widget = self.data_lim_box.layout().itemAt(i).widget()
+            if widget:
+                widget.deleteLater()
+
+        self.combo_pairs.clear()
+
+        # Get dimensions except 'time'
+        dimensions = [dim for dim in data.dim_array if dim != 'time']
+
+        main_layout = self.data_lim_box.layout()
+        if main_layout is None:
+            main_layout = QVBoxLayout()
+            self.data_lim_box.setLayout(main_layout)
+
+        # Loop through each dimension and create a pair of combo boxes
+        for dim in dimensions:
+            widget = QtWidgets.QWidget()  # Container widget
+            h_layout = QHBoxLayout(widget)  # Horizontal layout for combo box pairs
+
+            dim_values = list(map(str, getattr(data, dim)))
+            # First combo box with label
+            vbox1 = QVBoxLayout()
+            label1 = QtWidgets.QLabel(f"{dim} Min:")
+            combo1 = QtWidgets.QComboBox()
+            combo1.addItems(dim_values)  # Populate with data
+            vbox1.addWidget(label1)
+            vbox1.addWidget(combo1)
+
+            # Second combo box with label
+            vbox2 = QVBoxLayout()
+            label2 = QtWidgets.QLabel(f"{dim} Max:")
+            combo2 = QtWidgets.QComboBox()
+            combo2.addItems(dim_values)
+            combo2.setCurrentIndex(len(dim_values) - 1)
+            vbox2.addWidget(label2)
+            vbox2.addWidget(combo2)
+
+            self.combo_pairs[dim] = (combo1, combo2)
+
+            # Connect signals to slot functions
+            combo1.currentIndexChanged.connect(lambda index, d=dim: self.lim_update_min(d, index))
+            combo2.currentIndexChanged.connect(lambda index, d=dim: self.lim_update_max(d, index))
+
+            # Add both vertical layouts to the horizontal layout
+            h_layout.addLayout(vbox1)
+            h_layout.addLayout(vbox2)
+
+            # Add the widget container to the group box layout
+            main_layout.addWidget(widget)
+
+    def sync_combo_boxes(self, var_string):
+        # Get the indices of all combo boxes
+        boxes = getattr(self, 'dim_' + var_string + '_boxes', None)
+        button = getattr(self, 'plot_button_' + var_string, None)
+        current_indices = [combo.currentIndex() for combo in boxes]
+
+        # Disable the plot button if X- and Y-axis are not picked exactly once and if one of these has not enough values
+        valid_indices = current_indices.count(0) == 1 and current_indices.count(1) == 1
+        valid_lengths = all(self.dim_con_boxes[i].count() > 3 for i, idx in enumerate(current_indices) if idx in (0, 1))
+        button.setDisabled(not (valid_indices and valid_lengths))
+
+        sender_index = self.sender().currentIndex()
+        if sender_index in {0, 1}:
+            for i, combo in enumerate(boxes):
+                if combo != self.sender() and combo.currentIndex() == sender_index:
+                    # Find a new valid index for the conflicting combo box
+                    for new_index in range(combo.count()):
+                        if new_index not in {0, 1} and new_index != sender_index:
+                            combo.setCurrentIndex(new_index)
+                            break
+
+    def X_diagnostic(self):
+        indices = [combo.currentIndex() for combo in self.dim_X_boxes]
+        matrix = self.X[(slice(None), *indices, slice(None))]
+        header = self.proxy_string
+        date = self.time
+
+        # Fill Table
+        self.dia_X_table.setColumnCount(len(header))
+        self.dia_X_table.setRowCount(len(date))
+
+        self.dia_X_table.setHorizontalHeaderLabels(header)
+        self.dia_X_table.setVerticalHeaderLabels(date.astype(str))
+
+        for k in range(len(date)):
+            for kk in range(len(header)):
+                self.dia_X_table.setItem(k, kk, QTableWidgetItem(str(matrix[k, kk])))
+
+    def data_diagnostic(self):
+        indices = [combo.currentIndex() for combo in self.dim_data_boxes]
+        matrix = self.list_of_data[self.dia_data_combo.currentIndex()].o3[(slice(None), *indices)]
+        date = self.list_of_data[self.dia_data_combo.currentIndex()].time
+
+        # Fill Table
+        self.dia_data_table.setColumnCount(1)
+        self.dia_data_table.setRowCount(len(date))
+
+        self.dia_data_table.setVerticalHeaderLabels(date.astype(str))
+
+        for k in range(len(date)):
+            self.dia_data_table.setItem(k, 0, QTableWidgetItem(str(matrix[k])))
+
+        # Fill information
+        self.dia_data_start.setText(str(np.nanmin(date)))
+        self.dia_data_end.setText(str(np.nanmax(date)))
+        self.dia_data_time.setText(str(len(date)))
+        self.dia_data_nan.setText(str(np.sum(np.isnan(matrix.filled(np.nan)))))
+
+    def plot_model_figure(self):
+        # Clear the figure
+        self.model_canvas.figure.clf()
+
+        # Preparing Plot values
+        data = self.current_data
+
+        # Get dimension combo boxes indices
+        plot_indices = [combo.currentIndex() for combo in self.dim_model_boxes]
+        indices = tuple([slice(None)] + list(plot_indices))
+
+        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
+        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
+
+        X_og = data.time
+        Y_og = data.o3[indices]
+        Y = self.trend_data[indices]
+        X = self.time
+        X_slope = self.time[valid_rows]
+
+        Y_trend = self.trends[tuple(plot_indices)]
+        if not isinstance(Y_trend, (list, np.ndarray)):
+            Y_trend = [Y_trend]
+        Y_signi = self.signi[tuple(plot_indices)]
+
+        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
+        slope_beta = []
+        slope_X = []
+        str_groups = get_string_groups(self.proxy_string)
+        for key, i in str_groups.items():
+            if key[0] == 'proxy':
+                continue
+            else:
+                if key[1] == 'month-of-the-year':
+                    slope_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
+                    slope_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
+                else:
+                    slope_beta.append(self.betaa[tuple(plot_indices)][i[0]])
+                    slope_X.append(self.X[indices][:, i[0]])
+        trend_string = "\n".join([f"trend {k + 1}: {v:.2f}%/decade" for k, v in enumerate(Y_trend)])
+        Y_slope = np.array(slope_X).T @ np.array(slope_beta)
+        Y_slope = Y_slope[valid_rows]
+        plot_number = 1
+
+        # Include a breakpoint if there are inflection points
+        if self.current_ini.get('inflection_point', None):
+            breakpoint_index = np.where(self.time[valid_rows] >= dt.datetime.strptime(self.current_ini.get('inflection_point'), '%Y-%m').date())[0][0]
+            X_slope = np.insert(X_slope, breakpoint_index, X_slope[breakpoint_index])
+            Y_slope = np.insert(Y_slope, breakpoint_index, np.nan)
+
+        self.model_canvas.axes_list = [self.model_canvas.figure.add_subplot(plot_number, 1, i + 1) for i in range(plot_number)]
+
+        # bounds = [-7, -5, -3, -1, -0.75, -0.5, -0.25, 0, 0.25, 0.5, 0.75, 1, 3, 5, 7]
+        bounds = np.arange(-9, 10, 1, dtype=int)
+        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
+        cmap.set_under(plt.get_cmap('RdBu_r')(0))
+        cmap.set_over(plt.get_cmap('RdBu_r')(255))
+        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
+
+        for k, ax in enumerate(self.model_canvas.axes_list):
+            if X_og.shape != X.shape and not self.anomaly_check.isChecked():
+                    ax.plot(X_og, Y_og, label='Original Time Series', linewidth=1.4)
+            ax.plot(X, Y, label='Time Series', linewidth=1.8)
+
+            ax.plot(self.time[valid_rows], Y_model, label='Model', linewidth=1.8)
+            ax.plot(X_slope, Y_slope, path_effects=[pe.Stroke(linewidth=5, foreground='black'), pe.Normal()], label='Trend', linewidth=1.3)
+            ax.legend(loc='upper right')
+
+            props = dict(boxstyle='round', facecolor='white', alpha=1)
+            ax.text(0.05, 0.95, trend_string, transform=ax.transAxes, fontsize=10, verticalalignment='top', horizontalalignment='left', bbox=props)
+            ax.set_title(data.name + '\nat ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_model_boxes]))))
+        self.model_canvas.axes_list[0].set_xlabel('Time [yr]', fontsize=14)
+        self.model_canvas.axes_list[0].set_ylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
+        self.model_canvas.figure.tight_layout()
+        toolbar = NavigationToolbar(self.model_canvas, self)
+
+        self.model_canvas.draw()
+
+    def plot_contour_figure(self):
+        # Clear the figure
+        self.con_canvas.figure.clf()
+
+        trends = self.trends
+        signis = self.signi
+
+        data = self.current_data
+
+        # Get dimension combo boxes indices
+        plot_indices = ()
+        for k, combo in enumerate(self.dim_con_boxes):
+            if combo.currentIndex() == 0:
+                plot_indices += (slice(None),)
+                x_grid = getattr(data, data.dim_array[1:][k])
+                x_label = getattr(data, data.dim_array[1:][k] + '_unit')
+            elif combo.currentIndex() == 1:
+                plot_indices += (slice(None),)
+                y_grid = getattr(data, data.dim_array[1:][k])
+                y_label = getattr(data, data.dim_array[1:][k] + '_unit')
+            else:
+                plot_indices += (combo.currentIndex() - 2,)
+        if trends[plot_indices].shape != (len(y_grid), len(x_grid)):
+            trend = trends[plot_indices].T
+            signi = signis[plot_indices].T > 2
+        else:
+            trend = trends[plot_indices]
+            signi = signis[plot_indices] > 2
+        masked_uncertainty = np.where(np.isnan(trend), np.nan, signi)
+
+        bounds = np.arange(-10, 11, 1, dtype=int)
+        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
+        cmap.set_under(plt.get_cmap('RdBu_r')(0))
+        cmap.set_over(plt.get_cmap('RdBu_r')(255))
+        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
+
+        self.con_canvas.axes = self.con_canvas.figure.add_subplot(1, 1, 1)
+        if self.con_alternative.isChecked() == True:
+            cf = self.con_canvas.axes.imshow(trend, cmap=cmap, norm=norm, extent=[x_grid[0] + (x_grid[0]-x_grid[1])/2, x_grid[-1] + (x_grid[-1]-x_grid[-2])/2, y_grid[0] + (y_grid[0]-y_grid[1])/2, y_grid[-1] + (y_grid[-1]-y_grid[-2])/2], origin='lower', aspect='auto', alpha=0.7)
+            if self.con_uncertainty.isChecked() == True:
+                for i in range(trend.shape[0]):
+                    for j in range(trend.shape[1]):
+                        if not masked_uncertainty[i, j]:
+                            if i+1 == trend.shape[0] and j+1 == trend.shape[1]:
+                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j - 1] - x_grid[j]) / 2, y_grid[i] + (y_grid[i - 1] - y_grid[i]) / 2), (x_grid[j] - x_grid[j - 1]), (y_grid[i] - y_grid[i - 1]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
+                            elif i+1 == trend.shape[0]:
+                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j] - x_grid[j + 1]) / 2, y_grid[i] + (y_grid[i - 1] - y_grid[i]) / 2), (x_grid[j + 1] - x_grid[j]), (y_grid[i] - y_grid[i-1]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
+                            elif j+1 == trend.shape[1]:
+                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j - 1] - x_grid[j]) / 2, y_grid[i] + (y_grid[i] - y_grid[i + 1]) / 2), (x_grid[j] - x_grid[j - 1]), (y_grid[i + 1] - y_grid[i]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
+                            else:
+                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j] - x_grid[j + 1]) / 2, y_grid[i] + (y_grid[i] - y_grid[i + 1]) / 2), (x_grid[j + 1] - x_grid[j]), (y_grid[i + 1] - y_grid[i]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
+                            # self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[0] + (x_grid[0]-x_grid[1])/2 + j * (x_grid[1] - x_grid[0]), y_grid[0] + (y_grid[0]-y_grid[1])/2 + i * (y_grid[1] - y_grid[0])), (x_grid[1] - x_grid[0]), (y_grid[1] - y_grid[0]), hatch="////", fill=False, edgecolor='black'))
+        else:
+            cf = self.con_canvas.axes.contourf(x_grid, y_grid, trend, cmap=cmap, levels=bounds, norm=norm, extend='both')
+            self.con_canvas.axes.contour(x_grid, y_grid, trend, levels=bounds, colors=('k',), alpha=0.7, norm=norm, extend='both', linewidths=1)
+            if self.con_uncertainty.isChecked() == True:
+                self.con_canvas.axes.contourf(x_grid, y_grid, masked_uncertainty, levels=[0, 0.5], colors='none', hatches=['\\\\'])
+                self.con_canvas.axes.contour(x_grid, y_grid, masked_uncertainty, levels=[0.5], colors='#DBDBDB', norm=norm)
+                # self.con_canvas.axes.contourf(x_grid, y_grid, masked_uncertainty, levels=[0, 0.5], colors='#DBDBDB', norm=norm, alpha=0.65)
+        self.con_canvas.axes.set_xlim([np.nanmin(x_grid), np.nanmax(x_grid)])
+        self.con_canvas.axes.set_ylim([np.nanmin(y_grid), np.nanmax(y_grid)])
+        if self.con_invert.isChecked() == True:
+            self.con_canvas.axes.set_ylim(self.con_canvas.axes.get_ylim()[::-1])
+        self.con_canvas.axes.tick_params(axis='both')
+        self.con_canvas.axes.set_title(data.name + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_con_boxes]))))
+        # self.con_canvas.axes.set_title(data.name + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_boxes]))))
+        self.con_canvas.axes.set_xlabel(x_label, fontsize=14)
+        self.con_canvas.axes.set_ylabel(y_label, fontsize=14)
+
+        divider = make_axes_locatable(self.con_canvas.axes)
+        cbar_ax = divider.append_axes("right", size="5%", pad=0.2)
+        cbar = self.con_canvas.figure.colorbar(cf, cax=cbar_ax, label='[%/decade]')
+        cbar.set_ticks(bounds)
+        self.con_canvas.figure.tight_layout()
+        toolbar = NavigationToolbar(self.con_canvas, self)
+
+        self.con_canvas.draw()
+
+    def plot_resi_figure(self):
+        # Clear the figure
+        self.resi_canvas.figure.clf()
+
+        # Preparing Plot values
+        data = self.current_data
+
+        # Get dimension combo boxes indices
+        plot_indices = [combo.currentIndex() for combo in self.dim_resi_boxes]
+        indices = tuple([slice(None)] + list(plot_indices))
+
+        Y = self.trend_data[indices]
+
+        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
+        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
+        X = self.time[valid_rows]
+
+        Y_trend = self.trends[tuple(plot_indices)]
+        if not isinstance(Y_trend, (list, np.ndarray)):
+            Y_trend = [Y_trend]
+
+        slope_beta = []
+        slope_X = []
+        resi_beta = []
+        resi_X = []
+
+        str_groups = get_string_groups(self.proxy_string)
+        for key, i in str_groups.items():
+            if key[0] == 'proxy' or key[0] == 'intercept':
+                if key[1] == 'month-of-the-year':
+                    resi_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
+                    resi_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
+                else:
+                    resi_beta.append(self.betaa[tuple(plot_indices)][i[0]])
+                    resi_X.append(self.X[indices][:, i[0]])
+            elif key[0] == 'trend':
+                if key[1] == 'month-of-the-year':
+                    slope_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
+                    slope_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
+                else:
+                    slope_beta.append(self.betaa[tuple(plot_indices)][i[0]])
+                    slope_X.append(self.X[indices][:, i[0]])
+
+        trend_string = "\n".join([f"trend {k + 1}: {v:.2f}%/decade" for k, v in enumerate(Y_trend)])
+
+        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
+        Y_slope = np.array(slope_X).T @ np.array(slope_beta)
+        Y_slope = Y_slope[valid_rows]
+        Y_all_but_trend = np.array(resi_X).T @ np.array(resi_beta)
+        Y_resi = Y - Y_all_but_trend
+        Y_resi_2 = Y[valid_rows] - Y_model
+        plot_number = 1
+
+        # Include a breakpoint if there are inflection points
+        if self.current_ini.get('inflection_point', None):
+            breakpoint_index = np.where(self.time[valid_rows] >= dt.datetime.strptime(self.current_ini.get('inflection_point'), '%Y-%m').date())[0][0]
+            X = np.insert(X, breakpoint_index, X[breakpoint_index])
+            Y_slope = np.insert(Y_slope, breakpoint_index, np.nan)
+            Y_resi_2 = np.insert(Y_resi_2, breakpoint_index, np.nan)
+
+        self.resi_canvas.axes_list = [self.resi_canvas.figure.add_subplot(plot_number, 1, i + 1) for i in range(plot_number)]
+
+        bounds = [-7, -5, -3, -1, -0.75, -0.5, -0.25, 0, 0.25, 0.5, 0.75, 1, 3, 5, 7]
+        # bounds = np.arange(-9, 10, 1, dtype=int)
+        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
+        cmap.set_under(plt.get_cmap('RdBu_r')(0))
+        cmap.set_over(plt.get_cmap('RdBu_r')(255))
+        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
+
+        for k, ax in enumerate(self.resi_canvas.axes_list):
+            ax.plot(X, Y_resi_2 + Y_slope, label='Residuals', linewidth=1.8)
+            # ax.plot(self.time[valid_rows], Y_resi[valid_rows], label='Residuals OLD', linewidth=1.8)
+            ax.plot(X, Y_slope, path_effects=[pe.Stroke(linewidth=5, foreground='black'), pe.Normal()], label='Trend', linewidth=1.3)
+
+            props = dict(boxstyle='round', facecolor='white', alpha=1)
+            ax.text(0.05, 0.95, trend_string, transform=ax.transAxes, fontsize=10, verticalalignment='top', horizontalalignment='left', bbox=props)
+            ax.set_title(data.name + '\n residuals at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_resi_boxes]))))
+        toolbar = NavigationToolbar(self.resi_canvas, self)
+        self.resi_canvas.axes_list[0].set_xlabel('Time [yr]', fontsize=14)
+        self.resi_canvas.axes_list[0].set_ylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
+        self.resi_canvas.axes_list[0].legend()
+        self.resi_canvas.figure.tight_layout()
+        self.resi_canvas.draw()
+
+    def plot_proxy_figure(self):
+        # Clear the figure
+        self.proxy_canvas.figure.clf()
+
+        # Get dimension combo boxes indices
+        plot_indices = [combo.currentIndex() for combo in self.dim_proxy_boxes]
+        indices = tuple([slice(None)] + list(plot_indices))
+        data = self.current_data
+        X = self.X[indices]
+        beta = self.betaa[tuple(plot_indices)]
+        checks = [check.isChecked() for check in self.dim_proxy_checks]
+        if not any(checks):
+            return      # Stops the function if nothing was checked
+
+        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
+        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
+        date = self.time[valid_rows]
+
+        Y_og = self.trend_data[indices][valid_rows]
+        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
+        Y_resi = Y_og - Y_model
+
+        Y = []
+        Y_label = []
+
+        str_groups = get_string_groups(self.proxy_string)
+
+        check_idx = 0
+        for key, i in str_groups.items():
+            if key[0] == 'proxy':
+                if checks[check_idx]:
+                    Y.append(np.array(X[:, i]) @ np.array(beta[i]))
+                    Y_label.append(key[-1])
+                check_idx += 1
+
+        self.proxy_canvas.axes_list = [self.proxy_canvas.figure.add_subplot(len(Y), 1, i + 1) for i in range(len(Y))]
+        colors = cm.cmaps['hawaii'](np.linspace(0, 1, len(Y)))
+
+        for k, ax in enumerate(self.proxy_canvas.axes_list):
+            ax.plot(date, Y[k][valid_rows] + Y_resi, label=Y_label[k] + ' + residual', color='black', linewidth=1.4)
+            ax.plot(date, Y[k][valid_rows], label=Y_label[k], color=colors[k], linewidth=1.8)
+            ax.yaxis.set_label_position("right")
+            ax.set_ylabel(Y_label[k])
+            if k == 0:
+                ax.set_title('Proxies at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_proxy_boxes]))))
+            if k < len(self.proxy_canvas.axes_list) - 1:
+                ax.set_xticklabels([])
+                ax.tick_params(axis='x', which='both', length=0)
+            else:
+                ax.set_xlabel('Time [yr]', fontsize=14)
+        self.proxy_canvas.figure.supylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
+
+        self.proxy_canvas.figure.tight_layout()
+
+        self.proxy_canvas.draw_idle()
+        self.proxy_canvas.flush_events()
+
+    def plot_proxy_con_figure(self):
+        # Clear the figure
+        self.proxy_con_canvas.figure.clf()
+
+        beta = self.betaa
+        data = self.current_data
+
+        # Get dimension combo boxes indices
+        plot_indices = ()
+        for k, combo in enumerate(self.dim_proxy_con_boxes):
+            if combo.currentIndex() == 0:
+                plot_indices += (slice(None),)
+                x_grid = getattr(data, data.dim_array[1:][k])
+                x_label = getattr(data, data.dim_array[1:][k] + '_unit')
+            elif combo.currentIndex() == 1:
+                plot_indices += (slice(None),)
+                y_grid = getattr(data, data.dim_array[1:][k])
+                y_label = getattr(data, data.dim_array[1:][k] + '_unit')
+            else:
+                plot_indices += (combo.currentIndex() - 2,)
+
+        str_groups = get_string_groups(self.proxy_string)
+        count = 0
+        for key, i in str_groups.items():
+            if key[0] == 'proxy':
+                if self.proxy_con_combo.currentIndex() == count:
+                    proxy_indices = i
+                    break
+                count += 1
+
+        plot_indices += (proxy_indices,)
+        beta = np.nansum(beta[plot_indices], axis=-1)
+        if beta.shape != (len(y_grid), len(x_grid)):
+            beta = beta.T
+
+        self.proxy_con_canvas.axes = self.proxy_con_canvas.figure.add_subplot(1, 1, 1)
+
+        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
+        cmap.set_under(plt.get_cmap('RdBu_r')(0))
+        cmap.set_over(plt.get_cmap('RdBu_r')(255))
+        vmax = np.ceil(np.nanmax(np.abs(beta)) / 10 ** np.floor(np.log10(np.nanmax(np.abs(beta))))) * 10 ** np.floor(np.log10(np.nanmax(np.abs(beta))))
+        bounds = np.concatenate((np.arange(-vmax, 0, (vmax/7)), np.arange(0, vmax + (vmax/7), (vmax/7))))
+
+        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
+
+        if self.proxy_con_alternative.isChecked() == True:
+            cf = self.proxy_con_canvas.axes.imshow(beta, cmap=cmap, norm=norm, extent=[x_grid[0] + (x_grid[0]-x_grid[1])/2, x_grid[-1] + (x_grid[-1]-x_grid[-2])/2, y_grid[0] + (y_grid[0]-y_grid[1])/2, y_grid[-1] + (y_grid[-1]-y_grid[-2])/2], origin='lower', aspect='auto', alpha=0.7)
+        else:
+            cf = self.proxy_con_canvas.axes.contourf(x_grid, y_grid, beta, norm=norm, levels=bounds, cmap=cmap, extend='both')
+            self.proxy_con_canvas.axes.contour(x_grid, y_grid, beta, norm=norm, levels=bounds, colors=('k',), alpha=0.7, extend='both', linewidths=1)
+        self.proxy_con_canvas.axes.set_xlim([np.nanmin(x_grid), np.nanmax(x_grid)])
+        self.proxy_con_canvas.axes.set_ylim([np.nanmin(y_grid), np.nanmax(y_grid)])
+        if self.proxy_con_invert.isChecked() == True:
+            self.proxy_con_canvas.axes.set_ylim(self.proxy_con_canvas.axes.get_ylim()[::-1])
+        self.proxy_con_canvas.axes.tick_params(axis='both')
+        self.proxy_con_canvas.axes.set_title(self.proxy_con_combo.currentText() + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_proxy_con_boxes]))))
+        self.proxy_con_canvas.axes.set_xlabel(x_label, fontsize=14)
+        self.proxy_con_canvas.axes.set_ylabel(y_label, fontsize=14)
+
+        divider = make_axes_locatable(self.proxy_con_canvas.axes)
+        cbar_ax = divider.append_axes("right", size="5%", pad=0.2)
+        cbar = self.proxy_con_canvas.figure.colorbar(cf, cax=cbar_ax, label=self.current_ini.get('o3_var_unit', ''))
+        cbar.set_ticks(bounds)
+        self.proxy_con_canvas.figure.tight_layout()
+        toolbar = NavigationToolbar(self.proxy_con_canvas, self)
+
+        self.proxy_con_canvas.draw()
+
+    def populate_all(self):
+        self.clear_dim_widgets(self.dim_model_layout)
+        self.populate_dim_widgets_1d('model')
+        self.clear_dim_widgets(self.dim_X_layout)
+        self.populate_X_dim_widget()
+        self.clear_dim_widgets(self.dim_con_layout)
+        self.populate_dim_widgets_2d('con')
+        self.clear_dim_widgets(self.dim_resi_layout)
+        self.populate_dim_widgets_1d('resi')
+        self.clear_dim_widgets(self.dim_cell_layout)
+        self.populate_dim_widgets_2d('cell')
+        self.clear_dim_widgets(self.dim_proxy_layout_checks)
+        self.populate_dim_widgets_proxy()
+        self.clear_dim_widgets(self.dim_proxy_layout)
+        self.populate_dim_widgets_1d('proxy')
+        self.clear_dim_widgets(self.dim_proxy_con_layout)
+        self.populate_dim_widgets_2d('proxy_con')
+        self.populate_dim_widgets_proxy_con()
+
+    def print_ini(self):
+        print('brian@iup.physik.uni-bremen.de')
+
+    def update_progress(self, progress):
+        # Progress callback of the model, the events are processed so that the window is redrawn during the calculation
+        self.progress_bar.setMaximum(max(progress['total'], 1))
+        self.progress_bar.setValue(progress['done'])
+        self.statusbar.showMessage(format_progress(progress), 0 if not progress['finished'] else 10000)
+        QtWidgets.QApplication.processEvents()
+
+    def compute_trends(self):
+        self.setDisabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        set_progress_callback(self.update_progress, interval=0.2)
+        try:
+            self.trends, self.signi, diagnostic = iup_reg_model(self.list_of_data[self.data_list.currentRow()], self.proxies, self.ini)
+        finally:
+            set_progress_callback(None)
+            self.progress_bar.hide()
+            self.setDisabled(False)
+
+        self.X = diagnostic[0]
+        self.beta = diagnostic[1]
+        self.betaa = diagnostic[2]
+        self.covbeta = diagnostic[7]
+        self.proxy_string = diagnostic[4]
+        self.time = diagnostic[5]
+        self.trend_data = diagnostic[6]
+        self.current_ini = copy.copy(self.ini)
+        self.current_data = set_data_limits(copy.copy(self.list_of_data[self.data_list.currentRow()]), self.current_ini)
+
+        self.populate_all()
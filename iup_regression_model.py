@@ -2,39 +2,122 @@ import argparse
 import sys
 import os
 
+# GUI libraries that were loaded before this module, see the check at the end of this module
+gui_modules = ['PyQt5', 'matplotlib', 'cmcrameri']
+loaded_gui_modules = [i for i in gui_modules if i in sys.modules]
+
 import numpy as np
 import pandas as pd
 import copy
 import netCDF4 as nc
 import datetime as dt
 import re
-
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import matplotlib
-import matplotlib.patheffects as pe
-import matplotlib.patches as patches
-from cmcrameri import cm
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-
-from PyQt5 import QtWidgets, uic
-from PyQt5.QtGui import QPalette, QColor, QIcon
-from PyQt5.QtCore import pyqtSignal, QTimer
-from PyQt5.QtWidgets import QTableWidgetItem, QVBoxLayout, QHBoxLayout, QHeaderView, QFileDialog, QMessageBox
-# from regression_model_ui import Ui_MainWindow
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from multiprocessing import shared_memory
+import threading
+import time
+import functools
+import contextlib
+import cProfile
+import pstats
+
+# The graphical user interface is in iup_regression_gui.py and is only imported when it is used (see iup_ui and
+# __getattr__ at the end of this module), so that the model can run without loading Qt and matplotlib
 
 ver = 'alpha 1.9'
 
+# Base class of the proxies and datasets. The fixed attributes are slots and the time is kept as datetime64[M]. The
+# coordinates (e.g. "lat" or "lev"), which are set with setattr under the name of their dimension or tag, are kept in the
+# dict coords; __getattr__ and __setattr__ map them to attributes, so that data.lat and getattr(data, dim) still work
+class Container:
+
+    __slots__ = ('name', 'desc', 'time_days', 'coords', '_months', '_time', '_month_number')
+
+    def __getattr__(self, name):
+        # Only called for names that are neither slots nor properties (or slots that were never set)
+        if not name.startswith('_') and not hasattr(type(self), name):
+            values, key = self.get_coord_dict(name)
+            if key in values:
+                return values[key]
+        raise AttributeError(type(self).__name__ + ' has no attribute ' + repr(name))
+
+    def __setattr__(self, name, value):
+        if hasattr(type(self), name):
+            object.__setattr__(self, name, value)
+        else:
+            values, key = self.get_coord_dict(name)
+            values[key] = value
+
+    def __copy__(self):
+        # Shallow copy that gets its own dicts, so that setting a coordinate of the copy doesn't change the original
+        new = object.__new__(type(self))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                try:
+                    value = object.__getattribute__(self, name)
+                except AttributeError:
+                    continue
+                object.__setattr__(new, name, dict(value) if isinstance(value, dict) else value)
+        return new
+
+    def get_coord_dict(self, name):
+        # Dict and key in which an attribute that isn't a slot is kept
+        return self.coords, name
+
+    def time_values(self, dates):
+        return dates
+
+    @property
+    def months(self):
+        # Time as datetime64[M]
+        return self._months
+
+    @months.setter
+    def months(self, value):
+        self._months = None if value is None else np.asarray(value, dtype='datetime64[M]')
+        self._time = None
+        self._month_number = None
+
+    @property
+    def month_number(self):
+        # Integer month index (year * 12 + month) of every time step, calculated once. Used to find and align the months of
+        # the data and the proxies with searchsorted (see find_month) instead of comparing dates
+        if self._month_number is None and self._months is not None:
+            self._month_number = self._months.astype(np.int64) + 1970 * 12 + 1
+        return self._month_number
+
+    @property
+    def month_of_year(self):
+        # Month of the year (1 to 12) of every time step
+        return (self.month_number - 1) % 12 + 1
+
+    @property
+    def time(self):
+        # The time as datetime.date objects on the 15th of every month, converted once when it's used
+        if self._time is None and self._months is not None:
+            self._time = self.time_values(mid_month(self._months).astype(object))
+        return self._time
+
+    @time.setter
+    def time(self, value):
+        # Accepts dates, datetime64 or pandas times
+        self.months = None if value is None else to_datetime64(value)
+
+
 # Default class for proxies to be saved as
-class Proxy:
+class Proxy(Container):
 
     #   Class for different Proxies with the same format
     #   Data will always be dependant in this order (time, lat)
 
+    __slots__ = ('_data', 'lat_min', 'lat_max', 'alt_min', 'alt_max', 'method', 'seas_comp', 'tag_series', 'tag', 'source')
+
     def __init__(self, name):
+        self.coords = {}        # Tag values of the data, e.g. "lat" of the AOD (see tag)
         self.name = name        # Name of the proxy
         self.data = []          # Data with the axis as follows (time, lat)
         self.time = []          # Time in datetime
@@ -46,1858 +129,295 @@ class Proxy:
         self.desc = ''          # Description of the merged Dataset
         self.method = 1         # Method on how to use this proxy in the model. 0: don't use this proxy; 1: use this proxy; 2: use this proxy harmonically; 3: use this proxy for year-of-the-month
         self.seas_comp = 2      # Number of seasonal components if used with the harmonic method
+        self.tag_series = {}    # Time series of a tagged proxy for each tag value of the data, see set_proxy_tag_series
+        self.tag = None         # Name of the coordinate of the second axis of the data
+        self.source = None      # File and column of the proxy
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        # Kept as a contiguous float array, so that slicing the time (the first axis) gives views
+        self._data = np.ascontiguousarray(value, dtype=float)
+
+    def time_values(self, dates):
+        # The time of the proxies is a pandas Series
+        return pd.Series(dates)
 
 # Default class for ozone data to be saved as
-class Dataset:
+class Dataset(Container):
 
     #   Class for different Datasets with the same format
     #   Ozone (O3) will always be dependant in this order (time, lev, lat)
     #   Or (time, lev, lat, lon) if the data is gridded
 
+    __slots__ = ('o3', 'o3_unit', 'units', 'tags', 'dim_array', 'time_format', 'date_start', 'date_end', 'inflection_index', 'climatology', 'limits')
+
     def __init__(self, name):
+        self.coords = {'lat': None, 'lon': None, 'lev': None}   # Values of the dimensions after time by their name
+        self.units = {'lev': None}  # Units of the dimensions, set and read as e.g. data.lev_unit
+        self.tags = {}            # Tags of the dimensions (see Proxy.tag), set and read as e.g. data.lat_tag
         self.name = name        # Name of the merged dataset
         self.o3 = None            # Ozone Data with the axis as follows (time, lev, lat, lon)
         self.o3_unit = None       # Unit of measurement of the ozone
         self.time = None          # Time in datetime
         self.time_days = None     # Time in days since 1900-01-01
-        self.lat = None           # Latitude
-        self.lon = None           # Longitude if gridded
-        self.lev = None           # Level in Pressure or Height
-        self.lev_unit = None      # Unit of measurement of the level (hPa/km)
         self.desc = None          # Description of the merged Dataset
+        self.dim_array = None     # Names of the dimensions of o3, starting with time
+        self.time_format = None
+        self.date_start = None    # Indices of the time that overlaps with the proxies, see get_proxy_time_overlap
+        self.date_end = None
+        self.inflection_index = None
+        self.climatology = None
+        self.limits = None
+
+    def get_coord_dict(self, name):
+        if name.endswith('_unit'):
+            return self.units, name[:-len('_unit')]
+        if name.endswith('_tag'):
+            return self.tags, name[:-len('_tag')]
+        return self.coords, name
+
+
+# Wall time, number of calls and peak memory (in bytes) of the stages of the model, recorded with timed_stage and
+# timed if the timing was started (see start_timing, timing = True in the config.ini or --timing in the console)
+stage_stats = {}
+timing_state = {'enabled': False, 'active': {}, 'rss': 0, 'sampler': None}
+
+
+def get_rss():
+    # Resident memory of the process in bytes, 0 if it can't be read (only Linux provides /proc/self/statm)
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
 
 
-class ComboMethod(QtWidgets.QComboBox):
-    def __init__(self, parent):
-        super().__init__(parent)
-        self.addItems(['disabled', 'single', 'harmonics', '12 months'])
-
-
-class ComboSeasonal(QtWidgets.QComboBox):
-    def __init__(self, parent):
-        super().__init__(parent)
-        self.addItems(['annual (2 terms)', 'semi-annual (4 terms)', 'tri-annual (6 terms)', 'quarter-annual (8 terms)'])
-
-
-# Empty "canvas" for plotting
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None):
-        fig = Figure()
-        # self.axes =fig.add_subplot(111)
-        super().__init__(fig)
-        self.axes_list = []
-
-
-class PreviewWindow(QtWidgets.QDialog):
-    def __init__(self, data, parent=None):
-        super().__init__(parent)
-        # super(PreviewWindow, self).__init__()
-        uic.loadUi('preview_table.ui', self)
-
-        self.activateWindow()
-        self.raise_()
-
-        self.fill_table(data)
-
-        self.btn_exit.clicked.connect(self.close)
-
-    def fill_table(self, data):
-        self.preview_table.setRowCount(data.shape[0])
-        self.preview_table.setColumnCount(data.shape[1] if data.shape[1] else 0)
-
-        for row_idx, row_data in enumerate(data):
-            for col_idx, value in enumerate(row_data):
-                self.preview_table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
-
-
-class SavePlotWindow(QtWidgets.QDialog):
-    def __init__(self, original_size, parent=None):
-        super(SavePlotWindow, self).__init__()
-        uic.loadUi('save_plot.ui', self)
-        self.width_line.setText(str(original_size[0]))
-        self.height_line.setText(str(original_size[1]))
-
-        self.btn_cancel.clicked.connect(self.close)
-        self.btn_save.clicked.connect(self.accept)
-
-    def get_options(self):
-        try:
-            size = (float(self.width_line.text()), float(self.height_line.text()))
-        except:
-            size = False
-        include_title = self.radio_with.isChecked()
-        return size, include_title
-
-
-# Popup window to set the variable names to load data
-class VariableWindow(QtWidgets.QDialog):
-    ini_signal = pyqtSignal(dict)
-    def __init__(self, settings_ini, filename):
-        super(VariableWindow, self).__init__()
-        uic.loadUi('data_load.ui', self)
-
-        self.ini = settings_ini
-        self.data = nc.Dataset(filename[0], 'r')
-
-        self.load_variable_keys()
-
-        self.dim_layout = self.findChild(QtWidgets.QWidget, 'variable_stacked_widget').layout()
-        self.o3_var_combo.currentTextChanged.connect(self.populate_dim_widget)
-        self.variable_bttn.clicked.connect(self.show_options)
-
-        # connect buttons
-        self.bttn_ok.clicked.connect(self.save_settings)
-        self.bttn_cancel.clicked.connect(self.close)
-
-
-    def show_options(self):
-        current_index = self.variable_widget.currentIndex()
-        if current_index == 0:
-            self.variable_widget.setCurrentIndex(1)
-        else:
-            self.variable_widget.setCurrentIndex(0)
-
-    def clear_dim_widget(self):
-        while self.dim_layout.count():
-            item = self.dim_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-
-    def populate_dim_widget(self):
-        self.clear_dim_widget()
-        if self.o3_var_combo.currentIndex() == 0:
-            self.clear_dim_widget()
-            return
-
-        dims = self.data.variables[self.o3_var_combo.currentText()].dimensions
-
-        o3_ln = getattr(self.data.variables[self.o3_var_combo.currentText()], 'long_name', getattr(self.data.variables[self.o3_var_combo.currentText()], 'name', ''))
-        o3_units = getattr(self.data.variables[self.o3_var_combo.currentText()], 'units', '')
-        if o3_ln or o3_units:
-            self.o3_unit.setText(o3_ln + ' [' + o3_units + ']')
-
-        self.combo_boxes = []
-        self.line_edits = []
-        for k, i in enumerate(dims):
-            try:
-                dim_index = self.o3_keys.index(i)
-            except:
-                dim_index = 0
-            frame = QtWidgets.QFrame()
-            frame.setFrameShape(QtWidgets.QFrame.StyledPanel)
-            frame.setFrameShadow(QtWidgets.QFrame.Raised)
-            frame_layout = QVBoxLayout(frame)
-
-            # Add widget with variable input
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel(i + ' variable: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            combo = QtWidgets.QComboBox()
-            combo.addItems(self.o3_keys)
-            combo.currentIndexChanged.connect(self.update_OK)
-            combo.setCurrentIndex(dim_index)
-            self.combo_boxes.append(combo)
-            row_layout.addWidget(combo)
-            frame_layout.addWidget(row_widget)
-
-            # Add widget with unit input
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel(i + ' unit: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            unit_line = QtWidgets.QLineEdit()
-            try:
-                ln = getattr(self.data.variables[i], 'long_name', getattr(self.data.variables[i], 'name', ''))
-                units = getattr(self.data.variables[i], 'units', '')
-                if ln or units:
-                    unit_line.setText(ln + ' [' + units + ']')
-            except:
-                unit_line.setText('')
-            row_layout.addWidget(unit_line)
-            frame_layout.addWidget(row_widget)
-
-            # Add widget with tag input
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel(i + ' tag: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            line = QtWidgets.QLineEdit()
-            row_layout.addWidget(line)
-            frame_layout.addWidget(row_widget)
-
-            match_key = [key for key in self.ini if 'tag_name_' in key]
-            for ii in match_key:
-                if i in [s.strip() for s in self.ini[ii].split(',')]:
-                    line.setText(ii.split('_')[-1])
-                    if ii.split('_')[-1] == 'time':
-                        row_widget = QtWidgets.QWidget()
-                        row_layout = QHBoxLayout(row_widget)
-                        label = QtWidgets.QLabel('Time format: ')
-                        row_layout.addWidget(label)
-                        spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-                        row_layout.addItem(spacer)
-                        line_time = QtWidgets.QLineEdit()
-                        line_time.setText('%Y/%m')
-                        row_layout.addWidget(line_time)
-                        frame_layout.addWidget(row_widget)
-            line.textChanged.connect(self.tag_change)
-
-            self.dim_layout.addWidget(frame)
-
-    def load_variable_keys(self):
-        self.o3_keys = list(self.data.variables.keys())
-        self.o3_keys.insert(0, '-None-')
-        self.o3_var_combo.addItems(self.o3_keys)
-
-    def update_OK(self):
-        self.bttn_ok.setEnabled(not any(combo.currentIndex() == 0 for combo in self.combo_boxes))
-        var_name = self.sender().currentText()
-
-        if self.sender().parent():
-            ln = getattr(self.data.variables[var_name], 'long_name', getattr(self.data.variables[var_name], 'name', ''))
-            units = getattr(self.data.variables[var_name], 'units', '')
-            if ln or units:
-                self.sender().parent().parent().layout().itemAt(1).widget().layout().itemAt(2).widget().setText(ln + ' [' + units + ']')
-
-    def tag_change(self):
-        line_text = self.sender().text()
-        if line_text == 'time':
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel('Time format: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            line = QtWidgets.QLineEdit()
-            line.setText('%Y/%m')
-            row_layout.addWidget(line)
-            self.sender().parent().parent().layout().addWidget(row_widget)
-        else:
-            if self.sender().parent().parent().layout().itemAt(3):
-                self.sender().parent().parent().layout().removeWidget(self.sender().parent().parent().layout().itemAt(3).widget())
-
-    def save_settings(self):
-        # Saves all settings and closes the settings window
-
-        # Change ini
-        if self.o3_var_combo.currentIndex() != 0:
-            self.ini['o3_var'] = self.o3_var_combo.currentText()
-            self.ini['o3_var_unit'] = self.o3_unit.text()
-        else:
-            self.ini['o3_var'] = None
-
-        for i in range(self.dim_layout.count()):
-            combo_text = self.dim_layout.itemAt(i).widget().layout().itemAt(0).widget().layout().itemAt(2).widget().currentText()
-            unit_text = self.dim_layout.itemAt(i).widget().layout().itemAt(1).widget().layout().itemAt(2).widget().text()
-            line_text = self.dim_layout.itemAt(i).widget().layout().itemAt(2).widget().layout().itemAt(2).widget().text()
-
-            if line_text == 'time':
-                self.ini['time_var'] = combo_text
-                self.ini['time_dim'] = i + 1
-                self.ini['time_format'] = self.dim_layout.itemAt(i).widget().layout().itemAt(2).widget().layout().itemAt(2).widget().text()
-            else:
-                self.ini['additional_var_' + str(i + 1) + '_index'] = combo_text
-                self.ini['additional_var_' + str(i + 1) + '_tag'] = line_text
-                self.ini['additional_var_' + str(i + 1) + '_unit'] = unit_text
-
-        self.ini_signal.emit(self.ini)
-        self.accept()
-
-    def closeEvent(self, event):
-        if self.data is not None:
-            self.data.close()
-        super().closeEvent(event)
-
-
-class ProxyWindow(QtWidgets.QDialog):
-    ini_signal = pyqtSignal(dict)
-    def __init__(self, settings_ini, filename):
-        super(ProxyWindow, self).__init__()
-        uic.loadUi('proxy_load.ui', self)
-        self.ini = settings_ini
-        self.file = filename[0]
-
-        # Distinguish between ascii file and netCDF file
-        if self.file.endswith('.nc'):
-            self.proxy_widget.setCurrentIndex(0)
-            self.data = nc.Dataset(self.file, 'r')
-            self.load_nc_file()
-            self.dim_layout = self.findChild(QtWidgets.QWidget, 'variable_stacked_widget').layout()
-            self.proxy_var_combo.currentTextChanged.connect(self.populate_dim_widget)
-            self.variable_bttn.clicked.connect(self.show_options)
-        else:
-            self.proxy_widget.setCurrentIndex(1)
-            self.btn_preview.clicked.connect(self.open_preview)
-            self.is2d_check.toggled.connect(self.toggle_2d)
-            self.bttn_ok.setEnabled(True)
-
-        # Set Proxy Name
-        self.proxy_name.setText(self.file.split('/')[-1].split('.')[0])
-
-        # connect buttons
-        self.bttn_ok.clicked.connect(self.save_settings)
-        self.bttn_cancel.clicked.connect(self.close)
-
-        if isinstance(self.ini.get('additional_proxy_path', None), (list, np.ndarray)):
-            if not self.ini.get('additional_proxy_path', None).all():
-                self.create_add_proxy_list()
-        else:
-            if not self.ini.get('additional_proxy_path', None):
-                self.create_add_proxy_list()
-
-    def show_options(self):
-        current_index = self.variable_widget.currentIndex()
-        if current_index == 0:
-            self.variable_widget.setCurrentIndex(1)
-        else:
-            self.variable_widget.setCurrentIndex(0)
-
-    def create_add_proxy_list(self):
-        self.ini['additional_proxy_name'] = np.array([], dtype='object')
-        self.ini['additional_proxy_path'] = np.array([], dtype='object')
-        self.ini['additional_proxy_time_col'] = np.array([], dtype='object')
-        self.ini['additional_proxy_data_col'] = np.array([], dtype=int)
-        self.ini['additional_proxy_method'] = np.array([], dtype=int)
-        self.ini['additional_proxy_seas_comp'] = np.array([], dtype='object')
-        self.ini['additional_proxy_time_format'] = np.array([], dtype='object')
-        self.ini['additional_proxy_header_size'] = np.array([], dtype=int)
-        self.ini['additional_proxy_tag'] = np.array([], dtype='object')
-        self.ini['additional_proxy_tag_array'] = np.array([], dtype='object')
-
-    def toggle_2d(self):
-        if self.is2d_check.isChecked() == True:
-            self.tag_widget_1.setEnabled(True)
-            self.tag_widget_2.setEnabled(True)
-        else:
-            self.tag_widget_1.setEnabled(False)
-            self.tag_widget_2.setEnabled(False)
-
-    def clear_dim_widget(self):
-        while self.dim_layout.count():
-            item = self.dim_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-
-    def populate_dim_widget(self):
-        self.clear_dim_widget()
-        if self.proxy_var_combo.currentIndex() == 0:
-            self.clear_dim_widget()
-            return
-
-        dims = self.data.variables[self.proxy_var_combo.currentText()].dimensions
-
-        self.combo_boxes = []
-        self.line_edits = []
-        for k, i in enumerate(dims):
-            try:
-                dim_index = self.keys.index(i)
-            except:
-                dim_index = 0
-            frame = QtWidgets.QFrame()
-            frame.setFrameShape(QtWidgets.QFrame.StyledPanel)
-            frame.setFrameShadow(QtWidgets.QFrame.Raised)
-            frame_layout = QVBoxLayout(frame)
-
-            # Add widget with variable input
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel(i + ' variable: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            combo = QtWidgets.QComboBox()
-            combo.addItems(self.keys)
-            combo.currentIndexChanged.connect(self.update_OK)
-            combo.setCurrentIndex(dim_index)
-            self.combo_boxes.append(combo)
-            row_layout.addWidget(combo)
-            frame_layout.addWidget(row_widget)
-
-            # Add widget with tag input
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel(i + ' tag: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            line = QtWidgets.QLineEdit()
-            row_layout.addWidget(line)
-            frame_layout.addWidget(row_widget)
-
-            match_key = [key for key in self.ini if 'tag_name_' in key]
-            for ii in match_key:
-                if i in [s.strip() for s in self.ini[ii].split(',')]:
-                    line.setText(ii.split('_')[-1])
-                    if ii.split('_')[-1] == 'time':
-                        row_widget = QtWidgets.QWidget()
-                        row_layout = QHBoxLayout(row_widget)
-                        label = QtWidgets.QLabel('Time format: ')
-                        row_layout.addWidget(label)
-                        spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-                        row_layout.addItem(spacer)
-                        line_time = QtWidgets.QLineEdit()
-                        line_time.setText('%Y/%m')
-                        row_layout.addWidget(line_time)
-                        frame_layout.addWidget(row_widget)
-            line.textChanged.connect(self.tag_change)
-            self.dim_layout.addWidget(frame)
-
-    def load_nc_file(self):
-        self.keys = list(self.data.variables.keys())
-        self.keys.insert(0, '-None-')
-        self.proxy_var_combo.addItems(self.keys)
-
-    def open_preview(self):
-        try:
-            proxy_raw = pd.read_csv(self.file, sep='\s+', header=None, skiprows=int(self.header_rows.text()))
-            proxy_raw.dropna(axis=1, how='all', inplace=True)
-        except:
-            print('Could not load the proxy data. Please try changing the header rows.')
-            return
-
-        self.preview_window = PreviewWindow(np.array(proxy_raw))
-        self.preview_window.show()
-
-    def update_OK(self):
-        self.bttn_ok.setEnabled(not any(combo.currentIndex() == 0 for combo in self.combo_boxes))
-
-    def tag_change(self):
-        line_text = self.sender().text()
-        if line_text == 'time':
-            row_widget = QtWidgets.QWidget()
-            row_layout = QHBoxLayout(row_widget)
-            label = QtWidgets.QLabel('Time format: ')
-            row_layout.addWidget(label)
-            spacer = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-            row_layout.addItem(spacer)
-            line = QtWidgets.QLineEdit()
-            line.setText('%Y/%m')
-            row_layout.addWidget(line)
-            self.sender().parent().parent().layout().addWidget(row_widget)
-        else:
-            if self.sender().parent().parent().layout().itemAt(2):
-                self.sender().parent().parent().layout().removeWidget(self.sender().parent().parent().layout().itemAt(2).widget())
-
-    def save_settings(self):
-        # Saves all settings and closes the settings window
-        # Save depending on current open page
-        self.ini['additional_proxy_path'] = np.append(self.ini['additional_proxy_path'], self.file)
-        self.ini['additional_proxy_name'] = np.append(self.ini['additional_proxy_name'], self.proxy_name.text())
-        if self.proxy_widget.currentIndex() == 0:
-            for widget in self.variable_stacked_widget.children():
-                if isinstance(widget, QtWidgets.QFrame):
-                    if widget.layout().itemAt(1).widget().layout().itemAt(2).widget().text() == 'time':
-                        self.ini['additional_proxy_time_col'] = np.append(self.ini['additional_proxy_time_col'], widget.layout().itemAt(0).widget().layout().itemAt(2).widget().currentText())
-                        self.ini['additional_proxy_time_format'] = np.append(self.ini['additional_proxy_time_format'], widget.layout().itemAt(2).widget().layout().itemAt(2).widget().text())
-                    else:
-                        self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], widget.layout().itemAt(0).widget().layout().itemAt(2).widget().currentText())
-                        self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], widget.layout().itemAt(1).widget().layout().itemAt(2).widget().text())
-            self.ini['additional_proxy_data_col'] = np.append(self.ini['additional_proxy_data_col'], self.proxy_var_combo.currentText())
-            self.ini['additional_proxy_method'] = np.append(self.ini['additional_proxy_method'], self.ini.get('default_proxy_method', 1))
-            self.ini['additional_proxy_seas_comp'] = np.append(self.ini['additional_proxy_seas_comp'], self.ini.get('intercept_method', 2))
-            self.ini['additional_proxy_header_size'] = np.append(self.ini['additional_proxy_header_size'], 0)
-        else:
-            self.ini['additional_proxy_time_col'] = np.append(self.ini['additional_proxy_time_col'], self.proxy_time.text())
-            if self.is2d_check.isChecked():
-                self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], self.tag_values.text())
-                self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], self.tag.text())
-            else:
-                self.ini['additional_proxy_tag_array'] = np.append(self.ini['additional_proxy_tag_array'], False)
-                self.ini['additional_proxy_tag'] = np.append(self.ini['additional_proxy_tag'], False)
-            self.ini['additional_proxy_data_col'] = np.append(self.ini['additional_proxy_data_col'], self.proxy_data.text())
-            self.ini['additional_proxy_method'] = np.append(self.ini['additional_proxy_method'], self.ini.get('default_proxy_method', 1))
-            self.ini['additional_proxy_seas_comp'] = np.append(self.ini['additional_proxy_seas_comp'], self.ini.get('intercept_method', 2))
-            self.ini['additional_proxy_header_size'] = np.append(self.ini['additional_proxy_header_size'], self.header_rows.text())
-            self.ini['additional_proxy_time_format'] = np.append(self.ini['additional_proxy_time_format'], '%Y%m')
-
-        self.ini_signal.emit(self.ini)
-        self.accept()
-
-    def closeEvent(self, event):
-        if self.data is not None:
-            self.data.close()
-        super().closeEvent(event)
-
-
-
-# The UI and its functions
-class AppWindow(QtWidgets.QMainWindow):
-    def __init__(self):
-        super().__init__()
-        uic.loadUi(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.ui'), self)
-        self.setWindowTitle("IUP Regression Model")
-        self.setWindowIcon(QIcon('iupLogo.png'))
-
-        # Loading default data and proxies
-        self.ini = load_config_ini(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config folder/config.ini'))
-        self.list_of_data = []
-        if 'data_path' in self.ini:
-            try:
-                data = load_netCDF(self.ini['data_path'], self.ini)
-            except:
-                print('Error in loading the data file.')
-        self.list_of_data.append(data)
-        self.data_list.addItem(data.name)
-        if self.data_list.count() > 0:
-            self.data_list.setCurrentRow(0)
-
-        self.combo_pairs = {}
-        self.populate_dim_limits()
-
-        self.load_presets()
-
-        self.proxies = load_default_proxies(self.ini)
-        self.proxies = load_additional_proxies(self.proxies, self.ini)
-        self.infl_method_list = ['ind', 'pwl']
-
-        # Fill lists with proxies and data
-        self.update_trend_table()
-        self.update_proxy_table()
-
-        # Create important variables
-        self.X = None
-        self.beta = None
-        self.betaa = None
-        self.time = None
-
-        self.define_palettes()
-
-        # main UI functions
-        self.infl_check.toggled.connect(self.inflection_enable)
-        self.start_date.textChanged.connect(self.format_check)
-        self.end_date.textChanged.connect(self.format_check)
-        self.inflection_point.textChanged.connect(self.format_check)
-        self.inflection_method.currentIndexChanged.connect(self.inflection_method_change)
-        self.all_proxy_method.currentIndexChanged.connect(self.all_proxy_method_change)
-        self.mean_line.textChanged.connect(self.text_check)
-        self.anomaly_check.toggled.connect(self.anomaly_enable)
-        self.radio_rel.toggled.connect(self.anomaly_method_toggle)
-        self.radio_abs.toggled.connect(self.anomaly_method_toggle)
-        self.preset_combo.currentIndexChanged.connect(self.change_preset)
-        self.data_list.currentItemChanged.connect(self.data_change)
-
-        # Diagnostic UI functions
-        self.dia_proxy_combo.currentIndexChanged.connect(self.proxy_diagnostic)
-        self.dim_data_layout = self.data_dim_widget.layout()
-        self.dim_data_boxes = []
-        self.dia_data_combo.currentIndexChanged.connect(self.populate_data_dim_widget)
-        self.add_data_dia()
-        self.dim_X_layout = self.X_dim_widget.layout()
-        self.dim_X_boxes = []
-
-        # Start trend analysis
-        self.compute_button.clicked.connect(self.compute_trends)
-
-        # Plotting Model
-        self.dim_model_layout = self.dim_model_widget.layout()
-        self.dim_model_boxes = []
-        self.plot_button_model.clicked.connect(self.plot_model_figure)
-        self.model_layout = QVBoxLayout(self.model_fig_widget)
-        self.model_canvas = MplCanvas(self.model_fig_widget)
-        self.model_layout.addWidget(self.model_canvas)
-
-        # Plotting Contour
-        self.dim_con_layout = self.dim_con_widget.layout()
-        self.dim_con_boxes = []
-        self.plot_button_con.clicked.connect(self.plot_contour_figure)
-        self.con_layout = QVBoxLayout(self.contour_fig_widget)
-        self.con_canvas = MplCanvas(self.contour_fig_widget)
-        self.con_layout.addWidget(self.con_canvas)
-
-        # Plotting Residuals
-        self.dim_resi_layout = self.dim_resi_widget.layout()
-        self.dim_resi_boxes = []
-        self.plot_button_resi.clicked.connect(self.plot_resi_figure)
-        self.resi_layout = QVBoxLayout(self.resi_fig_widget)
-        self.resi_canvas = MplCanvas(self.resi_fig_widget)
-        self.resi_layout.addWidget(self.resi_canvas)
-
-        # Plotting Measurement Density
-        self.dim_cell_layout = self.dim_cell_widget.layout()
-        self.dim_cell_boxes = []
-        # self.plot_button_cell.clicked.connect(self.plot_observations_figure)
-        self.cell_layout = QVBoxLayout(self.cell_fig_widget)
-        self.cell_canvas = MplCanvas(self.cell_fig_widget)
-        self.cell_layout.addWidget(self.cell_canvas)
-
-        # Plotting Proxies
-        self.dim_proxy_layout = self.dim_proxy_widget.layout()
-        self.dim_proxy_layout_checks = self.dim_proxy_widget_checks.layout()
-        self.dim_proxy_boxes = []
-        self.dim_proxy_checks = []
-        self.plot_button_proxy.clicked.connect(self.plot_proxy_figure)
-        self.proxy_layout = QVBoxLayout(self.proxy_fig_widget)
-        self.proxy_canvas = MplCanvas(self.proxy_fig_widget)
-        self.proxy_layout.addWidget(self.proxy_canvas)
-
-        # Plotting Proxy Contour
-        self.dim_proxy_con_layout = self.dim_proxy_con_widget.layout()
-        self.dim_proxy_con_boxes = []
-        self.plot_button_proxy_con.clicked.connect(self.plot_proxy_con_figure)
-        self.proxy_con_layout = QVBoxLayout(self.proxy_con_fig_widget)
-        self.proxy_con_canvas = MplCanvas(self.proxy_con_fig_widget)
-        self.proxy_con_layout.addWidget(self.proxy_con_canvas)
-
-        # Menu button connection
-        self.menu_help.triggered.connect(self.print_ini)
-        self.menu_load_data.triggered.connect(self.open_data_dialog)
-        self.menu_load_proxy.triggered.connect(self.open_proxy_dialog)
-        self.menu_save.triggered.connect(self.save_file)
-        self.menu_save_plot.triggered.connect(self.save_plot)
-
-        self.frozen_list.horizontalHeader().sectionResized.connect(self.sync_frozen_to_main)
-
-        # Load ini settings and input the data into the UI
-        self.load_ini_settings()
-        QTimer.singleShot(0, self.sync_tables)
-
-    def load_ini_settings(self):
-
-        if 'inflection_point' in self.ini:
-            self.inflection_point.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['inflection_point'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.inflection_point.setText('YYYY-MM')
-
-        if 'inflection_point' in self.ini and 'inflection_method' in self.ini:
-            if self.ini['inflection_method'] == 'ind':
-                self.inflection_method.setCurrentIndex(0)
-            elif self.ini['inflection_method'] == 'pwl':
-                self.inflection_method.setCurrentIndex(1)
-            self.infl_check.setChecked(True)
-
-        if 'start_date' in self.ini:
-            self.start_date.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['start_date'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.start_date.setText('YYYY-MM')
-
-        if 'end_date' in self.ini:
-            self.end_date.setText(dt.datetime.strftime(dt.datetime.strptime(self.ini['end_date'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.end_date.setText('YYYY-MM')
-
-        self.frozen_list.cellWidget(0, 1).setCurrentIndex(int(self.ini.get('trend_method', self.ini.get('default_method', 1))))
-        self.frozen_list.cellWidget(1, 1).setCurrentIndex(int(self.ini.get('intercept_method', self.ini.get('default_method', 1))))
-
-        self.mean_line.setText(self.ini.get('averaging_window', ''))
-
-        if self.ini.get('anomaly', 'False') == 'True':
-            self.anomaly_check.setChecked(True)
-        else:
-            self.anomaly_check.setChecked(False)
-
-        for k, dim in enumerate(self.list_of_data[self.data_list.currentRow()].dim_array):
-            if dim == 'time':
-                continue
-            else:
-                min_combo, max_combo = self.combo_pairs[dim]
-                limits = self.ini.get('additional_var_' + str(k + 1) + '_limit', None)
-                if not limits:
-                    continue
-                elif ',' in limits:
-                    min, max = list(map(int, self.ini.get('additional_var_' + str(k + 1) + '_limit', None).split(",")))
-                    min_combo.setCurrentIndex(min)
-                    max_combo.setCurrentIndex(max)
-                else:
-                    limits = int(self.ini.get('additional_var_' + str(k + 1) + '_limit', None))
-                    min_combo.setCurrentIndex(limits)
-                    max_combo.setCurrentIndex(limits)
-
-    def save_file(self):
-        # Stop the function if nothing was computed yet
-        if self.X is None:
-            QMessageBox.warning(self, "Warning", "No data to save yet. Please compute the data first.")
-            return
-
-        # Open a file dialog to select the save location
-        save_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "NetCDF Files (*.nc)")
-
-        data = self.current_data
-        # If a path was selected, save the file
-        if save_path:
-            lat = data.lat
-            alt = data.lev
-            lon = data.lon
-            dims = data.dim_array
-
-            with nc.Dataset(save_path + '.nc', 'w') as f:
-                var_list = []
-                for k, i in enumerate(dims[1:]):
-                    f.createDimension(i, data.o3.shape[k+1])
-                    var_list.append(f.createVariable(i, 'f8', (i,)))
-                    var_list[k][:] = getattr(data, i)
-                    # var_list[k].units = 'degrees_north'
-                    # lat_var.long_name = 'latitude'
-
-                max_length = max(len(s) for s in self.proxy_string)
-                f.createDimension('n_coefficients', len(self.proxy_string))
-                f.createDimension('string_length', max_length)
-                f.createDimension('time', len(self.time))
-                f.createDimension('infl', 2)
-
-                ind_var = f.createVariable('independent_variable_names', 'str', ('n_coefficients',))
-                ind_var[:] = np.array(self.proxy_string)
-
-                time_var = f.createVariable('date', 'S10', 'time')
-                time_var.unit = 'YYYYMMDD'
-                frac_var = f.createVariable('fractional_year', 'f4', ('time',), compression="zlib")
-
-                dim_tuple = tuple(dim_name for dim_name in dims)
-                X_var = f.createVariable('independent_variable_matrix', 'f4', dim_tuple + ('n_coefficients',), compression="zlib")
-                X_var[:] = self.X
-                beta_var = f.createVariable('beta', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
-                beta_var[:] = self.betaa
-                # covb_var = f.createVariable('beta_uncertainty', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
-                # print(self.convbeta)
-                # covb_var[:] = self.convbeta
-
-                if len(self.trends.shape) == len(dim_tuple):
-                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:] + ('infl',))
-                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:] + ('infl',))
-                else:
-                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:])
-                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:])
-                trend_var[:] = self.trends
-                sig_var[:] = self.signi
-
-                X_var.long_name = 'Independent Variable matrix'
-                beta_var.long_name = 'Fit Parameters'
-
-                frac_year = convert_datetime_to_fractional(self.time)
-
-                time_int = np.array([str_time.strftime('%Y-%m-%d') for str_time in self.time])
-                time_var[:] = time_int
-                frac_var[:] = frac_year
-
-                f.program = 'IUP_regression_model'
-                f.version = ver
-                f.contact = '''Name: Brian Auffarth\rAffiliation: University of Bremen\rE-mail: brian@iup.physik.uni-bremen.de'''
-                f.date_of_creation = dt.datetime.today().strftime('%Y-%m-%d')
-                f.configuration_settings = "\n".join([f"{key} = {value}" for key, value in self.ini.items()])
-
-    def save_plot(self):
-        canvas = self.figure_tabs.widget(self.figure_tabs.currentIndex()).findChild(FigureCanvas)
-        if canvas:
-            if not canvas.figure.axes:
-                print('Canvas is empty. Please plto something before saving.')
-                return
-            save_path, _ = QFileDialog.getSaveFileName(self, "Save Figure", canvas.figure.axes[0].get_title().replace('\n', ' ') + '.png', "PNG Files (*.png);;All Files (*)")
-            if save_path:
-                original_size = tuple(canvas.figure.get_size_inches())
-                dialog = SavePlotWindow(original_size, self)
-                if dialog.exec_() == QtWidgets.QDialog.Accepted:
-                    fig_size, include_title = dialog.get_options()
-                    if not fig_size:
-                        return
-                else:
-                    return  # User canceled the operation
-                canvas.figure.set_size_inches(fig_size)
-                original_title = canvas.figure.axes[0].get_title()
-                if not include_title:
-                    canvas.figure.axes[0].set_title('')
-                self.model_canvas.figure.tight_layout()
-                canvas.figure.savefig(save_path, dpi=300)
-                canvas.figure.set_size_inches(original_size)
-                canvas.figure.axes[0].set_title(original_title)
-                self.model_canvas.figure.tight_layout()
-
-    def add_data_dia(self):
-        self.dia_data_combo.clear()
-        for i in self.list_of_data:
-            self.dia_data_combo.addItem(i.name)
-
-    def populate_data_dim_widget(self):
-        self.clear_dim_widgets(self.dim_data_layout)
-        self.dim_data_boxes.clear()
-
-        for dim_index in range(1, len(self.list_of_data[self.dia_data_combo.currentIndex()].o3.shape)):
-            col_layout = QVBoxLayout()
-            label = QtWidgets.QLabel(self.list_of_data[self.dia_data_combo.currentIndex()].dim_array[dim_index])
-            col_layout.addWidget(label)
-
-            combo = QtWidgets.QComboBox()
-            values = getattr(self.list_of_data[self.dia_data_combo.currentIndex()], self.list_of_data[self.dia_data_combo.currentIndex()].dim_array[dim_index])
-            combo.addItems([str(value) for value in values])
-            col_layout.addWidget(combo)
-            combo.currentIndexChanged.connect(self.data_diagnostic)
-
-            self.dim_data_boxes.append(combo)
-
-            self.dim_data_layout.addLayout(col_layout)
-        self.data_diagnostic()
-        # data = self.list_of_data[self.data_list.currentRow()]
-
-    def proxy_diagnostic(self, index):
-        start_date = str(np.array(self.proxies[index].time)[0])
-        end_date = str(np.array(self.proxies[index].time)[-1])
-        self.dia_proxy_start.setText(start_date)
-        self.dia_proxy_end.setText(end_date)
-        dim_str = ' '.join(map(str, self.proxies[index].data.shape))
-        self.dia_proxy.setText(dim_str)
-
-        # Fill Table
-        if len(self.proxies[index].data.shape) >= 2:
-            sec_dim = self.proxies[index].data.shape[1]
-            self.dia_proxy_table.setColumnCount(sec_dim)
-            self.dia_proxy_table.setHorizontalHeaderLabels(getattr(self.proxies[index], self.proxies[index].tag).astype(str))
-        else:
-            sec_dim = 1
-            self.dia_proxy_table.setColumnCount(sec_dim)
-        self.dia_proxy_table.setRowCount(self.proxies[index].data.shape[0])
-
-        self.dia_proxy_table.setVerticalHeaderLabels(self.proxies[index].time.astype(str))
-
-
-        for k, i in enumerate(self.proxies[index].data):
-            if sec_dim == 1:
-                self.dia_proxy_table.setItem(k, 0, QTableWidgetItem(str(self.proxies[index].data[k])))
-            else:
-                for kk in range(sec_dim):
-                    self.dia_proxy_table.setItem(k, kk, QTableWidgetItem(str(self.proxies[index].data[k, kk])))
-
-    def update_trend_table(self):
-        # Update of the frozen table
-        self.frozen_list.setRowCount(2)
-        # Add method combo boxes for trend and intercept
-        self.frozen_list.setItem(0, 0, QTableWidgetItem('Trend'))
-        methodBox = ComboMethod(self)
-        self.frozen_list.setCellWidget(0, 1, methodBox)
-        methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=0: self.method_update(methodBox, row))
-        methodBox.setCurrentIndex(int(self.ini.get('trend_method', 1)))
-
-        self.frozen_list.setItem(1, 0, QTableWidgetItem('Intercept'))
-        methodBox = ComboMethod(self)
-        self.frozen_list.setCellWidget(1, 1, methodBox)
-        methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=1: self.method_update(methodBox, row))
-        methodBox.setCurrentIndex(int(self.ini.get('intercept_method', 1)))
-
-        # Add seasonal component combo boxes for trend and intercept
-        seasBox = ComboSeasonal(self)
-        self.frozen_list.setCellWidget(0, 2, seasBox)
-        seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=0: self.seas_update(seasBox, row))
-        seasBox.setCurrentIndex(int(self.ini.get('trend_seasonal_component', self.ini.get('default_seasonal_component', 2))) - 1)
-        if self.frozen_list.cellWidget(0, 1).currentIndex() != 2:
-            seasBox.setDisabled(True)
-
-        seasBox = ComboSeasonal(self)
-        self.frozen_list.setCellWidget(1, 2, seasBox)
-        seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=1: self.seas_update(seasBox, row))
-        seasBox.setCurrentIndex(int(self.ini.get('intercept_seasonal_component', self.ini.get('intercept_seasonal_component', 2))) - 1)
-        if self.frozen_list.cellWidget(1, 1).currentIndex() != 2:
-            seasBox.setDisabled(True)
-        self.frozen_list.setHorizontalHeaderLabels(["Variable", "Method", "Seasonal Component"])
-
-        total_height = sum(self.frozen_list.rowHeight(row) for row in range(self.frozen_list.rowCount()))
-        total_height += self.frozen_list.horizontalHeader().height()  # Add header height
-        self.frozen_list.setFixedHeight(total_height)
-
-        self.frozen_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
-
-    def update_proxy_table(self):
-        # Update of the main proxy table
-        self.proxy_list.setRowCount(len(self.proxies))
-        # Add method combo boxes for each available proxy
-        for k, i in enumerate(self.proxies):
-            self.proxy_list.setItem(k, 0, QTableWidgetItem(i.name))
-            methodBox = ComboMethod(self)
-            self.proxy_list.setCellWidget(k, 1, methodBox)
-            methodBox.currentIndexChanged.connect(lambda index, methodBox=methodBox, row=k: self.method_update(methodBox, row))
-            methodBox.setCurrentIndex(int(i.method))
-
-        # Add seasonal component combo boxes for each available proxy
-        for k, i in enumerate(self.proxies):
-            # self.proxy_list.setItem(k, 0, QTableWidgetItem(i.name))
-            seasBox = ComboSeasonal(self)
-            self.proxy_list.setCellWidget(k, 2, seasBox)
-            seasBox.currentIndexChanged.connect(lambda index, seasBox=seasBox, row=k: self.seas_update(seasBox, row))
-            seasBox.setCurrentIndex(i.seas_comp - 1)
-            if self.proxy_list.cellWidget(k, 1).currentIndex() != 2:
-                seasBox.setDisabled(True)
-        self.proxy_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.proxy_list.setHorizontalHeaderLabels(["Proxy", "Method", "Seas. Comp."])
-
-        # Update of the combo box for diagnostic
-        self.dia_proxy_combo.clear()
-        for k, i in enumerate(self.proxies):
-            self.dia_proxy_combo.addItem(i.name)
-        self.proxy_diagnostic(0)
-
-    def sync_tables(self):
-        for col in range(self.proxy_list.columnCount()):
-            self.frozen_list.horizontalHeader().resizeSection(col, self.proxy_list.horizontalHeader().sectionSize(col))
-        self.proxy_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
-        for col in range(self.proxy_list.columnCount()):
-            self.proxy_list.horizontalHeader().resizeSection(col, self.frozen_list.horizontalHeader().sectionSize(col))
-
-    def sync_frozen_to_main(self, logical_index, old_size, new_size):
-        self.proxy_list.horizontalHeader().resizeSection(logical_index, new_size)
-
-    def open_data_dialog(self):
-        dialog = QFileDialog(self)
-        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
-        dialog.setNameFilters(["NetCDF (*.nc)", "ASCII files (*.*)"])
-        dialog.setViewMode(QFileDialog.Detail)
-
-        if dialog.exec_():
-            fileName = dialog.selectedFiles()
-        else:
-            return
-
-        self.open_data_settings_dialog(fileName)
-
-        for i in fileName:
-            data = load_netCDF(i, self.ini)
-            if data == None:
-                continue
-            else:
-                self.list_of_data.append(data)
-        self.reload_data_list()
-
-    def open_proxy_dialog(self):
-        dialog = QFileDialog(self)
-        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
-        dialog.setNameFilters(["ASCII files (*.*)", "NetCDF (*.nc)"])
-        dialog.setViewMode(QFileDialog.Detail)
-
-        if dialog.exec_():
-            fileName = dialog.selectedFiles()
-        else:
-            return
-
-        self.open_proxy_settings_dialog(fileName)
-
-        for k, i in enumerate(fileName):
-            new_proxy = load_add_proxy_file(self.ini, -1)
-            if new_proxy == None:
-                continue
-            else:
-                self.proxies.append(new_proxy)
-
-        self.update_proxy_table()
-
-    def open_data_settings_dialog(self, filename):
-        var_window = VariableWindow(self.ini, filename)
-        var_window.ini_signal.connect(self.update_ini_settings)
-        var_window.setWindowTitle('Variable Settings')
-        var_window.exec_()
-
-    def open_proxy_settings_dialog(self, filename):
-        proxy_window = ProxyWindow(self.ini, filename)
-        proxy_window.ini_signal.connect(self.update_ini_settings)
-        proxy_window.setWindowTitle('Proxy Settings')
-        proxy_window.exec_()
-
-    def update_ini_settings(self, ini):
-        self.ini = ini
-
-    def reload_data_list(self):
-        self.data_list.clear()
-        for i in self.list_of_data:
-            self.data_list.addItem(i.name)
-
-        self.add_data_dia()
-
-    def define_palettes(self):
-        # Set palette
-        self.palette_wrong = QPalette()
-        self.palette_wrong.setColor(QPalette.Background, QColor(212, 19, 22))
-        self.palette_wrong.setColor(QPalette.Base, QColor(212, 19, 22))
-
-        self.palette_right = QPalette()
-        self.palette_right.setColor(QPalette.ColorRole.WindowText, QColor(0, 170, 0))
-        self.palette_right.setColor(QPalette.Text, QColor(0, 170, 0))
-        self.palette_right.setColor(QPalette.Background, QColor(255, 255, 255, 0))
-
-    def inflection_enable(self):
-        # Enables/Disables the date entry
-        if self.infl_check.isChecked() == True:
-            self.inflection_point.setEnabled(True)
-            self.inflection_method.setEnabled(True)
-            self.ini['inflection_method'] = self.infl_method_list[self.inflection_method.currentIndex()]
-            self.ini['inflection_point'] = self.inflection_point.text()
-        else:
-            self.inflection_point.setEnabled(False)
-            self.ini.pop('inflection_point', None)
-            self.inflection_method.setEnabled(False)
-            self.ini.pop('inflection_method', None)
-
-    def anomaly_enable(self):
-        if self.anomaly_check.isChecked() == True:
-            self.ini['anomaly'] = 'True'
-            self.anom_frame.setEnabled(True)
-        else:
-            self.ini['anomaly'] = 'False'
-            self.anom_frame.setEnabled(False)
-
-    def anomaly_method_toggle(self):
-        if self.radio_rel.isChecked():
-            self.ini['anomaly_method'] = 'rel'
-        elif self.radio_abs.isChecked():
-            self.ini['anomaly_method'] = 'abs'
-
-    def format_check(self):
-        # Changes the checkmarks if the format of the date is being recongnized
-        checkbox = getattr(self, 'check_' + str(self.sender().objectName()).split('_')[0], None)
-
-        if str(self.sender().text()) == '':
-            checkbox.setChecked(False)
-            checkbox.setPalette(self.palette_wrong)
-            self.ini.pop(self.sender().objectName(), None)
-            return
-        try:
-            date = pd.to_datetime(str(self.sender().text()), format='%Y-%m').date()
-            checkbox.setChecked(True)
-            checkbox.setPalette(self.palette_right)
-            self.ini[self.sender().objectName()] = dt.datetime.strftime(dt.datetime.strptime(str(self.sender().text()), '%Y-%m'), '%Y-%m')
-        except:
-            checkbox.setChecked(False)
-            checkbox.setPalette(self.palette_wrong)
-            self.ini.pop(self.sender().objectName(), None)
-
-    def text_check(self):
-        # Changes the checkmarks if the format of the input is being recognized
-        check = averaging_window_text_check(str(self.sender().text()))
-        self.ini['averaging_window'] = str(self.sender().text())
-
-        months_str = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-
-        if check == 0:
-            self.check_mean.setChecked(False)
-            self.check_mean.setPalette(self.palette_wrong)
-            self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
-        else:
-            self.check_mean.setChecked(True)
-            self.check_mean.setPalette(self.palette_right)
-            if check == 2:
-                month_list = re.split(r',\s*', str(self.sender().text()))
-                month_list = np.array([int(num) for num in month_list])
-                string = [months_str[i-1] for i in month_list]
-                self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p>' + ', '.join(string) + '</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
-            else:
-                self.mean_line.setToolTip('<html><head/><body><p>Currently averaged months:</p>' + 'all' + '</p><p>Months must be written with their respective number, seperated by &quot;,&quot;. To get a yearly average, use either &quot;yearly&quot; or &quot;all&quot;.</p></body></html>')
-            for row in range(self.frozen_list.rowCount()):
-                if int(self.frozen_list.cellWidget(row, 1).currentIndex()) >= 2:
-                    self.frozen_list.cellWidget(row, 1).setCurrentIndex(1)
-            for row in range(self.proxy_list.rowCount()):
-                if int(self.proxy_list.cellWidget(row, 1).currentIndex()) >= 2:
-                    self.proxy_list.cellWidget(row, 1).setCurrentIndex(1)
-
-    def method_update(self, methodBox, row):
-        table = self.sender().parent().parent()
-        if table.objectName() != 'frozen_list':
-            self.proxies[row].method = int(methodBox.currentIndex())
-            if int(methodBox.currentIndex()) > int(self.frozen_list.cellWidget(1, 1).currentIndex()):
-                self.frozen_list.cellWidget(1, 1).setCurrentIndex(int(methodBox.currentIndex()))
-        else:
-            if table.indexAt(methodBox.pos()).row() == 0:
-                self.ini['trend_method'] = int(methodBox.currentIndex())
-            elif table.indexAt(methodBox.pos()).row() == 1:
-                self.ini['intercept_method'] = int(methodBox.currentIndex())
-
-        if table.cellWidget(row, 2) is not None:
-            if int(methodBox.currentIndex()) == 2:
-                table.cellWidget(row, 2).setEnabled(True)
+def sample_memory():
+    # Runs in a background thread and raises the memory peak of every running stage every 10 ms, until the timing is
+    # stopped (see stop_timing)
+    while timing_state['enabled']:
+        timing_state['rss'] = get_rss()
+        for record in list(timing_state['active'].values()):
+            record['peak'] = max(record['peak'], timing_state['rss'])
+        time.sleep(0.01)
+
+
+def start_timing():
+    stage_stats.clear()
+    # The sampler of a timing that was stopped ends within 10 ms and is replaced by a new one
+    if not timing_state['enabled'] and timing_state['sampler'] is not None:
+        timing_state['sampler'].join()
+    timing_state['enabled'] = True
+    timing_state['rss'] = get_rss()
+    if timing_state['sampler'] is None or not timing_state['sampler'].is_alive():
+        timing_state['sampler'] = threading.Thread(target=sample_memory, daemon=True)
+        timing_state['sampler'].start()
+
+
+def stop_timing():
+    # Stops recording the stages and the memory sampler, the recorded stages are kept until the next start_timing
+    timing_state['enabled'] = False
+
+
+@contextlib.contextmanager
+def timed_stage(name):
+    # Adds the wall time and the memory peak of the enclosed code to the stage, stages can be nested
+    if not timing_state['enabled']:
+        yield
+        return
+    stats = stage_stats.setdefault(name, [0.0, 0, 0])
+    record = {'peak': timing_state['rss']}
+    timing_state['active'][id(record)] = record
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        del timing_state['active'][id(record)]
+        stats[0] += seconds
+        stats[1] += 1
+        stats[2] = max(stats[2], record['peak'])
+
+
+def timed(name):
+    # Decorator that records every call of the function as the stage name
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not timing_state['enabled']:
+                return function(*args, **kwargs)
+            with timed_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_timing_summary():
+    lines = [f"{'stage':<24}{'calls':>8}{'seconds':>12}{'peak memory (MB)':>20}"]
+    for name, (seconds, calls, peak) in stage_stats.items():
+        lines.append(f"{name:<24}{calls:>8}{seconds:>12.3f}{peak / 1e6:>20.1f}")
+    return '\n'.join(lines)
+
+
+def save_timing_summary(save_path):
+    # Adds the recorded stages as attributes to the output file
+    with netcdf_lock, nc.Dataset(save_path, 'a') as f:
+        f.timing_stages = '\n'.join(stage_stats)
+        f.timing_seconds = np.array([i[0] for i in stage_stats.values()])
+        f.timing_calls = np.array([i[1] for i in stage_stats.values()], dtype='i4')
+        f.timing_peak_memory_mb = np.array([i[2] / 1e6 for i in stage_stats.values()])
+
+
+# Progress of the trend calculation. The cells that are done (fitted, skipped or read from the cache or a checkpoint) are
+# counted with report_progress and handed to the callback of set_progress_callback at most once per interval (in seconds).
+# Cells whose fit failed are counted with report_failure, with the number of cells per message in failures. The worker
+# processes of jobs collect their messages in messages instead of printing them (None in the main process)
+progress_state = {'callback': None, 'interval': 0.5, 'quiet': False, 'total': 0, 'done': 0, 'skipped': 0, 'failed': 0, 'failures': {}, 'messages': None, 'start': 0.0, 'last': 0.0, 'status_line': False}
+
+
+def set_progress_callback(callback, interval=0.5):
+    # callback(progress) gets a dict with done, skipped, failed and total (numbers of cells), elapsed (seconds), rate
+    # (cells per second), eta (remaining seconds, NaN until the first cell is done) and finished. None turns the reports off
+    progress_state['callback'] = callback
+    progress_state['interval'] = interval
+
+
+def start_progress(total):
+    progress_state.update(total=total, done=0, skipped=0, failed=0, failures={}, start=time.perf_counter(), last=0.0)
+
+
+def report_progress(done=0, skipped=0, finished=False):
+    # Skipped cells are counted in done as well
+    progress_state['done'] += done
+    progress_state['skipped'] += skipped
+    if progress_state['callback'] is None:
+        return
+    now = time.perf_counter()
+    if not finished and now - progress_state['last'] < progress_state['interval']:
+        return
+    progress_state['last'] = now
+
+    elapsed = now - progress_state['start']
+    rate = progress_state['done'] / elapsed if elapsed > 0 else 0.0
+    eta = (progress_state['total'] - progress_state['done']) / rate if rate > 0 else np.nan
+    progress_state['callback']({'done': progress_state['done'], 'skipped': progress_state['skipped'], 'failed': progress_state['failed'], 'total': progress_state['total'], 'elapsed': elapsed, 'rate': rate, 'eta': eta, 'finished': finished})
+
+
+def report_failure(message, cells=1):
+    # Counts cells whose fit failed (their trends stay NaN, they are still counted as done by report_progress). The
+    # messages are printed once with the number of their cells by print_failures at the end of the run
+    progress_state['failed'] += cells
+    progress_state['failures'][message] = progress_state['failures'].get(message, 0) + cells
+
+
+def print_failures():
+    for message, cells in progress_state['failures'].items():
+        print_info(str(cells) + (' cell: ' if cells == 1 else ' cells: ') + message)
+
+
+def format_progress(progress):
+    line = str(progress['done']) + ' of ' + str(progress['total']) + ' cells' + f" ({progress['done'] / max(progress['total'], 1) * 100:.1f}%), " + str(progress['skipped']) + ' skipped, '
+    if progress.get('failed'):
+        line += str(progress['failed']) + ' failed, '
+    line += f"{progress['rate']:.1f} cells/s"
+    if progress['finished']:
+        return line + ', ' + str(dt.timedelta(seconds=round(progress['elapsed'])))
+    if np.isfinite(progress['eta']):
+        return line + ', ETA ' + str(dt.timedelta(seconds=round(progress['eta'])))
+    return line
+
+
+def print_progress(progress):
+    # Progress callback of the console: one status line that is overwritten in a terminal, one line per update otherwise
+    if not sys.stdout.isatty():
+        print(format_progress(progress), flush=True)
+        return
+    print('\r\033[K' + format_progress(progress), end='\n' if progress['finished'] else '', flush=True)
+    progress_state['status_line'] = not progress['finished']
+
+
+def print_info(message):
+    # Prints a message of the model that is not a warning or an error, unless the model runs quietly (quiet = True in the
+    # config.ini or --quiet in the console). An open status line is cleared first and is printed again with the next update
+    if progress_state['quiet']:
+        return
+    if progress_state['messages'] is not None:
+        progress_state['messages'].append(message)
+        return
+    if progress_state['status_line']:
+        print('\r\033[K', end='')
+        progress_state['status_line'] = False
+    print(message)
+
+
+# netCDF4 releases the GIL while it reads or writes a file, but the netCDF-C and HDF5 libraries below it are not
+# thread-safe. Every access to a netCDF file while the model runs holds this lock, e.g. the output file of a checkpoint
+# is written while iterate_slabs already reads the next slab in a background thread
+netcdf_lock = threading.Lock()
+
+
+# Ozone data that stays in the netCDF file until it's needed (see slab_size and memory_budget in the Readme)
+class LazyCube:
+
+    #   Indexing with slices only narrows down the part of the file, indexing with integers or read() loads the values.
+    #   The axes are in the order of the Dataset class (time first)
+
+    def __init__(self, filename, group_name, var_name, order):
+        self.filename = filename
+        self.group_name = group_name
+        self.var_name = var_name
+        self.order = list(order)      # Axes of the file in the order of the Dataset class
+        with netcdf_lock, nc.Dataset(filename, 'r') as f:
+            file_shape = (f[group_name] if group_name else f).variables[var_name].shape
+        self.ranges = [(0, file_shape[i]) for i in self.order]
+
+    @property
+    def shape(self):
+        return tuple(stop - start for start, stop in self.ranges)
+
+    @property
+    def ndim(self):
+        return len(self.ranges)
+
+    def __getitem__(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        if Ellipsis in index:
+            k = index.index(Ellipsis)
+            index = index[:k] + (slice(None),) * (self.ndim - len(index) + 1) + index[k + 1:]
+        index = index + (slice(None),) * (self.ndim - len(index))
+
+        view = copy.copy(self)
+        view.ranges = []
+        integer_axes = []
+        for axis, (i, (start, stop)) in enumerate(zip(index, self.ranges)):
+            if isinstance(i, slice):
+                first, last, step = i.indices(stop - start)
+                if step != 1:
+                    raise Exception('Only slices with a step size of 1 are supported for data that is read in slabs.')
+                view.ranges.append((start + first, start + max(first, last)))
             else:
-                table.cellWidget(row, 2).setEnabled(False)
-            # Reset the method to single method if the user also wants to average over the year
-            if self.check_mean.isChecked() == True and int(methodBox.currentIndex()) >= 2:
-                table.cellWidget(row, 1).setCurrentIndex(1)
-
-    def seas_update(self, seasBox, row):
-        table = self.sender().parent().parent()
-        if table.objectName() != 'frozen_list':
-            self.proxies[row].seas_comp = seasBox.currentIndex() + 1
-        else:
-            if table.indexAt(seasBox.pos()).row() == 0:
-                self.ini['trend_seasonal_component'] = seasBox.currentIndex() + 1
-            elif table.indexAt(seasBox.pos()).row() == 1:
-                self.ini['intercept_seasonal_component'] = seasBox.currentIndex() + 1
-
-    def load_presets(self):
-        self.preset_list = ['-None-']
-        for file in os.listdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config folder')):
-            if file.endswith('.ini'):
-                self.preset_list.append(file.split('.')[0])
-        self.preset_combo.clear()
-        self.preset_combo.addItems(self.preset_list)
-
-    def change_preset(self):
-        if self.preset_combo.currentIndex() == 0:
-            return
+                i = int(i) + (stop - start if int(i) < 0 else 0)
+                if not 0 <= i < stop - start:
+                    raise IndexError('Index ' + str(i) + ' is out of bounds for axis ' + str(axis) + ' with size ' + str(stop - start))
+                view.ranges.append((start + i, start + i + 1))
+                integer_axes.append(axis)
 
-        file_name = './config folder/' + self.preset_list[self.preset_combo.currentIndex()] + '.ini'
+        if not integer_axes:
+            return view
+        return view.read()[tuple(0 if axis in integer_axes else slice(None) for axis in range(self.ndim))]
 
-        ini = {}
-
-        with open(file_name, 'r') as f:
-            # Count the number of additional_proxy_path keys
-            add_proxy_count = 0
-            for line in f:
-                if '=' not in line or line[0] == '#':
-                    # Skip line in config file if no = sign is in there or if it starts with #
-                    continue
-                (key, val) = line.split('=')
-                # cleaning the input data
-                key = key.strip()
-                if key == 'additional_proxy_path':
-                    add_proxy_count += 1
-
-            # Creating empty lists for the additional proxy data
-            ini['additional_proxy_name'] = np.empty(add_proxy_count, dtype='object')
-            ini['additional_proxy_path'] = np.empty(add_proxy_count, dtype='object')
-            ini['additional_proxy_time_col'] = np.zeros(add_proxy_count, dtype='object')
-            ini['additional_proxy_data_col'] = np.ones(add_proxy_count, dtype=int)
-            ini['additional_proxy_method'] = np.ones(add_proxy_count, dtype=int)
-            ini['additional_proxy_comment_symbol'] = np.empty(add_proxy_count, dtype='object')
-            ini['additional_proxy_header_size'] = np.empty(add_proxy_count, dtype=int)
-            ini['additional_proxy_time_format'] = np.empty(add_proxy_count, dtype='object')
-
-        with open(file_name, 'r') as f:
-            add_proxy_count = -1
-            for line in f:
-                if '=' not in line or line[0] == '#':
-                    # Skip line in config file if no = sign is in there or if it starts with #
-                    continue
-                (key, val) = line.split('=')
-                # cleaning the input data
-                key = key.strip()
-                val = val.strip()
-                if key in ini.keys():
-                    if key == 'additional_proxy_path':
-                        add_proxy_count += 1
-                    ini[key][add_proxy_count] = val
-                else:
-                    ini[key] = val
-
-        ini['additional_proxy_method'] = ini.get('additional_proxy_method', ini.get('default_proxy_method', 1))
-
-        # config ini loaded
-
-        if 'inflection_point' in ini:
-            self.inflection_point.setText(dt.datetime.strftime(dt.datetime.strptime(ini['inflection_point'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.inflection_point.setText('YYYY-MM')
-
-        if 'inflection_point' in ini and 'inflection_method' in ini:
-            if ini['inflection_method'] == 'ind':
-                self.inflection_method.setCurrentIndex(0)
-            elif ini['inflection_method'] == 'pwl':
-                self.inflection_method.setCurrentIndex(1)
-            self.infl_check.setChecked(True)
-
-        if 'start_date' in ini:
-            self.start_date.setText(dt.datetime.strftime(dt.datetime.strptime(ini['start_date'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.start_date.setText('YYYY-MM')
-
-        if 'end_date' in ini:
-            self.end_date.setText(dt.datetime.strftime(dt.datetime.strptime(ini['end_date'], '%Y-%m').date(), '%Y-%m'))
-        else:
-            self.end_date.setText('YYYY-MM')
-
-        if 'trend_method' in ini:
-            self.trend_method_combo.setCurrentIndex(int(ini['trend_method']))
-        else:
-            self.trend_method_combo.setCurrentIndex(1)
-        if int(self.intercept_method_combo.currentIndex()) == 2:
-            self.intercept_seas_combo.setDisabled(False)
-        else:
-            self.intercept_seas_combo.setDisabled(True)
-
-        if 'intercept_method' in ini:
-            self.intercept_method_combo.setCurrentIndex(int(ini['intercept_method']))
-        else:
-            self.intercept_method_combo.setCurrentIndex(1)
-        if int(self.intercept_method_combo.currentIndex()) == 2:
-            self.intercept_seas_combo.setDisabled(False)
-        else:
-            self.intercept_seas_combo.setDisabled(True)
-
-        self.mean_line.setText(self.ini.get('averaging_window', ''))
-
-        if ini.get('anomaly', 'False') == 'True':
-            self.anomaly_check.setChecked(True)
-        else:
-            self.anomaly_check.setChecked(False)
-
-    def all_proxy_method_change(self):
-        index = int(self.all_proxy_method.currentIndex()) - 1
-        if index < 0:       # Doesn't do anything if ComboBox changes to "mixed"
-            return
-
-        for row in range(self.proxy_list.rowCount()):
-            combo_box = self.proxy_list.cellWidget(row, 1)
-            combo_box.setCurrentIndex(index)
-        for row in range(self.frozen_list.rowCount()):
-            combo_box = self.frozen_list.cellWidget(row, 1)
-            combo_box.setCurrentIndex(index)
-
-    def inflection_method_change(self):
-        self.ini['inflection_method'] = self.infl_method_list[self.inflection_method.currentIndex()]
-
-    def data_change(self):
-        # self.ini['time_format'] = self.list_of_data[self.data_list.currentRow()].time_format
-
-        self.populate_dim_limits()
-
-    def clear_dim_widgets(self, layout):
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                else:
-                    child_layout = item.layout()
-                    if child_layout is not None:
-                        self.clear_dim_widgets(child_layout)
-
-    def populate_dim_widgets_1d(self, var_string):
-        boxes_name = 'dim_' + var_string + '_boxes'
-        layout_name = 'dim_' + var_string + '_layout'
-        button_name = 'plot_button_' + var_string
-
-        boxes = getattr(self, boxes_name, None)
-        layout = getattr(self, layout_name, None)
-        button = getattr(self, button_name, None)
-
-        button.setDisabled(False)
-
-        boxes.clear()
-
-        for dim_index in range(1, len(self.current_data.o3.shape)):
-            col_layout = QVBoxLayout()
-            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
-            col_layout.addWidget(label)
-
-            combo = QtWidgets.QComboBox()
-            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
-            combo.addItems([str(value) for value in values])
-            col_layout.addWidget(combo)
-
-            boxes.append(combo)
-
-            layout.addLayout(col_layout)
-
-    def populate_dim_widgets_2d(self, var_string):
-        boxes_name = 'dim_' + var_string + '_boxes'
-        layout_name = 'dim_' + var_string + '_layout'
-        button_name = 'plot_button_' + var_string
-
-        boxes = getattr(self, boxes_name, None)
-        layout = getattr(self, layout_name, None)
-        button = getattr(self, button_name, None)
-
-        boxes.clear()
-
-        for dim_index in range(1, len(self.current_data.o3.shape)):
-            col_layout = QVBoxLayout()
-            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
-            col_layout.addWidget(label)
-
-            combo = QtWidgets.QComboBox()
-            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
-            combo.addItem('---X Axis---')
-            combo.addItem('---Y Axis---')
-            combo.addItems([str(value) for value in values])
-            col_layout.addWidget(combo)
-            combo.currentIndexChanged.connect(lambda: self.sync_combo_boxes(var_string))
-
-            boxes.append(combo)
-
-            layout.addLayout(col_layout)
-        for k, i in enumerate(self.dim_con_boxes):
-            i.setCurrentIndex(k)
-
-    def populate_dim_widgets_proxy(self):
-        checks = self.dim_proxy_checks
-        layout = self.dim_proxy_layout_checks
-
-        checks.clear()
-
-        str_groups = get_string_groups(self.proxy_string)
-        for key, i in str_groups.items():
-            if key[0] == 'proxy':
-                col_layout = QVBoxLayout()
-
-                check = QtWidgets.QCheckBox()
-                check.setText(key[3])
-                col_layout.addWidget(check)
-
-                checks.append(check)
-
-                layout.addLayout(col_layout)
-
-    def populate_dim_widgets_proxy_con(self):
-        self.proxy_con_combo.clear()
-        combo = self.proxy_con_combo
-
-        proxies = []
-
-        str_groups = get_string_groups(self.proxy_string)
-        for key, i in str_groups.items():
-            if key[0] == 'proxy':
-                proxies.append(key[3])
-
-        combo.addItems(proxies)
-
-    def populate_X_dim_widget(self):
-        self.dim_X_boxes.clear()
-
-        for dim_index in range(1, len(self.current_data.o3.shape)):
-            col_layout = QVBoxLayout()
-            label = QtWidgets.QLabel(self.current_data.dim_array[dim_index])
-            col_layout.addWidget(label)
-
-            combo = QtWidgets.QComboBox()
-            values = getattr(self.current_data, self.current_data.dim_array[dim_index])
-            combo.addItems([str(value) for value in values])
-            col_layout.addWidget(combo)
-            combo.currentIndexChanged.connect(self.X_diagnostic)
-
-            self.dim_X_boxes.append(combo)
-
-            self.dim_X_layout.addLayout(col_layout)
-        self.X_diagnostic()
-
-    def lim_update_min(self, dim, index):
-        min_combo, max_combo = self.combo_pairs[dim]
-        if index > max_combo.currentIndex():
-            max_combo.setCurrentIndex(index)  # Adjust max to match min
-        dim_index = self.list_of_data[self.data_list.currentRow()].dim_array.index(dim)
-        self.ini['additional_var_' + str(dim_index + 1) + '_limit'] = str(min_combo.currentIndex()) + ', ' + str(max_combo.currentIndex())
-
-    def lim_update_max(self, dim, index):
-        min_combo, max_combo = self.combo_pairs[dim]
-        if index < min_combo.currentIndex():
-            min_combo.setCurrentIndex(index)  # Adjust min to match max
-        dim_index = self.list_of_data[self.data_list.currentRow()].dim_array.index(dim)
-        self.ini['additional_var_' + str(dim_index + 1) + '_limit'] = str(min_combo.currentIndex()) + ', ' + str(max_combo.currentIndex())
-
-    def populate_dim_limits(self):
-        data = self.list_of_data[self.data_list.currentRow()]
-        # Clear existing widgets in data_lim_box
-        for i in reversed(range(self.data_lim_box.layout().count())):
-            widget = self.data_lim_box.layout().itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        self.combo_pairs.clear()
-
-        # Get dimensions except 'time'
-        dimensions = [dim for dim in data.dim_array if dim != 'time']
-
-        main_layout = self.data_lim_box.layout()
-        if main_layout is None:
-            main_layout = QVBoxLayout()
-            self.data_lim_box.setLayout(main_layout)
-
-        # Loop through each dimension and create a pair of combo boxes
-        for dim in dimensions:
-            widget = QtWidgets.QWidget()  # Container widget
-            h_layout = QHBoxLayout(widget)  # Horizontal layout for combo box pairs
-
-            dim_values = list(map(str, getattr(data, dim)))
-            # First combo box with label
-            vbox1 = QVBoxLayout()
-            label1 = QtWidgets.QLabel(f"{dim} Min:")
-            combo1 = QtWidgets.QComboBox()
-            combo1.addItems(dim_values)  # Populate with data
-            vbox1.addWidget(label1)
-            vbox1.addWidget(combo1)
-
-            # Second combo box with label
-            vbox2 = QVBoxLayout()
-            label2 = QtWidgets.QLabel(f"{dim} Max:")
-            combo2 = QtWidgets.QComboBox()
-            combo2.addItems(dim_values)
-            combo2.setCurrentIndex(len(dim_values) - 1)
-            vbox2.addWidget(label2)
-            vbox2.addWidget(combo2)
-
-            self.combo_pairs[dim] = (combo1, combo2)
-
-            # Connect signals to slot functions
-            combo1.currentIndexChanged.connect(lambda index, d=dim: self.lim_update_min(d, index))
-            combo2.currentIndexChanged.connect(lambda index, d=dim: self.lim_update_max(d, index))
-
-            # Add both vertical layouts to the horizontal layout
-            h_layout.addLayout(vbox1)
-            h_layout.addLayout(vbox2)
-
-            # Add the widget container to the group box layout
-            main_layout.addWidget(widget)
-
-    def sync_combo_boxes(self, var_string):
-        # Get the indices of all combo boxes
-        boxes = getattr(self, 'dim_' + var_string + '_boxes', None)
-        button = getattr(self, 'plot_button_' + var_string, None)
-        current_indices = [combo.currentIndex() for combo in boxes]
-
-        # Disable the plot button if X- and Y-axis are not picked exactly once and if one of these has not enough values
-        valid_indices = current_indices.count(0) == 1 and current_indices.count(1) == 1
-        valid_lengths = all(self.dim_con_boxes[i].count() > 3 for i, idx in enumerate(current_indices) if idx in (0, 1))
-        button.setDisabled(not (valid_indices and valid_lengths))
-
-        sender_index = self.sender().currentIndex()
-        if sender_index in {0, 1}:
-            for i, combo in enumerate(boxes):
-                if combo != self.sender() and combo.currentIndex() == sender_index:
-                    # Find a new valid index for the conflicting combo box
-                    for new_index in range(combo.count()):
-                        if new_index not in {0, 1} and new_index != sender_index:
-                            combo.setCurrentIndex(new_index)
-                            break
-
-    def X_diagnostic(self):
-        indices = [combo.currentIndex() for combo in self.dim_X_boxes]
-        matrix = self.X[(slice(None), *indices, slice(None))]
-        header = self.proxy_string
-        date = self.time
-
-        # Fill Table
-        self.dia_X_table.setColumnCount(len(header))
-        self.dia_X_table.setRowCount(len(date))
-
-        self.dia_X_table.setHorizontalHeaderLabels(header)
-        self.dia_X_table.setVerticalHeaderLabels(date.astype(str))
-
-        for k in range(len(date)):
-            for kk in range(len(header)):
-                self.dia_X_table.setItem(k, kk, QTableWidgetItem(str(matrix[k, kk])))
-
-    def data_diagnostic(self):
-        indices = [combo.currentIndex() for combo in self.dim_data_boxes]
-        matrix = self.list_of_data[self.dia_data_combo.currentIndex()].o3[(slice(None), *indices)]
-        date = self.list_of_data[self.dia_data_combo.currentIndex()].time
-
-        # Fill Table
-        self.dia_data_table.setColumnCount(1)
-        self.dia_data_table.setRowCount(len(date))
-
-        self.dia_data_table.setVerticalHeaderLabels(date.astype(str))
-
-        for k in range(len(date)):
-            self.dia_data_table.setItem(k, 0, QTableWidgetItem(str(matrix[k])))
-
-        # Fill information
-        self.dia_data_start.setText(str(np.nanmin(date)))
-        self.dia_data_end.setText(str(np.nanmax(date)))
-        self.dia_data_time.setText(str(len(date)))
-        self.dia_data_nan.setText(str(np.sum(np.isnan(matrix.filled(np.nan)))))
-
-    def plot_model_figure(self):
-        # Clear the figure
-        self.model_canvas.figure.clf()
-
-        # Preparing Plot values
-        data = copy.deepcopy(self.current_data)
-
-        # Get dimension combo boxes indices
-        plot_indices = [combo.currentIndex() for combo in self.dim_model_boxes]
-        indices = tuple([slice(None)] + list(plot_indices))
-
-        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
-        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
-
-        X_og = data.time
-        Y_og = data.o3[indices]
-        Y = self.trend_data[indices]
-        X = self.time
-        X_slope = copy.deepcopy(self.time[valid_rows])
-
-        Y_trend = self.trends[tuple(plot_indices)]
-        if not isinstance(Y_trend, (list, np.ndarray)):
-            Y_trend = [Y_trend]
-        Y_signi = self.signi[tuple(plot_indices)]
-
-        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
-        slope_beta = []
-        slope_X = []
-        str_groups = get_string_groups(self.proxy_string)
-        for key, i in str_groups.items():
-            if key[0] == 'proxy':
-                continue
-            else:
-                if key[1] == 'month-of-the-year':
-                    slope_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
-                    slope_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
-                else:
-                    slope_beta.append(self.betaa[tuple(plot_indices)][i[0]])
-                    slope_X.append(self.X[indices][:, i[0]])
-        trend_string = "\n".join([f"trend {k + 1}: {v:.2f}%/decade" for k, v in enumerate(Y_trend)])
-        Y_slope = np.array(slope_X).T @ np.array(slope_beta)
-        Y_slope = Y_slope[valid_rows]
-        plot_number = 1
-
-        # Include a breakpoint if there are inflection points
-        if self.current_ini.get('inflection_point', None):
-            breakpoint_index = np.where(self.time[valid_rows] >= dt.datetime.strptime(self.current_ini.get('inflection_point'), '%Y-%m').date())[0][0]
-            X_slope = np.insert(X_slope, breakpoint_index, X_slope[breakpoint_index])
-            Y_slope = np.insert(Y_slope, breakpoint_index, np.nan)
-
-        self.model_canvas.axes_list = [self.model_canvas.figure.add_subplot(plot_number, 1, i + 1) for i in range(plot_number)]
-
-        # bounds = [-7, -5, -3, -1, -0.75, -0.5, -0.25, 0, 0.25, 0.5, 0.75, 1, 3, 5, 7]
-        bounds = np.arange(-9, 10, 1, dtype=int)
-        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
-        cmap.set_under(plt.get_cmap('RdBu_r')(0))
-        cmap.set_over(plt.get_cmap('RdBu_r')(255))
-        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
-
-        for k, ax in enumerate(self.model_canvas.axes_list):
-            if X_og.shape != X.shape and not self.anomaly_check.isChecked():
-                    ax.plot(X_og, Y_og, label='Original Time Series', linewidth=1.4)
-            ax.plot(X, Y, label='Time Series', linewidth=1.8)
-
-            ax.plot(self.time[valid_rows], Y_model, label='Model', linewidth=1.8)
-            ax.plot(X_slope, Y_slope, path_effects=[pe.Stroke(linewidth=5, foreground='black'), pe.Normal()], label='Trend', linewidth=1.3)
-            ax.legend(loc='upper right')
-
-            props = dict(boxstyle='round', facecolor='white', alpha=1)
-            ax.text(0.05, 0.95, trend_string, transform=ax.transAxes, fontsize=10, verticalalignment='top', horizontalalignment='left', bbox=props)
-            ax.set_title(data.name + '\nat ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_model_boxes]))))
-        self.model_canvas.axes_list[0].set_xlabel('Time [yr]', fontsize=14)
-        self.model_canvas.axes_list[0].set_ylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
-        self.model_canvas.figure.tight_layout()
-        toolbar = NavigationToolbar(self.model_canvas, self)
-
-        self.model_canvas.draw()
-
-    def plot_contour_figure(self):
-        # Clear the figure
-        self.con_canvas.figure.clf()
-
-        trends = self.trends
-        signis = self.signi
-
-        data = copy.deepcopy(self.current_data)
-
-        # Get dimension combo boxes indices
-        plot_indices = ()
-        for k, combo in enumerate(self.dim_con_boxes):
-            if combo.currentIndex() == 0:
-                plot_indices += (slice(None),)
-                x_grid = getattr(data, data.dim_array[1:][k])
-                x_label = getattr(data, data.dim_array[1:][k] + '_unit')
-            elif combo.currentIndex() == 1:
-                plot_indices += (slice(None),)
-                y_grid = getattr(data, data.dim_array[1:][k])
-                y_label = getattr(data, data.dim_array[1:][k] + '_unit')
-            else:
-                plot_indices += (combo.currentIndex() - 2,)
-        if trends[plot_indices].shape != (len(y_grid), len(x_grid)):
-            trend = trends[plot_indices].T
-            signi = signis[plot_indices].T > 2
-        else:
-            trend = trends[plot_indices]
-            signi = signis[plot_indices] > 2
-        masked_uncertainty = np.where(np.isnan(trend), np.nan, signi)
-
-        bounds = np.arange(-10, 11, 1, dtype=int)
-        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
-        cmap.set_under(plt.get_cmap('RdBu_r')(0))
-        cmap.set_over(plt.get_cmap('RdBu_r')(255))
-        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
-
-        self.con_canvas.axes = self.con_canvas.figure.add_subplot(1, 1, 1)
-        if self.con_alternative.isChecked() == True:
-            cf = self.con_canvas.axes.imshow(trend, cmap=cmap, norm=norm, extent=[x_grid[0] + (x_grid[0]-x_grid[1])/2, x_grid[-1] + (x_grid[-1]-x_grid[-2])/2, y_grid[0] + (y_grid[0]-y_grid[1])/2, y_grid[-1] + (y_grid[-1]-y_grid[-2])/2], origin='lower', aspect='auto', alpha=0.7)
-            if self.con_uncertainty.isChecked() == True:
-                for i in range(trend.shape[0]):
-                    for j in range(trend.shape[1]):
-                        if not masked_uncertainty[i, j]:
-                            if i+1 == trend.shape[0] and j+1 == trend.shape[1]:
-                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j - 1] - x_grid[j]) / 2, y_grid[i] + (y_grid[i - 1] - y_grid[i]) / 2), (x_grid[j] - x_grid[j - 1]), (y_grid[i] - y_grid[i - 1]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
-                            elif i+1 == trend.shape[0]:
-                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j] - x_grid[j + 1]) / 2, y_grid[i] + (y_grid[i - 1] - y_grid[i]) / 2), (x_grid[j + 1] - x_grid[j]), (y_grid[i] - y_grid[i-1]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
-                            elif j+1 == trend.shape[1]:
-                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j - 1] - x_grid[j]) / 2, y_grid[i] + (y_grid[i] - y_grid[i + 1]) / 2), (x_grid[j] - x_grid[j - 1]), (y_grid[i + 1] - y_grid[i]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
-                            else:
-                                self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[j] + (x_grid[j] - x_grid[j + 1]) / 2, y_grid[i] + (y_grid[i] - y_grid[i + 1]) / 2), (x_grid[j + 1] - x_grid[j]), (y_grid[i + 1] - y_grid[i]), linewidth=0, fill=None, hatch='//', edgecolor='grey'))
-                            # self.con_canvas.axes.add_patch(patches.Rectangle((x_grid[0] + (x_grid[0]-x_grid[1])/2 + j * (x_grid[1] - x_grid[0]), y_grid[0] + (y_grid[0]-y_grid[1])/2 + i * (y_grid[1] - y_grid[0])), (x_grid[1] - x_grid[0]), (y_grid[1] - y_grid[0]), hatch="////", fill=False, edgecolor='black'))
-        else:
-            cf = self.con_canvas.axes.contourf(x_grid, y_grid, trend, cmap=cmap, levels=bounds, norm=norm, extend='both')
-            self.con_canvas.axes.contour(x_grid, y_grid, trend, levels=bounds, colors=('k',), alpha=0.7, norm=norm, extend='both', linewidths=1)
-            if self.con_uncertainty.isChecked() == True:
-                self.con_canvas.axes.contourf(x_grid, y_grid, masked_uncertainty, levels=[0, 0.5], colors='none', hatches=['\\\\'])
-                self.con_canvas.axes.contour(x_grid, y_grid, masked_uncertainty, levels=[0.5], colors='#DBDBDB', norm=norm)
-                # self.con_canvas.axes.contourf(x_grid, y_grid, masked_uncertainty, levels=[0, 0.5], colors='#DBDBDB', norm=norm, alpha=0.65)
-        self.con_canvas.axes.set_xlim([np.nanmin(x_grid), np.nanmax(x_grid)])
-        self.con_canvas.axes.set_ylim([np.nanmin(y_grid), np.nanmax(y_grid)])
-        if self.con_invert.isChecked() == True:
-            self.con_canvas.axes.set_ylim(self.con_canvas.axes.get_ylim()[::-1])
-        self.con_canvas.axes.tick_params(axis='both')
-        self.con_canvas.axes.set_title(data.name + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_con_boxes]))))
-        # self.con_canvas.axes.set_title(data.name + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_boxes]))))
-        self.con_canvas.axes.set_xlabel(x_label, fontsize=14)
-        self.con_canvas.axes.set_ylabel(y_label, fontsize=14)
-
-        divider = make_axes_locatable(self.con_canvas.axes)
-        cbar_ax = divider.append_axes("right", size="5%", pad=0.2)
-        cbar = self.con_canvas.figure.colorbar(cf, cax=cbar_ax, label='[%/decade]')
-        cbar.set_ticks(bounds)
-        self.con_canvas.figure.tight_layout()
-        toolbar = NavigationToolbar(self.con_canvas, self)
-
-        self.con_canvas.draw()
-
-    def plot_resi_figure(self):
-        # Clear the figure
-        self.resi_canvas.figure.clf()
-
-        # Preparing Plot values
-        data = copy.deepcopy(self.current_data)
-
-        # Get dimension combo boxes indices
-        plot_indices = [combo.currentIndex() for combo in self.dim_resi_boxes]
-        indices = tuple([slice(None)] + list(plot_indices))
-
-        Y = self.trend_data[indices]
-
-        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
-        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
-        X = copy.deepcopy(self.time[valid_rows])
-
-        Y_trend = self.trends[tuple(plot_indices)]
-        if not isinstance(Y_trend, (list, np.ndarray)):
-            Y_trend = [Y_trend]
-
-        slope_beta = []
-        slope_X = []
-        resi_beta = []
-        resi_X = []
-
-        str_groups = get_string_groups(self.proxy_string)
-        for key, i in str_groups.items():
-            if key[0] == 'proxy' or key[0] == 'intercept':
-                if key[1] == 'month-of-the-year':
-                    resi_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
-                    resi_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
-                else:
-                    resi_beta.append(self.betaa[tuple(plot_indices)][i[0]])
-                    resi_X.append(self.X[indices][:, i[0]])
-            elif key[0] == 'trend':
-                if key[1] == 'month-of-the-year':
-                    slope_beta.append(np.nanmean(self.betaa[tuple(plot_indices)][i], axis=0))
-                    slope_X.append([np.nanmax(row[tuple(plot_indices)][i]) for row in self.X])
-                else:
-                    slope_beta.append(self.betaa[tuple(plot_indices)][i[0]])
-                    slope_X.append(self.X[indices][:, i[0]])
-
-        trend_string = "\n".join([f"trend {k + 1}: {v:.2f}%/decade" for k, v in enumerate(Y_trend)])
-
-        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
-        Y_slope = np.array(slope_X).T @ np.array(slope_beta)
-        Y_slope = Y_slope[valid_rows]
-        Y_all_but_trend = np.array(resi_X).T @ np.array(resi_beta)
-        Y_resi = Y - Y_all_but_trend
-        Y_resi_2 = Y[valid_rows] - Y_model
-        plot_number = 1
-
-        # Include a breakpoint if there are inflection points
-        if self.current_ini.get('inflection_point', None):
-            breakpoint_index = np.where(self.time[valid_rows] >= dt.datetime.strptime(self.current_ini.get('inflection_point'), '%Y-%m').date())[0][0]
-            X = np.insert(X, breakpoint_index, X[breakpoint_index])
-            Y_slope = np.insert(Y_slope, breakpoint_index, np.nan)
-            Y_resi_2 = np.insert(Y_resi_2, breakpoint_index, np.nan)
-
-        self.resi_canvas.axes_list = [self.resi_canvas.figure.add_subplot(plot_number, 1, i + 1) for i in range(plot_number)]
-
-        bounds = [-7, -5, -3, -1, -0.75, -0.5, -0.25, 0, 0.25, 0.5, 0.75, 1, 3, 5, 7]
-        # bounds = np.arange(-9, 10, 1, dtype=int)
-        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
-        cmap.set_under(plt.get_cmap('RdBu_r')(0))
-        cmap.set_over(plt.get_cmap('RdBu_r')(255))
-        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
-
-        for k, ax in enumerate(self.resi_canvas.axes_list):
-            ax.plot(X, Y_resi_2 + Y_slope, label='Residuals', linewidth=1.8)
-            # ax.plot(self.time[valid_rows], Y_resi[valid_rows], label='Residuals OLD', linewidth=1.8)
-            ax.plot(X, Y_slope, path_effects=[pe.Stroke(linewidth=5, foreground='black'), pe.Normal()], label='Trend', linewidth=1.3)
-
-            props = dict(boxstyle='round', facecolor='white', alpha=1)
-            ax.text(0.05, 0.95, trend_string, transform=ax.transAxes, fontsize=10, verticalalignment='top', horizontalalignment='left', bbox=props)
-            ax.set_title(data.name + '\n residuals at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_resi_boxes]))))
-        toolbar = NavigationToolbar(self.resi_canvas, self)
-        self.resi_canvas.axes_list[0].set_xlabel('Time [yr]', fontsize=14)
-        self.resi_canvas.axes_list[0].set_ylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
-        self.resi_canvas.axes_list[0].legend()
-        self.resi_canvas.figure.tight_layout()
-        self.resi_canvas.draw()
-
-    def plot_proxy_figure(self):
-        # Clear the figure
-        self.proxy_canvas.figure.clf()
-
-        # Get dimension combo boxes indices
-        plot_indices = [combo.currentIndex() for combo in self.dim_proxy_boxes]
-        indices = tuple([slice(None)] + list(plot_indices))
-        data = copy.deepcopy(self.current_data)
-        X = copy.deepcopy(self.X[indices])
-        beta = copy.deepcopy(self.betaa[tuple(plot_indices)])
-        checks = [check.isChecked() for check in self.dim_proxy_checks]
-        if not any(checks):
-            return      # Stops the function if nothing was checked
-
-        valid_cols = ~np.isnan(self.X[indices]).all(axis=0)
-        valid_rows = ~np.isnan(self.X[indices]).all(axis=1)
-        date = copy.deepcopy(self.time[valid_rows])
-
-        Y_og = self.trend_data[indices][valid_rows]
-        Y_model = np.matmul(self.X[indices][valid_rows][:, valid_cols], self.betaa[tuple(plot_indices)][valid_cols])
-        Y_resi = Y_og - Y_model
-
-        Y = []
-        Y_label = []
-
-        str_groups = get_string_groups(self.proxy_string)
-
-        check_idx = 0
-        for key, i in str_groups.items():
-            if key[0] == 'proxy':
-                if checks[check_idx]:
-                    Y.append(np.array(X[:, i]) @ np.array(beta[i]))
-                    Y_label.append(key[-1])
-                check_idx += 1
-
-        self.proxy_canvas.axes_list = [self.proxy_canvas.figure.add_subplot(len(Y), 1, i + 1) for i in range(len(Y))]
-        colors = cm.cmaps['hawaii'](np.linspace(0, 1, len(Y)))
-
-        for k, ax in enumerate(self.proxy_canvas.axes_list):
-            ax.plot(date, Y[k][valid_rows] + Y_resi, label=Y_label[k] + ' + residual', color='black', linewidth=1.4)
-            ax.plot(date, Y[k][valid_rows], label=Y_label[k], color=colors[k], linewidth=1.8)
-            ax.yaxis.set_label_position("right")
-            ax.set_ylabel(Y_label[k])
-            if k == 0:
-                ax.set_title('Proxies at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_proxy_boxes]))))
-            if k < len(self.proxy_canvas.axes_list) - 1:
-                ax.set_xticklabels([])
-                ax.tick_params(axis='x', which='both', length=0)
-            else:
-                ax.set_xlabel('Time [yr]', fontsize=14)
-        self.proxy_canvas.figure.supylabel(self.current_ini.get('o3_var_unit', ''), fontsize=14)
-
-        self.proxy_canvas.figure.tight_layout()
-
-        self.proxy_canvas.draw_idle()
-        self.proxy_canvas.flush_events()
-
-    def plot_proxy_con_figure(self):
-        # Clear the figure
-        self.proxy_con_canvas.figure.clf()
-
-        beta = copy.deepcopy(self.betaa)
-        data = copy.deepcopy(self.current_data)
-
-        # Get dimension combo boxes indices
-        plot_indices = ()
-        for k, combo in enumerate(self.dim_proxy_con_boxes):
-            if combo.currentIndex() == 0:
-                plot_indices += (slice(None),)
-                x_grid = getattr(data, data.dim_array[1:][k])
-                x_label = getattr(data, data.dim_array[1:][k] + '_unit')
-            elif combo.currentIndex() == 1:
-                plot_indices += (slice(None),)
-                y_grid = getattr(data, data.dim_array[1:][k])
-                y_label = getattr(data, data.dim_array[1:][k] + '_unit')
-            else:
-                plot_indices += (combo.currentIndex() - 2,)
-
-        str_groups = get_string_groups(self.proxy_string)
-        count = 0
-        for key, i in str_groups.items():
-            if key[0] == 'proxy':
-                if self.proxy_con_combo.currentIndex() == count:
-                    proxy_indices = i
-                    break
-                count += 1
-
-        plot_indices += (proxy_indices,)
-        beta = np.nansum(beta[plot_indices], axis=-1)
-        if beta.shape != (len(y_grid), len(x_grid)):
-            beta = beta.T
-
-        self.proxy_con_canvas.axes = self.proxy_con_canvas.figure.add_subplot(1, 1, 1)
-
-        cmap = matplotlib.colors.LinearSegmentedColormap.from_list("", plt.get_cmap('RdBu_r')(np.arange(10, 245, 3).astype(int)))
-        cmap.set_under(plt.get_cmap('RdBu_r')(0))
-        cmap.set_over(plt.get_cmap('RdBu_r')(255))
-        vmax = np.ceil(np.nanmax(np.abs(beta)) / 10 ** np.floor(np.log10(np.nanmax(np.abs(beta))))) * 10 ** np.floor(np.log10(np.nanmax(np.abs(beta))))
-        bounds = np.concatenate((np.arange(-vmax, 0, (vmax/7)), np.arange(0, vmax + (vmax/7), (vmax/7))))
-
-        norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
-
-        if self.proxy_con_alternative.isChecked() == True:
-            cf = self.proxy_con_canvas.axes.imshow(beta, cmap=cmap, norm=norm, extent=[x_grid[0] + (x_grid[0]-x_grid[1])/2, x_grid[-1] + (x_grid[-1]-x_grid[-2])/2, y_grid[0] + (y_grid[0]-y_grid[1])/2, y_grid[-1] + (y_grid[-1]-y_grid[-2])/2], origin='lower', aspect='auto', alpha=0.7)
-        else:
-            cf = self.proxy_con_canvas.axes.contourf(x_grid, y_grid, beta, norm=norm, levels=bounds, cmap=cmap, extend='both')
-            self.proxy_con_canvas.axes.contour(x_grid, y_grid, beta, norm=norm, levels=bounds, colors=('k',), alpha=0.7, extend='both', linewidths=1)
-        self.proxy_con_canvas.axes.set_xlim([np.nanmin(x_grid), np.nanmax(x_grid)])
-        self.proxy_con_canvas.axes.set_ylim([np.nanmin(y_grid), np.nanmax(y_grid)])
-        if self.proxy_con_invert.isChecked() == True:
-            self.proxy_con_canvas.axes.set_ylim(self.proxy_con_canvas.axes.get_ylim()[::-1])
-        self.proxy_con_canvas.axes.tick_params(axis='both')
-        self.proxy_con_canvas.axes.set_title(self.proxy_con_combo.currentText() + ' at ' + ', '.join(f"{dim} {val}" for dim, val in zip(data.dim_array[1:], list([combo.currentText() for combo in self.dim_proxy_con_boxes]))))
-        self.proxy_con_canvas.axes.set_xlabel(x_label, fontsize=14)
-        self.proxy_con_canvas.axes.set_ylabel(y_label, fontsize=14)
-
-        divider = make_axes_locatable(self.proxy_con_canvas.axes)
-        cbar_ax = divider.append_axes("right", size="5%", pad=0.2)
-        cbar = self.proxy_con_canvas.figure.colorbar(cf, cax=cbar_ax, label=self.current_ini.get('o3_var_unit', ''))
-        cbar.set_ticks(bounds)
-        self.proxy_con_canvas.figure.tight_layout()
-        toolbar = NavigationToolbar(self.proxy_con_canvas, self)
-
-        self.proxy_con_canvas.draw()
-
-    def populate_all(self):
-        self.clear_dim_widgets(self.dim_model_layout)
-        self.populate_dim_widgets_1d('model')
-        self.clear_dim_widgets(self.dim_X_layout)
-        self.populate_X_dim_widget()
-        self.clear_dim_widgets(self.dim_con_layout)
-        self.populate_dim_widgets_2d('con')
-        self.clear_dim_widgets(self.dim_resi_layout)
-        self.populate_dim_widgets_1d('resi')
-        self.clear_dim_widgets(self.dim_cell_layout)
-        self.populate_dim_widgets_2d('cell')
-        self.clear_dim_widgets(self.dim_proxy_layout_checks)
-        self.populate_dim_widgets_proxy()
-        self.clear_dim_widgets(self.dim_proxy_layout)
-        self.populate_dim_widgets_1d('proxy')
-        self.clear_dim_widgets(self.dim_proxy_con_layout)
-        self.populate_dim_widgets_2d('proxy_con')
-        self.populate_dim_widgets_proxy_con()
-
-    def print_ini(self):
-        print('brian@iup.physik.uni-bremen.de')
-
-    def compute_trends(self):
-        self.setDisabled(True)
-        self.trends, self.signi, diagnostic = iup_reg_model(self.list_of_data[self.data_list.currentRow()], self.proxies, self.ini)
-        self.setDisabled(False)
-
-        self.X = diagnostic[0]
-        self.beta = diagnostic[1]
-        self.betaa = diagnostic[2]
-        self.covbeta = diagnostic[3]
-        self.proxy_string = diagnostic[4]
-        self.time = diagnostic[5]
-        self.trend_data = diagnostic[6]
-        self.current_ini = copy.copy(self.ini)
-        self.current_data = copy.deepcopy(self.list_of_data[self.data_list.currentRow()])
-        self.current_data = set_data_limits(self.current_data, self.current_ini)
-
-        self.populate_all()
+    @timed('reading data')
+    def read(self):
+        # Loads the selected part of the file as a masked array
+        file_index = tuple(slice(*self.ranges[self.order.index(k)]) for k in range(self.ndim))
+        with netcdf_lock, nc.Dataset(self.filename, 'r') as f:
+            values = (f[self.group_name] if self.group_name else f).variables[self.var_name][file_index]
+        return np.ma.masked_invalid(np.transpose(values, axes=self.order))
 
 
 def load_config_ini(ini_path):
@@ -1951,32 +471,62 @@ def load_config_ini(ini_path):
     return ini
 
 
-def proxies_to_class(proxy_raw):
-    # Convert each proxy in the list to the proxy class
+def proxies_to_class(names, time, proxy_array):
+    # Convert each column of the proxy table to the proxy class
     proxy_list = []
-    proxy_array = np.array(proxy_raw)
-
-    for count, proxy in enumerate(proxy_raw):
+    for count, proxy in enumerate(names):
         proxy_list.append(Proxy(proxy))
-        proxy_list[count].time = pd.to_datetime(pd.Series(proxy_raw.index)).dt.date.map(lambda t: t.replace(day=15))
+        proxy_list[count].time = time
         proxy_list[count].data = proxy_array[:, count]
 
     return proxy_list
 
 
+def read_table(path, skip_header=0, comment=None):
+    # Reads a whitespace separated text table into an array with the C parser of pandas. All numeric tables are returned as
+    # float arrays, tables with other values (e.g. dates like 1997-01) as object arrays
+    table = pd.read_csv(path, sep=r'\s+', header=None, skiprows=int(skip_header), comment=comment)
+    if all(np.issubdtype(i, np.number) for i in table.dtypes):
+        return table.to_numpy(float)
+    return table.to_numpy()
+
+
+def drop_empty_columns(table):
+    # Removes the columns in which every value is NaN
+    empty = np.array([pd.isna(table[:, k]).all() for k in range(table.shape[1])], dtype=bool)
+    return table[:, ~empty], ~empty
+
+
+def mid_month(time):
+    # Sets the day of every date (datetime64) to the 15th of its month
+    return time.astype('datetime64[M]').astype('datetime64[D]') + np.timedelta64(14, 'D')
+
+
+def get_month_number(date):
+    # Month index (see Container.month_number) of a date
+    return date.year * 12 + date.month
+
+
+def format_month_number(number):
+    return str((number - 1) // 12) + '-' + str((number - 1) % 12 + 1).zfill(2)
+
+
+def find_month(month_number, number):
+    # Index of the month index number in the sorted array month_number, None if the month is not in it
+    k = np.searchsorted(month_number, number)
+    if k < len(month_number) and month_number[k] == number:
+        return int(k)
+    return None
+
+
 def get_enso_lag(enso, enso_lag, date_start, date_end):
     # Function to get the ENSO data with 1 year prior and 1 year after the actual time series
     # If the actual time series ends or start without 1 year puffer to ENSO, take the rest of the ENSO data and
     # combine it with the last year of the data
-    for k, i in enumerate(enso.time):
-        if i.year == date_start.year and i.month == date_start.month:
-            ind_start = k
-    for k, i in enumerate(enso.time):
-        if i.year == date_end.year and i.month == date_end.month:
-            ind_end = k
-            break
-        else:
-            ind_end = len(enso.time)
+    ind_start = find_month(enso.month_number, get_month_number(date_start))
+    ind_end = find_month(enso.month_number, get_month_number(date_end))
+    if ind_end is None:
+        ind_end = len(enso.month_number)
 
     if ind_start-12 < 0:
         dif_start = abs(ind_start-12)
@@ -1997,45 +547,60 @@ def get_enso_lag(enso, enso_lag, date_start, date_end):
     return enso
 
 
+@timed('time overlap')
 def get_proxy_time_overlap(ini, proxies, data):
-    # Create a copy of the data and proxies that will get overwritten
-    new_data = copy.deepcopy(data)
-    new_proxies = copy.deepcopy(proxies)
+    # Create shallow copies of the data and proxies. The arrays are shared with the originals, the copies only get
+    # views of them and the indices of the overlapping time (date_start and date_end), so nothing may be changed in place
+    new_data = copy.copy(data)
+    new_proxies = [copy.copy(i) for i in proxies]
 
-    new_data.time = np.array([date.replace(day=15) for date in data.time])
+    # The times are compared by their month index (see Container.month_number)
+    months = new_data.month_number
 
     # Load dates when calculation should start or else use the first and last date of the data time series
     if 'start_date' in ini:
-        date_start = dt.datetime.strptime(ini['start_date'], '%Y-%m').date().replace(day=15)
-        if date_start < new_data.time[0]:
-            date_start = new_data.time[0]
+        date_start = get_month_number(dt.datetime.strptime(ini['start_date'], '%Y-%m').date())
+        if date_start < months[0]:
+            date_start = months[0]
     else:
-        date_start = new_data.time[0]
+        date_start = months[0]
 
     for i in new_proxies:
-        if date_start < np.array(i.time)[0]:
-            date_start = np.array(i.time)[0]
+        if date_start < i.month_number[0]:
+            date_start = i.month_number[0]
 
     if 'end_date' in ini:
-        date_end = dt.datetime.strptime(ini['end_date'], '%Y-%m').date().replace(day=15)
-        if date_end > new_data.time[-1]:
-            date_end = new_data.time[-1]
+        date_end = get_month_number(dt.datetime.strptime(ini['end_date'], '%Y-%m').date())
+        if date_end > months[-1]:
+            date_end = months[-1]
             # raise Exception('The input for the end date of the trend calculation is later than the last date of the time series.')
     else:
-        date_end = new_data.time[-1]
+        date_end = months[-1]
 
     for i in new_proxies:
-        if date_end > np.array(i.time)[-1] and i.method != 0:
-            date_end = np.array(i.time)[np.max(np.where(np.isin(np.array(i.time), new_data.time))[0])]
-
-    new_data.date_start = np.where(new_data.time == date_start)[0][0]
-    new_data.date_end = np.where(new_data.time == date_end)[0][0] + 1
-
+        if date_end > i.month_number[-1] and i.method != 0:
+            date_end = np.intersect1d(i.month_number, months)[-1]
+
+    if date_end < date_start:
+        raise Exception('The time series of the data and the proxies do not overlap.')
+    new_data.date_start = find_month(months, date_start)
+    new_data.date_end = find_month(months, date_end)
+    if new_data.date_start is None or new_data.date_end is None:
+        raise Exception('The first and last month of the overlap with the proxies (' + format_month_number(date_start) + ' and ' + format_month_number(date_end) + ') have to be in the time series of the data.')
+    new_data.date_end += 1
+
+    # Rows of every proxy at the months of the data. Slices of the proxies (views) if the rows follow each other
+    data_months = months[new_data.date_start:new_data.date_end]
     for i in new_proxies:
         if i.method == 0:
             continue
-        i.data = i.data[np.where(i.time == new_data.time[new_data.date_start])[0][0]:np.where(i.time == new_data.time[new_data.date_end - 1])[0][0] + 1]
-        i.time = i.time[np.where(i.time == new_data.time[new_data.date_start])[0][0]:np.where(i.time == new_data.time[new_data.date_end - 1])[0][0] + 1]
+        rows = np.minimum(np.searchsorted(i.month_number, data_months), len(i.month_number) - 1)
+        if not np.array_equal(i.month_number[rows], data_months):
+            raise Exception('The proxy ' + i.name + ' has no values for every month of the data between ' + format_month_number(date_start) + ' and ' + format_month_number(date_end) + '.')
+        if rows[-1] - rows[0] == len(rows) - 1:
+            rows = slice(rows[0], rows[-1] + 1)
+        i.data = i.data[rows]
+        i.months = i.months[rows]
     # for k, i in enumerate(new_proxies):
     #     if 'Nino' in i.name or 'ENSO' in i.name:
     #         # Shift the data of ENSO to incorporate the lag of the enso impact for the ozone
@@ -2048,7 +613,9 @@ def get_proxy_time_overlap(ini, proxies, data):
     return new_data, new_proxies
 
 
+@timed('time overlap')
 def set_data_limits(data, ini):
+    # Limits the dimensions of the data with views of the arrays, the slices are kept in data.limits
     slices = []
 
     for k, dim in enumerate(data.dim_array):
@@ -2057,6 +624,7 @@ def set_data_limits(data, ini):
         else:
             limits = ini.get('additional_var_' + str(k + 1) + '_limit', None)
             if not limits:
+                slices.append(slice(None))
                 continue
             elif ',' in limits:
                 min, max = list(map(int, ini.get('additional_var_' + str(k + 1) + '_limit', None).split(",")))
@@ -2068,44 +636,135 @@ def set_data_limits(data, ini):
                 setattr(data, dim, [getattr(data, dim)[limits]])
 
     data.o3 = data.o3[tuple(slices)]
+    data.limits = tuple(slices)
     return data
 
 
-def convert_to_datetime(time, ini=None):
+def convert_to_datetime(time, ini=None, units=None):
     # Converting every possible time to datetime
+    format = ini.get('time_format', None) if ini is not None else None
+    if not format and not (units and ' since ' in units):
+        print_info('There was no time format given. The IUP Regression Model will try to find a working format. Please check if the date is shown correctly afterwards.')
 
-    try:
-        format = ini.get('time_format', None)
+    return decode_time(time, format=format, units=units).astype(object)
+
+
+# Seconds per unit of the CF time units ("days since 1970-01-01")
+cf_time_units = {'day': 86400, 'hour': 3600, 'minute': 60, 'second': 1}
+
+
+def decode_time(values, format=None, month=None, units=None):
+    # Decodes a whole array of times to numpy.datetime64[D]. The format is detected once for the whole array instead of
+    # once per value: year and month pairs (month given, the day is set to 15), CF units (e.g. "days since 1970-01-01"),
+    # YYYYMM, YYYYMMDD, fractional years and strings like 1997-01 or 1997_01_15. Arrays that don't fit one of these
+    # formats are parsed value by value with parse_time
+    values = np.asarray(np.ma.getdata(values))
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+
+    time = None
+    if month is not None:
+        time = time_from_ymd(values.astype(float).astype(np.int64), np.asarray(np.ma.getdata(month)).astype(float).astype(np.int64), 15)
+    elif units and ' since ' in units:
+        time = decode_cf_time(values, units)
+    else:
         if format:
-            if np.issubdtype(time.dtype, 'O') or np.issubdtype(time.dtype, str):
-                time = np.array([dt.datetime.strptime(str(x), format).date() for x in time])
-            elif (time.astype(int) == time).all():
-                time = np.array([dt.datetime.strptime(str(int(x)), format).date() for x in time])
-            elif np.issubdtype(time.dtype, np.datetime64):
-                time = pd.to_datetime(time)
-            else:
-                time = pd.Series(time).apply(lambda index: parse_time(index, format=format))
-        else:
-            print('There was no time format given. The IUP Regression Model will try to find a working format. Please check if the date is shown correctly afterwards.')
-            time = pd.Series(time).apply(parse_time)
+            time = decode_time_format(values, format)
+            if time is None:
+                print_info('The format did not work with the loaded time data. The IUP Regression Model will try to find a working format. Please check if the date is shown correctly afterwards.')
+        if time is None:
+            time = detect_time_format(values)
+
+    if time is None:
+        time = np.array([parse_time(value, month=None if month is None else month[k]) for k, value in enumerate(values)], dtype='datetime64[D]')
+    return time
+
+
+def time_from_ymd(year, month, day):
+    # Builds datetime64[D] from arrays of years, months and days with integer arithmetic. Returns None for invalid dates
+    year, month, day = np.broadcast_arrays(np.asarray(year, dtype=np.int64), np.asarray(month, dtype=np.int64), np.asarray(day, dtype=np.int64))
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    time = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    # Months or days that are out of range would roll over into the next month
+    if ((month < 1) | (month > 12) | (day < 1) | (time.astype('datetime64[M]') != months)).any():
+        return None
+    return time
+
+
+def decode_time_format(values, format):
+    # Decodes the values with a strptime format in one call
+    if values.dtype.kind in 'fi' and (values == np.round(values)).all():
+        values = values.astype(np.int64)
+    try:
+        return pd.to_datetime(pd.Series(values.astype(str)), format=format).to_numpy().astype('datetime64[D]')
+    except (ValueError, TypeError):
+        return None
+
+
+def detect_time_format(values):
+    # Detects the format of the whole array, returns None if the values don't share one format
+    if values.dtype.kind in 'OUS':
+        strings = pd.Series(values.astype(str)).str.strip()
+        parts = strings.str.extract(r'^(\d{4})[-_/](\d{1,2})(?:[-_/](\d{1,2}))?$')
+        if parts[0].notna().all():
+            return time_from_ymd(parts[0].astype(int).to_numpy(), parts[1].astype(int).to_numpy(), parts[2].fillna('1').astype(int).to_numpy())
+        values = pd.to_numeric(strings, errors='coerce').to_numpy()
+
+    values = values.astype(float)
+    if not len(values) or np.isnan(values).any():
+        return None
+
+    if (values == np.floor(values)).all():
+        values = values.astype(np.int64)
+        # Integer format with year and month (e.g., 199701)
+        if ((values >= 100000) & (values < 1000000)).all():
+            return time_from_ymd(values // 100, values % 100, 1)
+        # Integer format with year, month, and day (e.g., 19970101)
+        if ((values >= 10000000) & (values < 100000000)).all():
+            return time_from_ymd(values // 10000, values // 100 % 100, values % 100)
+        return None
+
+    # Fractional year (e.g., 1997.0145)
+    if ((values >= 1000) & (values < 10000)).all():
+        year = np.floor(values).astype(np.int64)
+        start_of_year = time_from_ymd(year, 1, 1)
+        days_in_year = (time_from_ymd(year + 1, 1, 1) - start_of_year).astype(np.int64)
+        # Rounded to microseconds like datetime.timedelta, before the time of the day is cut off
+        days = np.floor(np.round((values - year) * days_in_year * 86400e6) / 86400e6).astype(np.int64)
+        return start_of_year + days.astype('timedelta64[D]')
+    return None
+
+
+def decode_cf_time(values, units):
+    # Decodes CF times ("<days/hours/minutes/seconds> since <date>"), returns None for other units
+    unit, reference = units.split(' since ', 1)
+    unit = unit.strip().lower().rstrip('s')
+    if unit not in cf_time_units:
+        return None
+    try:
+        reference = pd.Timestamp(reference.strip()).to_datetime64().astype('datetime64[s]')
+    except ValueError:
+        return None
+    seconds = np.round(values.astype(float) * cf_time_units[unit]).astype(np.int64)
+    return (reference + seconds.astype('timedelta64[s]')).astype('datetime64[D]')
 
-    except:
-        time = pd.Series(time).apply(lambda index: parse_time(index, format=format))
 
-    return np.array(time)
+def to_datetime64(time):
+    # Converts dates (datetime.date objects, pandas or numpy times) to datetime64[D]. Date objects are converted over their
+    # ordinal, which is much faster than numpy's conversion of object arrays
+    time = np.asarray(time)
+    if time.dtype == object:
+        return (np.fromiter((i.toordinal() for i in time), dtype=np.int64, count=len(time)) - dt.date(1970, 1, 1).toordinal()).astype('datetime64[D]')
+    return time.astype('datetime64[D]')
 
 
 def convert_datetime_to_fractional(time):
-    frac_array = np.empty(len(time))
-    for k, i in enumerate(time):
-        datetime_var = dt.datetime(i.year, i.month, i.day)
-        year = datetime_var.year
-        start_of_year = dt.datetime(year, 1, 1)
-        next_year = dt.datetime(year + 1, 1, 1)
-        total_seconds = (datetime_var - start_of_year).total_seconds()
-        total_seconds_next_year = (next_year - start_of_year).total_seconds()
-        frac_array[k] = year + total_seconds / total_seconds_next_year
-    return frac_array
+    # Converts an array of dates to fractional years, with the days since the start of the year divided by the days of the year
+    time = to_datetime64(time)
+    year = time.astype('datetime64[Y]')
+    start_of_year = year.astype('datetime64[D]')
+    days_in_year = ((year + 1).astype('datetime64[D]') - start_of_year).astype(float)
+    return year.astype(np.int64) + 1970 + (time - start_of_year).astype(float) / days_in_year
 
 
 def parse_time(value, month=None, format=None):
@@ -2119,7 +778,7 @@ def parse_time(value, month=None, format=None):
         try:
             dt.datetime.strptime(value, format).date()
         except:
-            print('The format did not work with the loaded time data. The IUP Regression Model will try to find a working format. Please check if the date is shown correctly afterwards.')
+            print_info('The format did not work with the loaded time data. The IUP Regression Model will try to find a working format. Please check if the date is shown correctly afterwards.')
 
     # Convert value to string
     if float(value) - int(value) == 0:
@@ -2220,28 +879,168 @@ def averaging_window_text_check(input):
         return 0
 
 
-def load_default_proxies(ini):
-    path = ini['proxy_path']
+@timed('averaging')
+def average_time_windows(arr, time, check, month_index, skip_percentage):
+    # Averages an array (time, ...) with NaNs for missing values over the averaging window for all other dimensions at once.
+    # The time axis is reshaped into (year, month): for yearly means (check 1) by the year and month of each time step and
+    # for certain months (check 2) in blocks of 12 time steps, starting with the first one.
+    # Windows in which the share of values that are neither 0 nor NaN is not above skip_percentage are set to NaN
+    arr = arr[:len(time)]
+    year_index = np.unique(time.year, return_inverse=True)[1].ravel()
+    n_years = year_index.max() + 1
+    if check == 1:
+        slot = year_index * 12 + np.array(time.month) - 1
+    else:
+        slot = np.arange(len(time))
+    inside = slot < n_years * 12
+
+    grid = np.full((n_years * 12,) + arr.shape[1:], np.nan)
+    grid[slot[inside]] = arr[inside]
+    grid = grid.reshape((n_years, 12) + arr.shape[1:])
+
+    # Time steps that are part of a window
+    selected = np.zeros(n_years * 12, dtype=bool)
+    if check == 1:
+        selected[slot] = True
+        window_size = np.sum(selected.reshape(n_years, 12), axis=1)
+    else:
+        selected[slot[inside]] = np.isin(np.array(time.month)[inside], month_index)
+        window_size = np.full(n_years, len(month_index))
+    selected = selected.reshape((n_years, 12) + (1,) * (arr.ndim - 1))
+    window_size = window_size.reshape((n_years,) + (1,) * (arr.ndim - 1))
+
+    valid = selected & ~np.isnan(grid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.sum(np.where(valid, grid, 0), axis=1) / np.sum(valid, axis=1)
+        coverage = np.sum(valid & (grid != 0), axis=1) / window_size
+
+    return np.where(coverage <= skip_percentage, np.nan, mean)
+
+
+def calc_climatology(arr, months=None):
+    # Climatology of an array (time, ...) with NaNs for missing values. With the month (1 to 12) of every time step it's
+    # the mean of every month (12, ...), without it the mean over the whole time axis (1, ...)
+    if months is None:
+        return np.nanmean(arr, axis=0, keepdims=True)
+    climatology = np.full((12,) + arr.shape[1:], np.nan)
+    for k in range(12):
+        if np.any(months == k + 1):
+            climatology[k] = np.nanmean(arr[months == k + 1], axis=0)
+    return climatology
+
+
+def calc_anomaly(arr, climatology, months=None, method='rel'):
+    # Absolute ("abs") or relative ("rel") anomalies of an array (time, ...) to its climatology (see calc_climatology)
+    clim = climatology if months is None else climatology[np.asarray(months) - 1]
+    if method == 'abs':
+        return arr - clim
+    return (arr - clim) / clim
+
+
+@timed('anomalies')
+def calc_anomalies(data, ini):
+    # Converts the ozone data (between date_start and date_end, if they are set) to anomalies and returns the climatology.
+    # Monthly data gets a monthly climatology, averaged data (see averaging_window) a single mean.
+    # Can also be used without calculating trends:
+    # climatology = calc_anomalies(data, ini)
+    time_slice = slice(getattr(data, 'date_start', None), getattr(data, 'date_end', None))
+    arr = np.ma.filled(data.o3[time_slice].astype(float), np.nan)
+    months = None
+    if averaging_window_text_check(ini.get('averaging_window', '')) == 0:
+        months = data.month_of_year[time_slice]
+
+    climatology = calc_climatology(arr, months)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        data.o3 = np.ma.masked_invalid(data.o3)
+        data.o3[time_slice] = np.ma.masked_invalid(calc_anomaly(arr, climatology, months, ini.get('anomaly_method', 'rel')))
+
+    return climatology
+
+
+def get_proxy_cache_file(ini, paths, options):
+    # File of the parsed proxies in the proxy cache, named after the first file and a hash of the paths, their modification
+    # times and sizes and the parsing options, so that a changed file or option gets a new entry
+    key = [ver] + [os.path.abspath(i) + ' ' + str(os.stat(i).st_mtime_ns) + ' ' + str(os.stat(i).st_size) for i in paths]
+    key += [i + ' = ' + str(options[i]) for i in sorted(options)]
+    name = os.path.basename(paths[0]).split('.')[0] + '_' + hashlib.sha1('\n'.join(key).encode()).hexdigest()[:16] + '.npz'
+    return os.path.join(ini['proxy_cache_path'], name)
+
+
+def save_proxy_cache(cache_file, proxies):
+    # Saves the data, time and tag values of the proxies as arrays and everything else as JSON, without pickled objects
+    arrays = {}
+    meta = []
+    for k, i in enumerate(proxies):
+        arrays['data_' + str(k)] = np.asarray(i.data, dtype=float)
+        arrays['time_' + str(k)] = mid_month(i.months)
+        tag = getattr(i, 'tag', None)
+        if tag:
+            arrays['tag_' + str(k)] = np.ma.filled(np.asarray(getattr(i, tag), dtype=float), np.nan)
+        meta.append({'name': i.name, 'tag': tag, 'source': None if getattr(i, 'source', None) is None else [j.item() if isinstance(j, np.generic) else j for j in i.source]})
+    arrays['meta'] = np.array(json.dumps(meta))
+
+    # Written under another name first, so that a stopped run doesn't leave a broken file behind
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    np.savez(cache_file + '.tmp.npz', **arrays)
+    os.replace(cache_file + '.tmp.npz', cache_file)
+
+
+def load_proxy_cache(cache_file):
+    proxies = []
+    with np.load(cache_file, allow_pickle=False) as f:
+        for k, i in enumerate(json.loads(str(f['meta']))):
+            proxy = Proxy(i['name'])
+            proxy.data = f['data_' + str(k)]
+            proxy.time = f['time_' + str(k)]
+            if i['tag']:
+                setattr(proxy, i['tag'], f['tag_' + str(k)])
+                proxy.tag = i['tag']
+            if i['source'] is not None:
+                proxy.source = i['source']
+            proxies.append(proxy)
+    return proxies
+
+
+def load_cached_proxies(ini, paths, options, read):
+    # Returns the proxies that read() parses from the files in paths. With proxy_cache_path in the config.ini the parsed
+    # proxies are saved in the cache and read from it as long as the files and the parsing options stay the same
+    if not ini.get('proxy_cache_path'):
+        return read()
+    cache_file = get_proxy_cache_file(ini, paths, options)
+    if os.path.exists(cache_file):
+        try:
+            return load_proxy_cache(cache_file)
+        except (OSError, ValueError, KeyError):
+            pass
+    proxies = read()
+    save_proxy_cache(cache_file, proxies)
+    return proxies
+
+
+def read_default_proxies(proxy_path, aod_path):
+    # Parses the table of the default proxies and the AOD table (paths relative to this module) into proxies
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), proxy_path)
     # NEEDS TO BE MORE FLEXIBLE
     format = '%Y%m'
 
-    proxy_raw = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), path), sep='\s+', index_col=0)
-    proxy_raw.dropna(axis=1, how='all', inplace=True)
-    proxy_raw.index = proxy_raw.index.to_series().apply(parse_time)
-    proxy_raw = proxy_raw.drop('Month', axis=1)
+    # The first column of the table is the time, the header has the names of the columns
+    with open(path, 'r') as f:
+        names = f.readline().split()
+    table, keep = drop_empty_columns(read_table(path, 1))
+    names = [i for k, i in enumerate(names) if keep[k]]
+    time = decode_time(table[:, 0])
+    month = names.index('Month') if 'Month' in names else None
 
     # Convert raw data to the proxy class
-    proxy_list = proxies_to_class(proxy_raw)
+    proxy_list = proxies_to_class([i for k, i in enumerate(names) if k not in (0, month)], time, table[:, [k for k in range(1, len(names)) if k != month]])
 
     # Load AOD data
-    path = ini['aod_path']
     aod = Proxy('AOD')
 
-    aod_data = np.genfromtxt(os.path.join(os.path.dirname(os.path.abspath(__file__)), path), skip_header=1)
+    aod_data = read_table(os.path.join(os.path.dirname(os.path.abspath(__file__)), aod_path), 1)
     try:
-        aod.time = pd.Series([dt.datetime.strptime(str(int(date)), format).date() for date in aod_data[:, 0]])     # str(int(date)) is not perfect and should be improved upon
-        aod.time = aod.time.apply(lambda dt: dt.replace(day=15))
-    except:
+        aod.time = decode_time(aod_data[:, 0], format=format)
+    except ValueError:
         raise Exception(
             'The time format is not correct. Please follow the datetime format: hhttps://docs.python.org/3/library/datetime.html#strftime-and-strptime-behavior\nFor exammple "%Y-%M-%d" for the date format "2012-01-17"')
 
@@ -2252,6 +1051,14 @@ def load_default_proxies(ini):
     proxy_list.append(aod)
     proxy_list[-1].tag = 'lat'
 
+    return proxy_list
+
+
+@timed('loading proxies')
+def load_default_proxies(ini):
+    module_path = os.path.dirname(os.path.abspath(__file__))
+    proxy_list = load_cached_proxies(ini, [os.path.join(module_path, ini['proxy_path']), os.path.join(module_path, ini['aod_path'])], {}, lambda: read_default_proxies(ini['proxy_path'], ini['aod_path']))
+
     if int(ini.get('default_proxy_limit', 0)) == 1:
         proxy_list = default_boundary_settings(proxy_list)
 
@@ -2265,32 +1072,23 @@ def load_default_proxies(ini):
     return proxy_list
 
 
-def load_add_proxy_file(ini, prox_num):
-    files = ini.get('additional_proxy_path', None)
-    file = ini.get('additional_proxy_path', None)[prox_num]
-    if not file:
-        print('No additional proxy files found.')
-        return None
-
-    time_col = ini.get('additional_proxy_time_col', [0] * len(files))[prox_num]
+def read_add_proxy_file(file, options):
+    # Parses an additional proxy file (text table or netCDF) into a proxy, see load_add_proxy_file for the options
+    time_col = options['time_col']
     # Check for a split date, year and month
     if ',' in time_col:
         month_col = list(map(str.strip, time_col.split(',')))[1]
         time_col = list(map(str.strip, time_col.split(',')))[0]
     else:
         month_col = None
-    proxy_name = ini.get('additional_proxy_name', [None] * len(files))[prox_num]
-    proxy_col = ini.get('additional_proxy_data_col', [1] * len(files))[prox_num]
-    method = ini.get('additional_proxy_method', [int(ini.get('default_proxy_method', 1))] * len(files))[prox_num]
-    seas = ini.get('additional_proxy_seas_comp', [int(ini.get('default_seasonal_component', 2))] * len(files))[prox_num]
-    format = ini.get('additional_proxy_time_format', ['%Y%m'] * len(files))[prox_num]
-    header_size = ini.get('additional_proxy_header_size', [0] * len(files))[prox_num]
-    tag = ini.get('additional_proxy_tag', [False] * len(files))[prox_num]
-    tag_values = ini.get('additional_proxy_tag_array', [False] * len(files))[prox_num]
+    proxy_col = options['proxy_col']
+    format = options['format']
+    tag = options['tag']
+    tag_values = options['tag_values']
 
     # Trying to get the proxy name by using the file name
-    if proxy_name:
-        name = proxy_name
+    if options['name']:
+        name = options['name']
     else:
         name = file.split('/')[-1].split('.')[0]
     proxy = Proxy(name)
@@ -2301,50 +1099,75 @@ def load_add_proxy_file(ini, prox_num):
         dependencies = dataset.variables[proxy_col].dimensions
 
         if month_col:
-            time = pd.Series([parse_time(year, format=format, month=month) for year, month in zip(dataset.variables[time_col][:], dataset.variables[month_col][:])])
+            time = decode_time(dataset.variables[time_col][:], format=format, month=dataset.variables[month_col][:])
         else:
-            time = pd.Series([parse_time(year, format=format, month=None) for year in dataset.variables[time_col][:]])
+            time = decode_time(dataset.variables[time_col][:], format=format)
         setattr(proxy, 'time', time)
         if len(dependencies) >= 2:
             setattr(proxy, tag, dataset.variables[dependencies[dependencies.index(tag_values)]][:])
             setattr(proxy, 'tag', tag)
+        dataset.close()
 
     else:
-        proxy_raw = pd.read_csv(file, comment=ini.get('comment_symbol', None), sep='\s+', header=None, skiprows=int(header_size))
-        proxy_raw.dropna(axis=1, how='all', inplace=True)
-        proxy_raw.index = np.array(proxy_raw)[:, int(time_col)]
+        proxy_raw = drop_empty_columns(read_table(file, options['header_size'], options['comment']))[0]
         if month_col:
-            proxy_raw.index = pd.Series([parse_time(year, format=format, month=month)for year, month in zip(proxy_raw.index.to_series(), pd.Series(np.array(proxy_raw)[:, month_col]))])
+            time = decode_time(proxy_raw[:, int(time_col)], format=format, month=proxy_raw[:, int(month_col)])
         else:
-            proxy_raw.index = pd.Series([parse_time(year, format=format, month=None) for year in proxy_raw.index.to_series()])
+            time = decode_time(proxy_raw[:, int(time_col)], format=format)
 
         if tag:
             tag_values = list(map(float, tag_values.split(',')))
             if len(tag_values) == 3:
                 # Create an array depending on the three tag value inputs
                 tag_values = np.arange(tag_values[0], tag_values[1] + tag_values[2], tag_values[2])
-            proxy_data = np.array(proxy_raw)[:, int(proxy_col):]
+            proxy_data = proxy_raw[:, int(proxy_col):]
             setattr(proxy, tag, tag_values)
             setattr(proxy, 'tag', tag)
         else:
-            proxy_data = np.array(proxy_raw)[:, int(proxy_col)]
+            proxy_data = proxy_raw[:, int(proxy_col)]
 
-        proxy.time = pd.Series(proxy_raw.index).apply(lambda dt: dt.replace(day=15))
+        proxy.time = time
         proxy.data = proxy_data
         proxy.source = [file, proxy_col]
-        proxy.method = method
-        proxy.seas_comp = seas
 
     # If the proxy data is 2 dimensional, reshape the data so the time dimensions is the first
-    time_dim_index = proxy.data.shape.index(proxy.time.size)
+    time_dim_index = proxy.data.shape.index(len(proxy.months))
     if time_dim_index != 0:
         new_order = [time_dim_index] + [i for i in range(proxy.data.ndim) if i != time_dim_index]
         proxy.data = np.transpose(proxy.data, axes=new_order)
-    proxy.time = proxy.time.apply(lambda dt: dt.replace(day=15))
 
     return proxy
 
 
+def load_add_proxy_file(ini, prox_num):
+    files = ini.get('additional_proxy_path', None)
+    file = ini.get('additional_proxy_path', None)[prox_num]
+    if not file:
+        print('No additional proxy files found.')
+        return None
+
+    options = {
+        'time_col': ini.get('additional_proxy_time_col', [0] * len(files))[prox_num],
+        'proxy_col': ini.get('additional_proxy_data_col', [1] * len(files))[prox_num],
+        'format': ini.get('additional_proxy_time_format', ['%Y%m'] * len(files))[prox_num],
+        'header_size': ini.get('additional_proxy_header_size', [0] * len(files))[prox_num],
+        'tag': ini.get('additional_proxy_tag', [False] * len(files))[prox_num],
+        'tag_values': ini.get('additional_proxy_tag_array', [False] * len(files))[prox_num],
+        'name': ini.get('additional_proxy_name', [None] * len(files))[prox_num],
+        'comment': ini.get('comment_symbol', None),
+    }
+    method = ini.get('additional_proxy_method', [int(ini.get('default_proxy_method', 1))] * len(files))[prox_num]
+    seas = ini.get('additional_proxy_seas_comp', [int(ini.get('default_seasonal_component', 2))] * len(files))[prox_num]
+
+    proxy = load_cached_proxies(ini, [file], options, lambda: [read_add_proxy_file(file, options)])[0]
+    if not file.endswith('.nc'):
+        proxy.method = method
+        proxy.seas_comp = seas
+
+    return proxy
+
+
+@timed('loading proxies')
 def load_additional_proxies(proxies, ini):
     if 'additional_proxy_path' not in ini:
         return proxies
@@ -2371,6 +1194,7 @@ def predict_alt_unit(alt):
         return 'hPa'
 
 
+@timed('loading data')
 def load_netCDF(filename, ini):
     try:
         dataset = nc.Dataset(filename, 'r')
@@ -2384,33 +1208,42 @@ def load_netCDF(filename, ini):
         except:
             data = Dataset('New Dataset')
 
-        # Getting the ozone data from the netCDF file
+        # Getting the ozone data from the netCDF file. It's only read when it's needed if the data is calculated in slabs
         try:
-            setattr(data, 'o3', group.variables[ini.get('o3_var')][:])
+            if ini.get('slab_size') or ini.get('memory_budget'):
+                setattr(data, 'o3', group.variables[ini.get('o3_var')])
+            else:
+                setattr(data, 'o3', group.variables[ini.get('o3_var')][:])
         except:
             raise Exception('Loading the variable names from the netCDF file was not successful.')
 
         # Getting the variables that the ozone data depends on with either the exact variable names or the ones provided by the user (e.g. "time" to "date" or something similar)
         dependencies = group.variables[ini['o3_var']].dimensions
+        time_units = None
+        raw_time = None
         for k, i in enumerate(dependencies):
             if k == int(ini.get('time_dim', 1)) - 1:
                 if ',' in ini.get('time_var', 'time'):
                     # With two variable names in the config.ini, both will be read and combined as strings (year-month)
                     months = np.array(group.variables[list(map(str, ini.get('time_var', 'time').split(',')))[1]][:], dtype=str)
                     years = np.array(group.variables[list(map(str, ini.get('time_var', 'time').split(',')))[0]][:], dtype=str)
-                    setattr(data, 'time', years + '-' + months)
+                    raw_time = years + '-' + months
                 else:
-                    setattr(data, 'time', group.variables[ini.get('time_var', 'time')][:])
+                    raw_time = group.variables[ini.get('time_var', 'time')][:]
+                    time_units = getattr(group.variables[ini.get('time_var', 'time')], 'units', None)
             else:
                 setattr(data, i, group.variables[ini.get('additional_var_' + str(k + 1) + '_index', i)][:])
                 setattr(data, i + '_unit', ini.get('additional_var_' + str(k + 1) + '_unit', ''))
                 setattr(data, i + '_tag', ini.get('additional_var_' + str(k + 1) + '_tag', ''))
 
         new_order = [int(ini.get('time_dim', 1)) - 1] + [i for i in range(len(dependencies)) if i != int(ini.get('time_dim', 1)) - 1]
-        data.o3 = np.transpose(data.o3, axes=new_order)
-        data.o3 = np.ma.masked_invalid(data.o3)
+        if isinstance(data.o3, nc.Variable):
+            data.o3 = LazyCube(filename, group_name, ini.get('o3_var'), new_order)
+        else:
+            data.o3 = np.transpose(data.o3, axes=new_order)
+            data.o3 = np.ma.masked_invalid(data.o3)
         data.dim_array = [dependencies[i] for i in new_order]
-        data.time = convert_to_datetime(data.time, ini)
+        data.time = convert_to_datetime(raw_time, ini, time_units)
         data.time_format = ini.get('time_format', '%Y%m')
 
         dataset.close()
@@ -2421,86 +1254,199 @@ def load_netCDF(filename, ini):
         return None
 
 
-def save_netCDF(current_data, trends, signi, diagnostic, ini):
-        # Open a file dialog to select the save location
-        # save_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "NetCDF Files (*.nc)")
-        if 'save_folder_path' not in ini:
-            save_path = 'Trends_' + current_data.name
-        else:
-            save_path = ini['save_folder_path'] + '/Trends_' + current_data.name
-
-        data = current_data
-        # If a path was selected, save the file
-        if save_path:
-            lat = data.lat
-            alt = data.lev
-            lon = data.lon
-            dims = data.dim_array
-
-            with nc.Dataset(save_path + '.nc', 'w') as f:
-                if lat is not None:
-                    f.createDimension('lat', len(lat))
-                    lat_var = f.createVariable('lat', 'f8', ('lat',))
-                    lat_var[:] = lat
-                    lat_var.units = 'degrees_north'
-                    lat_var.long_name = 'latitude'
-                if lon is not None:
-                    f.createDimension('lon', len(lon))
-                    lon_var = f.createVariable('lon', 'f8', ('lon',))
-                    lon_var[:] = lon
-                    lon_var.units = 'degrees_east'
-                    lon_var.long_name = 'longitude'
-                if alt is not None:
-                    f.createDimension('alt', len(alt))
-                    alt_var = f.createVariable('alt', 'f8', ('alt',))
-                    alt_var[:] = alt
-                    alt_var.units = 'km'
-                    alt_var.long_name = 'altitude'
-
-                max_length = max(len(s) for s in diagnostic[3])
-                f.createDimension('n_coefficients', len(diagnostic[3]))
-                f.createDimension('string_length', max_length)
-                f.createDimension('time', len(diagnostic[4]))
-                f.createDimension('infl', 2)
-
-                ind_var = f.createVariable('independent_variable_names', 'str', ('n_coefficients',))
-                ind_var[:] = np.array(diagnostic[3])
-
-                time_var = f.createVariable('date', 'S10', 'time', compression="zlib")
-                time_var.unit = 'YYYYMMDD'
-                frac_var = f.createVariable('fractional_year', 'f4', ('time',), compression="zlib")
-
-                dim_tuple = tuple(dim_name for dim_name in dims)
-                X_var = f.createVariable('independent_variable_matrix', 'f4', dim_tuple + ('n_coefficients',), compression="zlib")
-                X_var[:] = diagnostic[0]
-                beta_var = f.createVariable('beta', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
-                beta_var[:] = diagnostic[2]
-                covb_var = f.createVariable('beta_uncertainty', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
-                covb_var[:] = diagnostic[3]
-
-                if len(trends.shape) == len(dim_tuple):
-                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:] + ('infl',), compression="zlib")
-                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:] + ('infl',), compression="zlib")
-                else:
-                    trend_var = f.createVariable('trend', 'f4', dim_tuple[1:], compression="zlib")
-                    sig_var = f.createVariable('trend_uncertainty', 'f4', dim_tuple[1:], compression="zlib")
-                trend_var[:] = trends
-                sig_var[:] = signi
+# Settings that only change how the model runs, not its results. They are not saved in the output files, so that a
+# resumed or parallel run writes the same file as a single run
+run_settings = ['engine', 'batch_size', 'jobs', 'cache_path', 'cache_size', 'proxy_cache_path', 'slab_size', 'memory_budget', 'checkpoint', 'resume', 'timing', 'profile', 'quiet']
 
-                X_var.long_name = 'Independent Variable matrix'
-                beta_var.long_name = 'Fit Parameters'
 
-                frac_year = convert_datetime_to_fractional(diagnostic[4])
+def get_save_path(current_data, ini):
+    if 'save_folder_path' not in ini:
+        return 'Trends_' + current_data.name + '.nc'
+    return ini['save_folder_path'] + '/Trends_' + current_data.name + '.nc'
 
-                time_int = np.array([str_time.strftime('%Y-%m-%d') for str_time in diagnostic[4]])
-                time_var[:] = time_int
-                frac_var[:] = frac_year
 
-                f.program = 'IUP_regression_model'
-                f.version = ver
-                f.contact = '''Name: Brian Auffarth\rAffiliation: University of Bremen\rE-mail: brian@iup.physik.uni-bremen.de'''
-                f.date_of_creation = dt.datetime.today().strftime('%Y-%m-%d')
-                f.configuration_settings = "\n".join([f"{key} = {value}" for key, value in ini.items()])
+def get_configuration_settings(ini):
+    return "\n".join([f"{key} = {value}" for key, value in ini.items() if key not in run_settings])
+
+
+def save_netCDF(current_data, trends, signi, diagnostic, ini):
+    # Open a file dialog to select the save location
+    # save_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "NetCDF Files (*.nc)")
+    save_path = get_save_path(current_data, ini)
+
+    # If a path was selected, save the file
+    if save_path:
+        create_netCDF(save_path, current_data, trends, diagnostic, ini)
+        write_netCDF_slab(save_path, (), trends, signi, diagnostic, ini)
+
+
+@timed('writing output')
+def create_netCDF(save_path, current_data, trends, diagnostic, ini):
+    # Creates the output file with every dimension, the time axis and the names of the coefficients. The results are
+    # written with write_netCDF_slab, the cells that were written are marked in the variable "completed"
+    data = current_data
+    dims = data.dim_array
+
+    with netcdf_lock, nc.Dataset(save_path, 'w') as f:
+        for k, i in enumerate(dims[1:]):
+            f.createDimension(i, trends.shape[k])
+            dim_var = f.createVariable(i, 'f8', (i,))
+            dim_var[:] = getattr(data, i)
+            if getattr(data, i + '_unit', ''):
+                dim_var.units = getattr(data, i + '_unit')
+
+        max_length = max(len(s) for s in diagnostic[4])
+        f.createDimension('n_coefficients', len(diagnostic[4]))
+        f.createDimension('string_length', max_length)
+        f.createDimension('time', len(diagnostic[5]))
+        f.createDimension('infl', 2)
+
+        ind_var = f.createVariable('independent_variable_names', 'str', ('n_coefficients',))
+        ind_var[:] = np.array(diagnostic[4])
+
+        time_var = f.createVariable('date', 'S10', 'time')
+        time_var.unit = 'YYYYMMDD'
+        frac_var = f.createVariable('fractional_year', 'f4', ('time',), compression="zlib")
+
+        dim_tuple = tuple(dim_name for dim_name in dims)
+        X_var = f.createVariable('independent_variable_matrix', 'f4', dim_tuple + ('n_coefficients',), compression="zlib")
+        beta_var = f.createVariable('beta', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
+        covb_var = f.createVariable('beta_uncertainty', 'f4', dim_tuple[1:] + ('n_coefficients',), compression="zlib")
+        cond_var = f.createVariable('condition_number', 'f4', dim_tuple[1:], compression="zlib")
+
+        if ini.get('save_climatology', 'False') == 'True' and len(diagnostic) > 9 and diagnostic[9] is not None:
+            f.createDimension('climatology_month', diagnostic[9].shape[0])
+            clim_var = f.createVariable('climatology', 'f4', ('climatology_month',) + dim_tuple[1:], compression="zlib")
+            clim_var.long_name = 'Climatology that was subtracted to get the anomalies'
+            clim_var.anomaly_method = ini.get('anomaly_method', 'rel')
+
+        trend_dims = dim_tuple[1:] + ('infl',) if len(trends.shape) == len(dim_tuple) else dim_tuple[1:]
+        f.createVariable('trend', 'f4', trend_dims, compression="zlib")
+        f.createVariable('trend_uncertainty', 'f4', trend_dims, compression="zlib")
+
+        if len(diagnostic) > 10 and diagnostic[10] is not None:
+            level = float(ini.get('bootstrap_level', 95))
+            for name, percentile in [('trend_lower', (100 - level) / 2), ('trend_upper', 100 - (100 - level) / 2)]:
+                bound_var = f.createVariable(name, 'f4', trend_dims, compression="zlib")
+                bound_var.long_name = str(percentile) + ' percentile of the trend from a moving block bootstrap'
+                bound_var.replicates = int(ini.get('bootstrap_replicates', 1000))
+                bound_var.block_length = ini.get('bootstrap_block_length', 'cube root of the number of time steps')
+
+        if len(diagnostic) > 11 and diagnostic[11] is not None:
+            windows = get_sensitivity_windows(ini, diagnostic[5])
+            f.createDimension('window', len(windows))
+            start_var = f.createVariable('window_start', 'i4', ('window',))
+            start_var[:] = [i[0] for i in windows]
+            start_var.long_name = 'First year of the analysis window'
+            end_var = f.createVariable('window_end', 'i4', ('window',))
+            end_var[:] = [i[1] for i in windows]
+            end_var.long_name = 'Last year of the analysis window'
+            window_var = f.createVariable('trend_window', 'f4', ('window',) + trend_dims, compression="zlib")
+            window_var.long_name = 'Trend of the time series between window_start and window_end'
+
+        if len(diagnostic) > 12 and diagnostic[12] is not None:
+            f.createDimension('candidate', len(diagnostic[13]))
+            candidate_var = f.createVariable('inflection_candidate', 'f8', ('candidate',))
+            candidate_var[:] = convert_datetime_to_fractional(diagnostic[13])
+            candidate_var.long_name = 'Inflection points of the scan as fractional years'
+            rss_var = f.createVariable('inflection_rss', 'f8', ('candidate',) + dim_tuple[1:], compression="zlib")
+            rss_var.long_name = 'Residual sum of squares of the fit without the autocorrelation correction with the inflection point inflection_candidate'
+            best_var = f.createVariable('inflection_best', 'f8', dim_tuple[1:], compression="zlib")
+            best_var.long_name = 'Inflection point with the smallest residual sum of squares as fractional year'
+            best_var.inflection_method = ini['inflection_method']
+
+        completed_var = f.createVariable('completed', 'i1', dim_tuple[1:], fill_value=0)
+        completed_var.long_name = 'Cells whose results are written in the file (1) or still missing (0)'
+
+        X_var.long_name = 'Independent Variable matrix'
+        beta_var.long_name = 'Fit Parameters'
+        covb_var.long_name = 'Variance of the Fit Parameters'
+        cond_var.long_name = 'Condition number of the autocorrelation corrected Independent Variable matrix'
+        cond_var.solver = ini.get('solver', 'inv')
+
+        frac_year = convert_datetime_to_fractional(diagnostic[5])
+
+        time_int = np.array([str_time.strftime('%Y-%m-%d') for str_time in diagnostic[5]])
+        time_var[:] = time_int
+        frac_var[:] = frac_year
+
+        f.program = 'IUP_regression_model'
+        f.version = ver
+        f.contact = '''Name: Brian Auffarth\rAffiliation: University of Bremen\rE-mail: brian@iup.physik.uni-bremen.de'''
+        f.date_of_creation = dt.datetime.today().strftime('%Y-%m-%d')
+        f.configuration_settings = get_configuration_settings(ini)
+
+
+@timed('writing output')
+def write_netCDF_slab(save_path, slab, trends, signi, diagnostic, ini):
+    # Writes the results of one slab (see get_slabs, () for the whole grid) into a file made by create_netCDF and marks
+    # its cells as completed. The file is closed afterwards, so that the written slabs are kept if the run is stopped
+    time_slab = (slice(None),) + slab
+    with netcdf_lock, nc.Dataset(save_path, 'a') as f:
+        f['independent_variable_matrix'][time_slab] = diagnostic[0][time_slab]
+        f['beta'][slab] = diagnostic[2][slab]
+        f['beta_uncertainty'][slab] = diagnostic[7][slab]
+        f['condition_number'][slab] = diagnostic[8][slab]
+        if 'climatology' in f.variables:
+            f['climatology'][time_slab] = diagnostic[9][time_slab]
+        f['trend'][slab] = trends[slab]
+        f['trend_uncertainty'][slab] = signi[slab]
+        if 'trend_lower' in f.variables:
+            f['trend_lower'][slab] = diagnostic[10][slab][..., 0]
+            f['trend_upper'][slab] = diagnostic[10][slab][..., 1]
+        if 'trend_window' in f.variables:
+            f['trend_window'][(slice(None),) + slab] = np.moveaxis(diagnostic[11][slab], -1, 0)
+        if 'inflection_rss' in f.variables:
+            f['inflection_rss'][(slice(None),) + slab] = np.moveaxis(diagnostic[12][slab], -1, 0)
+            f['inflection_best'][slab] = get_best_inflection(diagnostic[12][slab], diagnostic[13])
+        f['completed'][slab] = 1
+
+
+@timed('checkpoint')
+def open_checkpoint(save_path, data, trends, diagnostic, ini):
+    # Creates the output file before the trends are calculated. If the run is resumed and the file was made with the same
+    # settings, the file is kept and the cells that are already completed are read from it (see load_checkpoint)
+    if ini.get('resume', 'False') == 'True' and os.path.exists(save_path):
+        try:
+            with netcdf_lock, nc.Dataset(save_path, 'r') as f:
+                settings = f.configuration_settings
+                n_completed = int(np.ma.filled(f['completed'][:], 0).sum())
+        except (OSError, KeyError, AttributeError):
+            print(save_path + ' could not be read, the run is started from the beginning')
+        else:
+            if settings != get_configuration_settings(ini):
+                raise Exception(save_path + ' was written with other settings and can not be resumed')
+            print_info('Resuming ' + save_path + ': ' + str(n_completed) + ' of ' + str(int(np.prod(trends.shape[:len(data.dim_array) - 1]))) + ' cells are already completed')
+            return
+    create_netCDF(save_path, data, trends, diagnostic, ini)
+
+
+@timed('checkpoint')
+def load_checkpoint(save_path, slab, data, results, interval=None, window_trends=None, inflection_rss=None):
+    # Writes the completed cells of the slab from the output file into the result arrays (and the bootstrap intervals into
+    # interval, the trends of the analysis windows into window_trends and the RSS of the inflection point scan into
+    # inflection_rss) and returns the indices (of the flattened slab) of the cells that still have to be calculated.
+    # beta (the fit without the autocorrelation correction) is not saved in the file and stays empty for the completed cells
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+    time_slab = (slice(None),) + slab
+    with netcdf_lock, nc.Dataset(save_path, 'r') as f:
+        completed = np.ma.filled(f['completed'][slab], 0).astype(bool)
+        if completed.any():
+            trenda_z[completed] = np.ma.filled(f['trend'][slab], np.nan)[completed]
+            siga_z[completed] = np.ma.filled(f['trend_uncertainty'][slab], np.nan)[completed]
+            X_all[:, completed] = np.ma.filled(f['independent_variable_matrix'][time_slab], np.nan)[:, completed]
+            betaa_all[completed] = np.ma.filled(f['beta'][slab], np.nan)[completed]
+            covbetaa_all[completed] = np.ma.filled(f['beta_uncertainty'][slab], np.nan)[completed]
+            cond_all[completed] = np.ma.filled(f['condition_number'][slab], np.nan)[completed]
+            data_all[:, completed] = np.ma.filled(data.o3[data.date_start:data.date_end], np.nan)[:, completed]
+            if interval is not None:
+                interval[completed] = np.stack([np.ma.filled(f['trend_lower'][slab], np.nan), np.ma.filled(f['trend_upper'][slab], np.nan)], axis=-1)[completed]
+            if window_trends is not None:
+                window_trends[completed] = np.moveaxis(np.ma.filled(f['trend_window'][(slice(None),) + slab], np.nan), 0, -1)[completed]
+            if inflection_rss is not None:
+                inflection_rss[completed] = np.moveaxis(np.ma.filled(f['inflection_rss'][(slice(None),) + slab], np.nan), 0, -1)[completed]
+
+    return np.flatnonzero(~completed.reshape(-1))
 
 
 def is_between(val, low_lim, up_lim):
@@ -2524,9 +1470,9 @@ def get_inflection_index(ini, data):
     else:
         return inflection_index
 
-    for k, i in enumerate(data.time.astype(dt.datetime)):
-        if i.year == inflection_date.year and i.month == inflection_date.month:
-            inflection_index = k
+    inflection_index = find_month(data.month_number, get_month_number(inflection_date))
+    if inflection_index is None:
+        raise Exception('The inflection point ' + ini['inflection_point'] + ' is not in the time series of the data.')
     inflection_index = inflection_index - data.date_start
 
     return inflection_index
@@ -2589,6 +1535,7 @@ def default_boundary_settings(proxy_list):
     return proxy_list
 
 
+@timed('design matrices')
 def get_X_1(nanmask, ini, X_1_string, data):
     mask_time = np.where(nanmask == True)[0]  # Array which has every index of actual values of the original data
 
@@ -2656,7 +1603,7 @@ def get_X_1(nanmask, ini, X_1_string, data):
                 col += 1
 
         elif method == 3:
-            month_array = np.array(pd.to_datetime(data.time[data.date_start:data.date_end]).month)
+            month_array = data.month_of_year[data.date_start:data.date_end]
             for kk in range(12):
                 X_1[:, col] = val
                 X_1[np.where((month_array % 13) != kk + 1), col] = 0
@@ -2667,6 +1614,43 @@ def get_X_1(nanmask, ini, X_1_string, data):
     return X_1
 
 
+def get_interpolation_weights(tag_array, tag_val):
+    # Returns the indices of the two closest tag values of a proxy and the weight of the second one, so that the
+    # proxy at tag_val is data[:, ind1] + weight * (data[:, ind2] - data[:, ind1])
+    if tag_val in tag_array:
+        ind = np.where(tag_array == tag_val)[0][0]
+        return ind, ind, 0.0
+    closest_val = sorted([(val_close, abs(val_close - tag_val)) for val_close in tag_array], key=lambda x: x[1:])[:2]
+    val1, val2 = closest_val[0][0], closest_val[1][0]
+    weight = np.interp(tag_val, [val1, val2], [0, 1])
+    return np.where(tag_array == val1)[0][0], np.where(tag_array == val2)[0][0], weight
+
+
+def interpolate_proxy(proxy, tag, tag_val):
+    # Time series of a tagged proxy (time, tag) at the tag value of a cell
+    ind1, ind2, weight = get_interpolation_weights(getattr(proxy, tag), tag_val)
+    if ind1 == ind2:
+        return proxy.data[:, ind1]
+    return proxy.data[:, ind1] + weight * (proxy.data[:, ind2] - proxy.data[:, ind1])
+
+
+@timed('design matrices')
+def set_proxy_tag_series(proxies, data):
+    # Interpolates every tagged proxy once for every coordinate of the data dimension with the same tag, so that the
+    # cells only have to look up their time series in get_X_2
+    for i in proxies:
+        i.tag_series = {}
+        if i.method == 0 or len(np.shape(i.data)) < 2:
+            continue
+        for ii in data.dim_array[1:]:
+            if getattr(data, ii + '_tag', None) != i.tag:
+                continue
+            for tag_val in getattr(data, ii):
+                if tag_val not in i.tag_series:
+                    i.tag_series[tag_val] = interpolate_proxy(i, i.tag, tag_val)
+
+
+@timed('design matrices')
 def get_X_2(proxies, nanmask, X_proxy_size, it, data):
     mask_time = np.where(nanmask == True)[0]    # Array which has every index of actual values of the original data
     X_2 = np.zeros((len(nanmask), X_proxy_size), dtype=float)  # Size of the proxy part of the X matrices depends on which method to use for each proxy as well as the seasonal cycle
@@ -2698,16 +1682,10 @@ def get_X_2(proxies, nanmask, X_proxy_size, it, data):
                 if getattr(data, ii + '_tag') == i.tag:
                     tag = i.tag
                     tag_val = getattr(data, ii)[it.multi_index[kk]]
-            if tag_val in getattr(i, tag):
-                proxy_data = i.data[nanmask, np.where(getattr(i, tag) == tag_val)]
+            if tag_val in i.tag_series:
+                proxy_data = i.tag_series[tag_val][nanmask]
             else:
-                closest_val = sorted([(val_close, abs(val_close - tag_val)) for val_close in getattr(i, tag)], key=lambda x: x[1:])[:2]
-                val1, val2 = closest_val[0][0], closest_val[1][0]
-                data1, data2 = i.data[nanmask, np.where(getattr(i, tag) == val1)[0][0]], i.data[nanmask, np.where(getattr(i, tag) == val2)[0][0]]
-                temp_data = np.empty(len(data1))
-                for kk, ii in enumerate(data1):
-                    temp_data[kk] = np.interp(tag_val, [val1, val2], [data1[kk], data2[kk]])
-                proxy_data = temp_data
+                proxy_data = interpolate_proxy(i, tag, tag_val)[nanmask]
         else:
             proxy_data = i.data[nanmask]
 
@@ -2725,7 +1703,7 @@ def get_X_2(proxies, nanmask, X_proxy_size, it, data):
                 X_2[nanmask, col] = proxy_data * np.cos(((kk + 1) * 2 * np.pi * mask_time)/12)
                 col += 1
         elif i.method == 3:
-            month_array = np.array(pd.to_datetime(data.time[data.date_start:data.date_end]).month)
+            month_array = data.month_of_year[data.date_start:data.date_end]
             for kk in range(12):
                 X_2[nanmask, col] = proxy_data
                 X_2[np.where((month_array % 13) != kk+1), col] = 0
@@ -2737,6 +1715,7 @@ def get_X_2(proxies, nanmask, X_proxy_size, it, data):
     return X_2
 
 
+@timed('design matrices')
 def normalize(X_2):
 
     for k in range(X_2.shape[1]):
@@ -2746,6 +1725,155 @@ def normalize(X_2):
     return X_2
 
 
+def get_month_blocks(X_string):
+    # Month of every month-of-the-year column (1 to 12) and 0 for all other (shared) columns
+    return np.array([int(i.split(' - ')[-1]) if 'month-of-the-year' in i else 0 for i in X_string])
+
+
+def block_normal_inverse(X, blocks):
+    # Inverts the normal equations X^T X of a month-of-the-year design through the Schur complement of its shared columns.
+    # Columns of different months are zero in each others rows, so their part of X^T X is block diagonal and only the
+    # small monthly blocks and the Schur complement C = S - B^T D^-1 B of the shared columns have to be inverted:
+    #   (X^T X)^-1 = [[D^-1 + E C^-1 E^T, -E C^-1], [-C^-1 E^T, C^-1]] with E = D^-1 B
+    # Returns None if the columns of different months overlap (e.g. after the autocorrelation transformation).
+    # The condition number is estimated with the 1-norm, which doesn't need a decomposition of the full matrix
+    months = [np.where(blocks == i)[0] for i in np.unique(blocks[blocks > 0])]
+    if len(months) < 2:
+        return None
+    rows = np.stack([np.any(X[..., i] != 0, axis=-1) for i in months])
+    if np.any(np.sum(rows, axis=0) > 1):
+        return None
+
+    X_T = np.swapaxes(X, -1, -2)
+    shared = np.where(blocks == 0)[0]
+    X_s = X[..., shared]
+    S = X_T[..., shared, :] @ X_s
+    C = S.copy()
+    XtX_inv = np.zeros(X.shape[:-2] + (X.shape[-1],) * 2)
+    XtX = np.zeros(XtX_inv.shape)
+    E = np.zeros(X.shape[:-2] + (X.shape[-1], len(shared)))
+    for i in months:
+        D = X_T[..., i, :] @ X[..., i]
+        D_inv = np.linalg.inv(D)
+        B = X_T[..., i, :] @ X_s
+        E[..., i, :] = D_inv @ B
+        C -= np.swapaxes(B, -1, -2) @ E[..., i, :]
+        XtX_inv[..., i[:, None], i] = D_inv
+        XtX[..., i[:, None], i] = D
+        XtX[..., i[:, None], shared] = B
+        XtX[..., shared[:, None], i] = np.swapaxes(B, -1, -2)
+    XtX[..., shared[:, None], shared] = S
+
+    if len(shared):
+        C_inv = np.linalg.inv(C)
+        E_C_inv = E @ C_inv
+        XtX_inv += E_C_inv @ np.swapaxes(E, -1, -2)
+        XtX_inv[..., shared] = -E_C_inv
+        XtX_inv[..., shared, :] = -np.swapaxes(E_C_inv, -1, -2)
+        XtX_inv[..., shared[:, None], shared] = C_inv
+
+    norm_1 = lambda M: np.max(np.sum(np.abs(M), axis=-2), axis=-1)
+    cond = np.sqrt(norm_1(XtX) * norm_1(XtX_inv))
+
+    return XtX_inv, cond
+
+
+def normal_condition_number(XtX):
+    # Condition number of X from its normal equations XtX (for a single cell or stacks of cells). It's only a diagnostic,
+    # so normal equations with NaN (e.g. after the AR(1) transformation with phi > 1) get NaN instead of failing the fit
+    finite = np.all(np.isfinite(XtX), axis=(-2, -1))
+    if np.all(finite):
+        return np.sqrt(np.linalg.cond(XtX))
+    cond = np.full(XtX.shape[:-2], np.nan)
+    if np.any(finite):
+        cond[finite] = np.sqrt(np.linalg.cond(XtX[finite]))
+    return cond[()]
+
+
+def least_squares_operator(X, solver='inv', blocks=None):
+    # Factorizes X once and returns the matrix A with beta = A @ y for any right hand side y, the diagonal of
+    # (X^T X)^-1 (needed for the covariance) and the condition number of X.
+    # Works for a single cell (time, coefficient) or stacks of cells (cell, time, coefficient).
+    # Solvers: "inv" inverts the normal equations (fastest, least precise), "cholesky" factorizes the normal equations,
+    # "qr" factorizes X itself (more precise for badly conditioned proxies) and "svd" also handles rank deficient X.
+    # "block" inverts the normal equations of month-of-the-year designs blockwise (see block_normal_inverse), with the
+    # month of each column in blocks (see get_month_blocks), and works like "inv" for all other designs
+    X_T = np.swapaxes(X, -1, -2)
+    block_inverse = block_normal_inverse(X, blocks) if solver == 'block' and blocks is not None else None
+
+    if block_inverse is not None:
+        XtX_inv, cond = block_inverse
+        A = XtX_inv @ X_T
+        XtX_inv_diag = np.diagonal(XtX_inv, axis1=-2, axis2=-1)
+    elif solver in ['inv', 'block']:
+        XtX = X_T @ X
+        XtX_inv = np.linalg.inv(XtX)
+        A = XtX_inv @ X_T
+        XtX_inv_diag = np.diagonal(XtX_inv, axis1=-2, axis2=-1)
+        cond = normal_condition_number(XtX)
+    elif solver == 'cholesky':
+        L_inv = np.linalg.inv(np.linalg.cholesky(X_T @ X))
+        A = np.swapaxes(L_inv, -1, -2) @ (L_inv @ X_T)
+        XtX_inv_diag = np.sum(L_inv ** 2, axis=-2)
+        cond = np.linalg.cond(L_inv)
+    elif solver == 'qr':
+        Q, R = np.linalg.qr(X)
+        R_inv = np.linalg.inv(R)
+        A = R_inv @ np.swapaxes(Q, -1, -2)
+        XtX_inv_diag = np.sum(R_inv ** 2, axis=-1)
+        cond = np.linalg.cond(R)
+    elif solver == 'svd':
+        U, sing, V_T = np.linalg.svd(X, full_matrices=False)
+        cutoff = np.finfo(float).eps * max(X.shape[-2:]) * sing[..., :1]
+        sing_inv = np.where(sing > cutoff, 1 / np.where(sing > cutoff, sing, 1), 0)
+        V_scaled = np.swapaxes(V_T, -1, -2) * sing_inv[..., None, :]
+        A = V_scaled @ np.swapaxes(U, -1, -2)
+        XtX_inv_diag = np.sum(V_scaled ** 2, axis=-1)
+        cond = sing[..., 0] / sing[..., -1]
+    else:
+        raise Exception('The solver "' + str(solver) + '" is not being recognized. Either use "inv", "cholesky", "qr", "svd" or "block".')
+
+    return A, XtX_inv_diag, cond
+
+
+def solve_least_squares(X, y, solver='inv', blocks=None):
+    # Solves the least squares problem X @ beta = y, see least_squares_operator for the solvers
+    A, XtX_inv_diag, cond = least_squares_operator(X, solver, blocks)
+    return (A @ y[..., None])[..., 0], XtX_inv_diag, cond
+
+
+@timed('AR(1) fit')
+def ar1_coefficient(N, N_var, n_pairs, n_valid):
+    # Autocorrelation estimator of the residuals N, using the products of the first n_pairs consecutive residuals.
+    # Works for a single time series or stacks of time series (cell, time)
+    pair_mask = np.arange(N.shape[-1] - 1) < np.expand_dims(n_pairs, -1)
+    sumN = np.sum(np.where(pair_mask, N[..., 1:] * N[..., :-1], 0), axis=-1)
+    return (1.0 / N_var) * (sumN / (n_valid - 1))
+
+
+@timed('AR(1) fit')
+def ar1_transform(X_clean, y, N, phi):
+    # Prais-Winsten transformation of X, y and the residuals N with the autocorrelation phi in O(n). This is the same as
+    # multiplying with the bidiagonal matrix P (sqrt(1 - phi²) on the first row, 1 and -phi on all others), only rows
+    # after a gap in the second column of X are scaled with sqrt(1 - phi²) instead of being differenced.
+    # Works for a single cell (time, coefficient) or stacks of cells (cell, time, coefficient)
+    phi = np.expand_dims(phi, -1)
+    phi_root = np.sqrt(1 - phi ** 2)
+    gap = np.ones(y.shape, dtype=bool)
+    gap[..., 1:] = X_clean[..., 1:, 1] - X_clean[..., :-1, 1] > 1
+
+    X_lag, y_lag, N_lag = np.zeros_like(X_clean), np.zeros_like(y), np.zeros_like(N)
+    X_lag[..., 1:, :] = X_clean[..., :-1, :]
+    y_lag[..., 1:] = y[..., :-1]
+    N_lag[..., 1:] = N[..., :-1]
+
+    Xstar = np.where(gap[..., None], X_clean * phi_root[..., None], X_clean - phi[..., None] * X_lag)
+    Ystar = np.where(gap, y * phi_root, y - phi * y_lag)
+    epsilon = np.where(gap, N * phi_root, N - phi * N_lag)
+
+    return Xstar, Ystar, epsilon
+
+
 def calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
     nanmask = ~np.isnan(data_arr.filled(np.nan))
 
@@ -2753,89 +1881,36 @@ def calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
     trend_string_index = [j for j, s in enumerate(X_string) if 'trend' in s]
     groups = get_string_groups(X_string)
     # trend_index = trend_string_index[0]     # To get the first trend index so that the autoregression works
+    solver = ini.get('solver', 'inv')
+    blocks = get_month_blocks(X_string)
 
     try:
-        beta = np.linalg.inv(X_clean.T @ X_clean) @ X_clean.T @ data_arr[nanmask]
+        with timed_stage('first fit'):
+            beta = solve_least_squares(X_clean, data_arr[nanmask].filled(np.nan), solver, blocks)[0]
     except:
-        print('Calculation failed: NaNs')
-        return [np.nan] * len(trend_string_index), [np.nan] * len(trend_string_index), np.nan, np.nan, np.nan
+        report_failure('Calculation failed: NaNs')
+        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
 
     # Carlos autoregression program, not yet completely reworked
 
     fity = np.matmul(X_clean, beta)
     N = data_arr[nanmask] - fity  # what I cosider the error matrix N
 
-    k, sumN = 1, 0
-    for t in range(len(nanmask))[1:]:
-        if nanmask[t - 1] == False or nanmask[t] == False:  # it means that before there was a gap or I am in a gap (and N is not def for gaps)
-            continue
-        else:
-            sumN = sumN + (N[k] * N[k - 1])
-            k += 1
-    phi = (1.0 / np.var(N)) * (sumN / (len(data_arr[nanmask]) - 1))  # autocorrelation estimator excluding gaps
-
-    P, epsilon = np.zeros((len(data_arr[nanmask]), len(data_arr[nanmask]))), np.zeros((len(data_arr[nanmask])))
-    for i in range(len(X_clean))[1:]:  # I am starting from the second line
-        for g in range(len(X_clean)):
-            if i == g:
-                if X_clean[i, 1] - X_clean[i - 1, 1] > 1:
-                    P[i, g] = np.sqrt(1 - phi ** 2)
-                    epsilon[i] = N[i] * np.sqrt(1 - phi ** 2)
-                else:
-                    P[i, g] = 1
-                    epsilon[i] = N[i] - phi * N[i - 1]
-            elif i == g + 1:
-                if X_clean[i, 1] - X_clean[i - 1, 1] > 1:
-                    P[i, g] = 0
-                else:
-                    P[i, g] = -phi
-    P[0, 0] = np.sqrt(1 - phi ** 2)  # this is the first line
-    epsilon[0] = N[0] * np.sqrt(1 - phi ** 2)
+    # Number of consecutive valid time steps, gaps are excluded from the autocorrelation
+    n_pairs = np.sum(nanmask[1:] & nanmask[:-1])
+    phi = ar1_coefficient(N, np.var(N), n_pairs, len(data_arr[nanmask]))
 
-    Xstar = np.matmul(P, X_clean)
-    Ystar = np.matmul(P, data_arr[nanmask])
+    Xstar, Ystar, epsilon = ar1_transform(X_clean, data_arr[nanmask].filled(np.nan), np.asarray(N), phi)
     try:
-        betaa = np.linalg.inv(Xstar.T @ Xstar) @ Xstar.T @ Ystar
-        covbetaa = np.var(epsilon) * (np.linalg.inv(np.matmul(np.transpose(Xstar), Xstar)))
+        with timed_stage('AR(1) fit'):
+            betaa, XstarTXstar_inv_diag, cond = solve_least_squares(Xstar, Ystar, solver, blocks)
+        covbetaa = np.var(epsilon) * XstarTXstar_inv_diag
     except:
-        print('Two or more proxies are dependent to each other. A linear regression is not possible. Please either turn of linear regression or turn off one of the proxies.')
-        return np.nan, np.nan, np.nan, np.nan, np.nan
-
-    Xmask2, Ymask2 = np.zeros((len(X_clean), X_clean.shape[1])), np.zeros((len(X_clean)))
-    count = 0
-    timok = list()
-    comb_trend_col = np.array([np.nanmax(row[trend_string_index]) for row in X_clean])        # A combined column of all trend columns, for better comparison of consecutive values
-    if inflection_index[0]:
-        continuity_jumps = [inflection_index[i] - sum(inflection_index[:i]) for i in range(len([inflection_index]))]        # A list of indices at which the continuity will jump back to 1
-    else:
-        continuity_jumps = []
-    jump_num = 0
-
-    for k, i in enumerate(comb_trend_col):
-        if k == 0:
-            Xmask2[count, 0:len(Xstar[k, :])] = Xstar[k, :]
-            Ymask2[count] = Ystar[k]
-            count += 1
-            timok.append(k)
-            continue
-        if i - comb_trend_col[k - 1] == 1:
-            Xmask2[count, 0:len(Xstar[k, :])] = Xstar[k, :]
-            Ymask2[count] = Ystar[k]
-            count += 1
-            timok.append(k)
-        elif jump_num >= len(continuity_jumps):
-            continue    # if all inflection points were already found, then the program will not look for another one
-        elif comb_trend_col[k - 1] == continuity_jumps[jump_num] and i == 1:
-            Xmask2[count, 0:len(Xstar[k, :])] = Xstar[k, :]
-            Ymask2[count] = Ystar[k]
-            count += 1
-            timok.append(k)
-            jump_num += 1
-        else:
-            # print('gap in X1, ', k, i)
-            continue
+        report_failure('Two or more proxies are dependent to each other. A linear regression is not possible. Please either turn of linear regression or turn off one of the proxies.')
+        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
 
-    Xmask2ok = Xmask2[0:k, :]
+    # Time steps after the first one, at least 10 are needed to calculate a trend
+    n_rows = max(len(X_clean) - 1, 0)
 
     mult = 1
     if ini.get('o3_var_anom', 'False') == 'True':
@@ -2849,7 +1924,7 @@ def calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
 
     # Calculate the trend coefficients
     try:
-        if len(beta) == 1 or len(Xmask2ok) < 10:
+        if len(beta) == 1 or n_rows < 10:
             trenda_z = [np.nan] * len(trend_string_index)
             siga_z = [np.nan] * len(trend_string_index)
         else:
@@ -2857,7 +1932,7 @@ def calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
             siga_z = []
             if ini.get('anomaly', '') == 'True' and ini.get('anomaly_method', 'rel') == 'rel':
                 trenda_z.append(np.nanmean(betaa[trend_string_index]) * 120 * 100)
-                siga_z.append(np.abs(np.nanmean(betaa[trend_string_index]) / np.sqrt(np.nanmean(np.diag(covbetaa)[trend_string_index]))))
+                siga_z.append(np.abs(np.nanmean(betaa[trend_string_index]) / np.sqrt(np.nanmean(covbetaa[trend_string_index]))))
             elif ini.get('anomaly', '') == 'True' and ini.get('anomaly_method', 'abs') == 'rel':
                 print('NOT YET FINISHED')
             else:
@@ -2866,25 +1941,1060 @@ def calc_trend(X_clean, data_arr, ini, X_string, inflection_index):
                         continue
                     if keys[1] == 'month-of-the-year':
                         trenda_z.append(np.nanmean(betaa[indices]) * mult)
-                        siga_z.append(np.abs(betaa[indices[0]] / np.sqrt(np.diag(covbetaa)[indices[0]])))
+                        siga_z.append(np.abs(betaa[indices[0]] / np.sqrt(covbetaa[indices[0]])))
                     else:
                         trenda_z.append(betaa[indices[0]] * mult)
-                        siga_z.append(np.abs(betaa[indices[0]] / np.sqrt(np.diag(covbetaa)[indices[0]])))
+                        siga_z.append(np.abs(betaa[indices[0]] / np.sqrt(covbetaa[indices[0]])))
                 # siga_z = np.abs(betaa[trend_string_index] / np.sqrt(np.diag(covbetaa)[trend_string_index])) if len(trend_string_index) == 1 else [np.abs(betaa[i] / np.sqrt(np.diag(covbetaa)[i])) for i in trend_string_index]
                 # trenda_z = betaa[trend_string_index] * mult if len(trend_string_index) == 1 else [betaa[i] * mult for i in trend_string_index]
 
     except:
         trenda_z = [np.nan] * len(trend_string_index)
         siga_z = [np.nan] * len(trend_string_index)
-        print('Failed to calculate the trend and significants')
+        report_failure('Failed to calculate the trend and significants')
     if len(trenda_z) == 1:
-        return trenda_z.pop(), siga_z.pop(), beta, betaa, np.diag(covbetaa)
+        return trenda_z.pop(), siga_z.pop(), beta, betaa, covbetaa, cond
     else:
-        return np.array(trenda_z), np.array(siga_z), beta, betaa, np.diag(covbetaa)
+        return np.array(trenda_z), np.array(siga_z), beta, betaa, covbetaa, cond
 
 
 
+def get_cell_X(nanmask, it, data, proxies, ini, X_1_string, X_proxy_size, X_string):
+    # X matrix of a single cell with the valid time steps in nanmask. Returns the X matrix with NaN in the rows without
+    # data and the unused columns, the X matrix without them (with the normalized proxies) and the masks of these rows
+    # and columns
+    X_1 = get_X_1(nanmask, ini, X_1_string, data)
+    X_2 = get_X_2(proxies, nanmask, X_proxy_size, it, data)
+
+    X = np.concatenate([X_1, X_2], axis=1)
+    X[:, np.all(X[nanmask] == 0, axis=0)] = np.nan
+
+    # Only use the X matrix without empty rows and columns
+    X[:, np.all(X[nanmask] == 0, axis=0)] = np.nan  # This changes the rows with only 0 and NaNs to only NaN rows
+    for k in range(len(X_string)):
+        nonzerosum = np.sum((X[:, k] != 0) & ~np.isnan(X[:, k]))
+        if nonzerosum <= 2:
+            X[:, k] = np.nan
+    row_mask = np.isnan(X).all(axis=1)
+    col_mask = np.isnan(X).all(axis=0)
+    X_clean = X[~row_mask][:, ~col_mask]
+    X_clean[np.isnan(X_clean)] = 0
+
+    # Normalize
+    X_clean[:, len(X_1_string):] = normalize(X_clean[:, len(X_1_string):])
+
+    return X, X_clean, row_mask, col_mask
+
+
+def fit_cell(data_arr, it, data, proxies, ini, X_1_string, X_proxy_size, X_string, results):
+    # Builds the X matrix for a single cell, calculates its trend and saves everything into the result arrays.
+    # Returns False if the cell was skipped
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+
+    nanmask = ~np.isnan(data_arr.filled(np.nan))
+    mask_time = np.where(nanmask == True)[0]
+
+    # Inquery if there are enough datapoints to even calculate a trend
+    if len(mask_time) / len(nanmask) < float(ini.get('skip_percentage', 0.75)):
+        return False
+
+    X, X_clean, row_mask, col_mask = get_cell_X(nanmask, it, data, proxies, ini, X_1_string, X_proxy_size, X_string)
+
+    # Calculation of the trends and uncertainties for each cell
+    trenda_z[it.multi_index], siga_z[it.multi_index], beta, betaa, covbetaa, cond = calc_trend(X_clean, data_arr, ini, np.array(X_string)[~np.all(np.isnan(X), axis=0)], data.inflection_index)
+
+    # Save X, beta and betaa
+    X_all[(slice(None),) + it.multi_index + (slice(None),)][np.ix_(~row_mask, ~col_mask)] = X_clean
+    beta_all[it.multi_index + (slice(None),)][~col_mask] = beta
+    betaa_all[it.multi_index + (slice(None),)][~col_mask] = betaa
+    covbetaa_all[it.multi_index + (slice(None),)][~col_mask] = covbetaa
+    cond_all[it.multi_index] = cond
+    data_all[(slice(None),) + it.multi_index] = data_arr.filled(np.nan)
+    return True
+
+
+def get_proxy_tag_key(proxies, data, multi_index):
+    # Returns the indices of every dimension that a tagged (e.g. latitude dependent) proxy depends on.
+    # Cells with the same key share the same proxy part of the X matrix
+    tags = [i.tag for i in proxies if i.method != 0 and len(i.data.shape) > 1]
+    return tuple(multi_index[kk] for kk, ii in enumerate(data.dim_array[1:]) if getattr(data, ii + '_tag', None) in tags)
+
+
+@timed('design matrices')
+def stack_cells(X_full, keep, data_stack, n_1):
+    # Stacks the X matrices of several cells into one (cell, time, coefficient) array. The valid time steps of each cell
+    # are moved to the front and the rest is padded with zeros, so that every cell can be solved with the same array shape
+    nanmask = ~np.isnan(data_stack)
+    order = np.argsort(~nanmask, axis=1, kind='stable')
+    n_valid = np.sum(nanmask, axis=1)
+    rows = np.arange(data_stack.shape[1])[None, :] < n_valid[:, None]
+
+    X_clean = X_full[:, keep][order]
+    X_clean[~rows] = 0
+    X_clean[np.isnan(X_clean)] = 0
+    y = np.where(rows, np.take_along_axis(data_stack, order, axis=1), 0)
+
+    # Normalize the proxy columns the same way as normalize() does, zeros (including the padding) are left untouched
+    X_2 = X_clean[..., n_1:]
+    nonzero = X_2 != 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        X_min = np.min(np.where(nonzero, X_2, np.inf), axis=1, keepdims=True)
+        X_max = np.max(np.where(nonzero, X_2, -np.inf), axis=1, keepdims=True)
+        X_clean[..., n_1:] = np.where(nonzero, ((X_2 - X_min) / (X_max - X_min))*2 - 1, X_2)
+
+    return X_clean, y, n_valid, order
+
+
+def calc_trend_batched(X_clean, y, n_valid, n_pairs, y_mean, ini, X_string, design_index=None):
+    # Batched version of calc_trend. X_clean has the shape (cell, time, coefficient) and y (cell, time), both hold the
+    # valid time steps of every cell at the front and are padded with zeros (see stack_cells).
+    # n_pairs is the number of consecutive valid time steps of each cell, which is used for the autocorrelation, and
+    # y_mean the mean of each time series. Cells with the same missing values have the same X_clean, design_index
+    # (the number of the unique design of each cell, starting at 0) lets them share one factorization for the first fit
+    trend_string_index = [j for j, s in enumerate(X_string) if 'trend' in s]
+    groups = get_string_groups(X_string)
+    rows = np.arange(X_clean.shape[1])[None, :] < n_valid[:, None]
+
+    solver = ini.get('solver', 'inv')
+    blocks = get_month_blocks(X_string)
+
+    with timed_stage('first fit'):
+        if design_index is None:
+            beta = solve_least_squares(X_clean, y, solver, blocks)[0]
+        else:
+            design_first = np.unique(design_index, return_index=True)[1]
+            A = least_squares_operator(X_clean[design_first], solver, blocks)[0]
+            beta = (A[design_index] @ y[..., None])[..., 0]
+
+    fity = (X_clean @ beta[..., None])[..., 0]
+    N = np.where(rows, y - fity, 0)
+    N_var = np.sum(np.where(rows, N - (np.sum(N, axis=1) / n_valid)[:, None], 0) ** 2, axis=1) / n_valid
+
+    phi = ar1_coefficient(N, N_var, n_pairs, n_valid)
+
+    Xstar, Ystar, epsilon = ar1_transform(X_clean, y, N, phi)
+    Xstar[~rows] = 0
+    Ystar[~rows] = 0
+    epsilon_mean = np.sum(np.where(rows, epsilon, 0), axis=1) / n_valid
+    epsilon_var = np.sum(np.where(rows, epsilon - epsilon_mean[:, None], 0) ** 2, axis=1) / n_valid
+
+    with timed_stage('AR(1) fit'):
+        betaa, XstarTXstar_inv_diag, cond = solve_least_squares(Xstar, Ystar, solver, blocks)
+    covbetaa = epsilon_var[:, None] * XstarTXstar_inv_diag
+
+    mult = np.ones(len(y))
+    if ini.get('o3_var_anom', 'False') != 'True':
+        mult *= 100 / y_mean
+    if ini.get('averaging_window', None):
+        mult *= 10
+    else:
+        mult *= 120
+
+    # Calculate the trend coefficients
+    trenda_z = []
+    siga_z = []
+    if ini.get('anomaly', '') == 'True' and ini.get('anomaly_method', 'rel') == 'rel':
+        trenda_z.append(np.nanmean(betaa[:, trend_string_index], axis=1) * 120 * 100)
+        siga_z.append(np.abs(np.nanmean(betaa[:, trend_string_index], axis=1) / np.sqrt(np.nanmean(covbetaa[:, trend_string_index], axis=1))))
+    else:
+        for keys, indices in groups.items():
+            if keys[0] == 'intercept' or keys[0] == 'proxy':
+                continue
+            if keys[1] == 'month-of-the-year':
+                trenda_z.append(np.nanmean(betaa[:, indices], axis=1) * mult)
+            else:
+                trenda_z.append(betaa[:, indices[0]] * mult)
+            siga_z.append(np.abs(betaa[:, indices[0]] / np.sqrt(covbetaa[:, indices[0]])))
+    trenda_z = np.stack(trenda_z, axis=1)
+    siga_z = np.stack(siga_z, axis=1)
+
+    # Not enough values or coefficients to calculate a trend
+    too_short = (n_valid - 1 < 10) | (len(X_string) == 1)
+    trenda_z[too_short] = np.nan
+    siga_z[too_short] = np.nan
+
+    return trenda_z, siga_z, beta, betaa, covbetaa, cond
+
+
+def fit_cells_batched(data, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index):
+    # Calculates the trends of the cells in cell_index (indices of the flattened grid) with stacked (cell, time, coefficient) arrays instead of one cell after another.
+    # Cells are grouped by their proxy tag values and by the columns left in their X matrix, so that every cell in a group
+    # has the same coefficients. Cells that don't fit into this scheme are calculated with fit_cell. Returns the number of
+    # cells of every design matrix that was factorized once for the first fit (see print_design_groups)
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+    batch_size = int(ini.get('batch_size', 4096))
+    n_1 = len(X_1_string)
+    n_time = X_all.shape[0]
+
+    # Flat views with all cells in one dimension
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    trenda_flat = trenda_z.reshape((len(cells),) + trenda_z.shape[data.o3.ndim - 1:])
+    siga_flat = siga_z.reshape(trenda_flat.shape)
+    X_all_flat = X_all.reshape(n_time, len(cells), len(X_string))
+    beta_flat = beta_all.reshape(len(cells), len(X_string))
+    betaa_flat = betaa_all.reshape(len(cells), len(X_string))
+    covbetaa_flat = covbetaa_all.reshape(len(cells), len(X_string))
+    cond_flat = cond_all.reshape(len(cells))
+    data_all_flat = data_all.reshape(n_time, len(cells))
+
+    data_stack = data.o3[data.date_start:data.date_end].reshape(n_time, len(cells))[:, cell_index].filled(np.nan).T
+
+    nanmask = ~np.isnan(data_stack)
+    n_pairs = np.sum(nanmask[:, 1:] & nanmask[:, :-1], axis=1)
+
+    # Inquery if there are enough datapoints to even calculate a trend
+    available = np.sum(nanmask, axis=1) / n_time
+    fit_index = np.where(available >= float(ini.get('skip_percentage', 0.75)))[0]
+    report_progress(done=len(cell_index) - len(fit_index), skipped=len(cell_index) - len(fit_index))
+
+    it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+    fallback = []
+    group_sizes = []
+
+    tag_keys = [get_proxy_tag_key(proxies, data, cells[cell_index[k]]) for k in fit_index]
+    for tag_key in dict.fromkeys(tag_keys):
+        members = fit_index[[k for k, key in enumerate(tag_keys) if key == tag_key]]
+
+        # The X matrix without missing values is the same for every cell with the same tag values
+        it.multi_index = cells[cell_index[members[0]]]
+        X_full = np.concatenate([get_X_1(np.ones(n_time, dtype=bool), ini, X_1_string, data), get_X_2(proxies, np.ones(n_time, dtype=bool), X_proxy_size, it, data)], axis=1)
+
+        # Columns with less than 3 values that are neither 0 nor NaN are removed for the respective cell
+        usable = (X_full != 0) & ~np.isnan(X_full)
+        keep = (nanmask[members].astype(int) @ usable.astype(int)) > 2
+
+        # Cells in which a valid time step would lose all of its values or with less than two columns are irregular
+        row_lost = nanmask[members] & ((~np.isnan(X_full)).astype(int) @ keep.T.astype(int) == 0).T
+        regular = ~np.any(row_lost, axis=1) & (np.sum(keep, axis=1) >= 2)
+        fallback.extend(members[~regular])
+        members, keep = members[regular], keep[regular]
+        if len(members) == 0:
+            continue
+
+        keep_patterns, pattern_index = np.unique(keep, axis=0, return_inverse=True)
+        for k, keep_pattern in enumerate(keep_patterns):
+            keep_index = np.where(keep_pattern)[0]
+            pattern_members = members[pattern_index.ravel() == k]
+
+            # Cells with the same missing values are put next to each other, so that they end up in the same batch
+            design_id = np.unique(nanmask[pattern_members], axis=0, return_inverse=True)[1].ravel()
+            pattern_members = pattern_members[np.argsort(design_id, kind='stable')]
+
+            for batch_start in range(0, len(pattern_members), batch_size):
+                batch = pattern_members[batch_start:batch_start + batch_size]
+
+                X_clean, y, n_valid, order = stack_cells(X_full, keep_pattern, data_stack[batch], n_1)
+                design_index = np.unique(nanmask[batch], axis=0, return_inverse=True)[1].ravel()
+                try:
+                    trends, signi, beta, betaa, covbetaa, cond = calc_trend_batched(X_clean, y, n_valid, n_pairs[batch], np.nanmean(data_stack[batch], axis=1), ini, np.array(X_string)[keep_pattern], design_index)
+                except np.linalg.LinAlgError:
+                    fallback.extend(batch)
+                    continue
+                group_sizes.extend(np.bincount(design_index).tolist())
+
+                if trends.shape[1] == 1:
+                    trends = trends.reshape((len(batch),) + (1,) * (trenda_flat.ndim - 1))
+                    signi = signi.reshape(trends.shape)
+                trenda_flat[cell_index[batch]] = trends
+                siga_flat[cell_index[batch]] = signi
+
+                # Save X, beta and betaa, with the valid time steps moved back to their original position
+                X_batch = np.full(X_clean.shape, np.nan)
+                cell_ind, time_ind = np.nonzero(np.arange(n_time)[None, :] < n_valid[:, None])
+                X_batch[cell_ind, order[cell_ind, time_ind]] = X_clean[cell_ind, time_ind]
+                X_all_flat[np.ix_(np.arange(n_time), cell_index[batch], keep_index)] = np.swapaxes(X_batch, 0, 1)
+                beta_flat[np.ix_(cell_index[batch], keep_index)] = beta
+                betaa_flat[np.ix_(cell_index[batch], keep_index)] = betaa
+                covbetaa_flat[np.ix_(cell_index[batch], keep_index)] = covbetaa
+                cond_flat[cell_index[batch]] = cond
+                data_all_flat[:, cell_index[batch]] = data_stack[batch].T
+                report_progress(done=len(batch))
+
+    # Cells that could not be calculated in a batch (e.g. singular X matrices) are calculated one by one
+    for k in sorted(fallback):
+        it.multi_index = cells[cell_index[k]]
+        fitted = fit_cell(np.ma.masked_invalid(data_stack[k]), it, data, proxies, ini, X_1_string, X_proxy_size, X_string, results)
+        report_progress(done=1, skipped=int(not fitted))
+
+    return group_sizes
+
+
+def print_design_groups(group_sizes):
+    # How much of the work was shared between cells with the same proxy tags and missing values, for the group sizes of
+    # every slab and process of the run (see fit_cells_batched)
+    if group_sizes:
+        print_info(str(sum(group_sizes)) + ' cells share ' + str(len(group_sizes)) + ' design matrices (largest group: ' + str(max(group_sizes)) + ' cells, ' + str(sum(group_sizes) - len(group_sizes)) + ' factorizations saved)')
+
+
+@timed('fitting')
+def fit_cells(data, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index=None):
+    # Calculates the trends of the cells in cell_index (indices of the flattened grid, all cells if None) with the engine from the config.ini.
+    # Returns the sizes of the shared design matrices of the batched engine (see fit_cells_batched), empty for the loop
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    cell_index = np.arange(len(cells)) if cell_index is None else np.asarray(cell_index)
+    engine = ini.get('engine', 'loop')
+
+    if engine == 'batched':
+        return fit_cells_batched(data, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index)
+    elif engine == 'loop':
+        # Looping over every dimension but the first (time), to calculate the trends for every latitude, longitude and altitude
+        it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+        for k in cell_index:
+            it.multi_index = cells[k]
+
+            data_arr = data.o3[(slice(None),) + it.multi_index]
+            data_arr = data_arr[data.date_start:data.date_end]
+
+            fitted = fit_cell(data_arr, it, data, proxies, ini, X_1_string, X_proxy_size, X_string, results)
+            report_progress(done=1, skipped=int(not fitted))
+        return []
+    else:
+        raise Exception('The engine "' + str(engine) + '" is not being recognized. Either use "loop" to fit one cell after another or "batched" to fit stacks of cells at once.')
+
+
+def share_array(arr, blocks):
+    # Copies an array into a new shared memory block and returns the (name, shape, dtype) needed to attach to it
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    blocks.append(shm)
+    return shm.name, arr.shape, arr.dtype.str
+
+
+def attach_array(desc, blocks):
+    # Returns an array that lives in the shared memory block described by share_array
+    shm = shared_memory.SharedMemory(name=desc[0])
+    blocks.append(shm)
+    return np.ndarray(desc[1], dtype=np.dtype(desc[2]), buffer=shm.buf)
+
+
+def share_proxies(proxies, blocks):
+    # Copies of the proxies without their time series (data and tag_series), which are copied into shared memory blocks.
+    # Returns a (proxy, data, tag_series) tuple per proxy, see attach_proxies
+    shared = []
+    for i in proxies:
+        proxy = copy.copy(i)
+        proxy.data = []
+        proxy.tag_series = {}
+        shared.append((proxy, share_array(i.data, blocks), {key: share_array(np.asarray(value), blocks) for key, value in i.tag_series.items()}))
+    return shared
+
+
+def attach_proxies(shared, blocks):
+    # Proxies with the time series of share_proxies in shared memory
+    proxies = []
+    for proxy, data_desc, tag_desc in shared:
+        proxy.data = attach_array(data_desc, blocks)
+        proxy.tag_series = {key: attach_array(desc, blocks) for key, desc in tag_desc.items()}
+        proxies.append(proxy)
+    return proxies
+
+
+# State of a worker process, set once by fit_cells_init and used for every chunk of cells
+worker_state = {}
+
+
+def fit_cells_init(data, o3_desc, mask_desc, proxy_desc, ini, X_1_string, X_proxy_size, X_string, result_desc):
+    blocks = []
+    data.o3 = np.ma.MaskedArray(attach_array(o3_desc, blocks), mask=attach_array(mask_desc, blocks), copy=False)
+    proxies = attach_proxies(proxy_desc, blocks)
+    results = [attach_array(desc, blocks) for desc in result_desc]
+    progress_state.update(quiet=ini.get('quiet', 'False') == 'True', messages=[])
+    worker_state.update(blocks=blocks, args=(data, proxies, ini, X_1_string, X_proxy_size, X_string, results))
+
+
+def fit_cells_worker(cell_index):
+    # Fits one chunk of cells and writes the outputs directly into the shared result arrays. Returns the number of cells,
+    # of skipped cells, of failed cells per message, the sizes of the shared design matrices and the messages of print_info,
+    # which are reported by the main process (the workers have no progress callback and print nothing themselves)
+    skipped = progress_state['skipped']
+    progress_state.update(failures={}, messages=[])
+    group_sizes = fit_cells(*worker_state['args'], cell_index=cell_index)
+    return len(cell_index), progress_state['skipped'] - skipped, progress_state['failures'], group_sizes, progress_state['messages']
+
+
+@timed('fitting')
+def fit_cells_parallel(data, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index=None):
+    # Distributes the cells in cell_index (all cells if None) over a pool of processes. The data cube, the time series of
+    # the proxies and the result arrays are placed in shared memory, so that none of them has to be pickled per worker or
+    # cell. BLAS is limited to a share of the cores, so that the workers don't oversubscribe the machine. A worker that
+    # can't be started (e.g. the model can't be imported in it) stops the calculation instead of being started again.
+    # Returns the sizes of the shared design matrices of all workers (see fit_cells_batched)
+    jobs = int(ini.get('jobs', 1))
+    if cell_index is None:
+        cell_index = np.arange(int(np.prod(data.o3.shape[1:])))
+    chunks = [i for i in np.array_split(cell_index, max(1, min(len(cell_index), jobs * 4))) if len(i)]
+    if not chunks:
+        return []
+
+    blocks = []
+    group_sizes = []
+    attached = []
+    thread_vars = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+    thread_env = {i: os.environ.get(i) for i in thread_vars}
+    try:
+        o3_desc = share_array(np.ma.getdata(data.o3), blocks)
+        mask_desc = share_array(np.ma.getmaskarray(data.o3), blocks)
+        proxy_desc = share_proxies(proxies, blocks)
+        result_desc = [share_array(i, blocks) for i in results]
+
+        # Everything but the data cube is small and is sent once per worker
+        data_worker = copy.copy(data)
+        data_worker.o3 = None
+
+        threads = str(max(1, (os.cpu_count() or 1) // jobs))
+        for i in thread_vars:
+            os.environ[i] = threads
+
+        with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn'), initializer=fit_cells_init, initargs=(data_worker, o3_desc, mask_desc, proxy_desc, ini, X_1_string, X_proxy_size, X_string, result_desc)) as pool:
+            futures = [pool.submit(fit_cells_worker, i) for i in chunks]
+            try:
+                for future in as_completed(futures):
+                    done, skipped, failures, sizes, messages = future.result()
+                    for message in messages:
+                        print_info(message)
+                    for message, cells in failures.items():
+                        report_failure(message, cells)
+                    group_sizes.extend(sizes)
+                    report_progress(done=done, skipped=skipped)
+            except BrokenProcessPool:
+                raise Exception('A process of the parallel calculation (see jobs) stopped before its cells were done, e.g. because the IUP Regression Model could not be imported in it. Programs that run the model with jobs above 1 have to start it inside "if __name__ == \'__main__\':", or use jobs = 1.')
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+        for k, i in enumerate(results):
+            i[...] = attach_array(result_desc[k], attached)
+    finally:
+        for i in thread_vars:
+            if thread_env[i] is None:
+                os.environ.pop(i, None)
+            else:
+                os.environ[i] = thread_env[i]
+        for shm in attached:
+            shm.close()
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return group_sizes
+
+
+@functools.lru_cache(maxsize=256)
+def get_trend_groups(X_string):
+    # get_string_groups of a tuple of coefficient names. Cached, as get_trend_weights is used for every cell of the
+    # bootstrap and every analysis window of the sensitivity trends. The dict must not be changed
+    return get_string_groups(list(X_string))
+
+
+def get_trend_weights(X_string, ini, y_mean):
+    # Matrix W that turns the coefficients of a cell into its trends (trends = W @ betaa), the same way calc_trend does
+    trend_string_index = [j for j, s in enumerate(X_string) if 'trend' in s]
+    mult = (1 if ini.get('o3_var_anom', 'False') == 'True' else 100 / y_mean) * (10 if ini.get('averaging_window', None) else 120)
+
+    W = []
+    if ini.get('anomaly', '') == 'True' and ini.get('anomaly_method', 'rel') == 'rel':
+        W.append(np.zeros(len(X_string)))
+        W[-1][trend_string_index] = 120 * 100 / len(trend_string_index)
+    else:
+        for keys, indices in get_trend_groups(tuple(X_string)).items():
+            if keys[0] == 'intercept' or keys[0] == 'proxy':
+                continue
+            W.append(np.zeros(len(X_string)))
+            if keys[1] == 'month-of-the-year':
+                W[-1][indices] = mult / len(indices)
+            else:
+                W[-1][indices[0]] = mult
+    return np.array(W).reshape(-1, len(X_string))
+
+
+def bootstrap_cell(X, y, betaa, W, replicates, block_length, percentiles, rng, solver='inv', blocks=None):
+    # Moving block bootstrap of one cell. The residuals of the fit are resampled in blocks of block_length consecutive
+    # time steps and added to the fit, and every replicate is fitted again with the factorized X matrix of the cell.
+    # Returns the percentiles of the trends of the replicates (trend, percentile)
+    n = len(y)
+    block_length = min(block_length, n)
+    n_blocks = -(-n // block_length)
+    resid = y - X @ betaa
+
+    # The fit is linear, so the trends of a replicate are the trends of the fit plus W @ A @ (resampled residuals). The
+    # contribution of every block position and every possible block start is calculated once (n_trends, n_blocks, n_starts),
+    # so that a replicate only sums one entry per block position, which makes thousands of replicates cheap
+    # Only W @ A is needed, which the solvers of the normal equations get from one solve with W instead of the full inverse
+    G = np.zeros((len(W), n_blocks * block_length))
+    if solver in ['inv', 'cholesky', 'block']:
+        G[:, :n] = np.linalg.solve(X.T @ X, W.T).T @ X.T
+    else:
+        G[:, :n] = W @ least_squares_operator(X, solver, blocks)[0]
+    windows = np.lib.stride_tricks.sliding_window_view(resid, block_length)
+    C = np.einsum('tbl,sl->tbs', G.reshape(len(W), n_blocks, block_length), windows)
+
+    starts = rng.integers(0, n - block_length + 1, (replicates, n_blocks))
+    deviation = C[:, np.arange(n_blocks), starts].sum(axis=-1)
+    return (W @ betaa)[:, None] + np.percentile(deviation, percentiles, axis=-1).T
+
+
+@timed('bootstrap')
+def bootstrap_trends(ini, X_string, results, interval, cell_index=None, offset=0):
+    # Percentile intervals of the trends of the cells in cell_index (indices of the flattened grid, all cells if None) from
+    # a moving block bootstrap (see bootstrap_cell), written into interval (the shape of the trends with an additional axis
+    # for the lower and upper bound). Every cell has its own random numbers from bootstrap_seed and its index in the
+    # complete grid (offset is the index of the first cell), so the intervals don't depend on slabs, jobs or the order
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+    replicates = int(ini.get('bootstrap_replicates', 1000))
+    level = float(ini.get('bootstrap_level', 95))
+    percentiles = [(100 - level) / 2, 100 - (100 - level) / 2]
+    seed = int(ini.get('bootstrap_seed', 0))
+    solver = ini.get('solver', 'inv')
+
+    n_time = X_all.shape[0]
+    n_cells = int(np.prod(X_all.shape[1:-1]))
+    X_all_flat = X_all.reshape(n_time, n_cells, len(X_string))
+    betaa_flat = betaa_all.reshape(n_cells, len(X_string))
+    data_all_flat = data_all.reshape(n_time, n_cells)
+    trenda_flat = trenda_z.reshape(n_cells, -1)
+    interval_flat = interval.reshape(n_cells, -1, 2)
+    if cell_index is None:
+        cell_index = np.arange(n_cells)
+
+    def bootstrap_chunk(chunk):
+        for k in chunk:
+            if np.all(np.isnan(trenda_flat[k])):
+                continue
+            valid = ~np.isnan(data_all_flat[:, k])
+            cols = ~np.isnan(betaa_flat[k])
+            X = np.nan_to_num(X_all_flat[valid, k][:, cols].astype(float))
+            y = data_all_flat[valid, k]
+            W = get_trend_weights(np.array(X_string)[cols], ini, np.mean(y))
+            # A single trend (e.g. only data after the inflection point) is used for every trend of the cell, like in fit_cell
+            if len(W) not in [1, trenda_flat.shape[1]]:
+                continue
+            block_length = int(ini.get('bootstrap_block_length', 0)) or max(1, round(len(y) ** (1 / 3)))
+            rng = np.random.default_rng([seed, offset + int(k)])
+            try:
+                interval_flat[k] = bootstrap_cell(X, y, betaa_flat[k, cols].astype(float), W, replicates, block_length, percentiles, rng, solver, get_month_blocks(np.array(X_string)[cols]))
+            except np.linalg.LinAlgError:
+                continue
+
+    # The cells are distributed over jobs threads, numpy releases the GIL in the larger operations
+    jobs = int(ini.get('jobs', 1))
+    chunks = [i for i in np.array_split(cell_index, max(1, min(len(cell_index), jobs * 4))) if len(i)]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(bootstrap_chunk, chunks))
+
+
+def get_year_range(text):
+    # Every year from the first to the last year of a setting like "1985, 2005" (or only the year of "1985")
+    years = [int(i) for i in re.split(r',\s*', str(text).strip())]
+    return list(range(years[0], years[-1] + 1))
+
+
+def get_sensitivity_windows(ini, fit_time):
+    # Analysis windows (first year, last year) of the sensitivity trends: every start year of sensitivity_start_years with
+    # every end year of sensitivity_end_years (default the last year of the data), or with sensitivity_window_length years
+    if not ini.get('sensitivity_start_years'):
+        return []
+    starts = get_year_range(ini['sensitivity_start_years'])
+    if ini.get('sensitivity_window_length'):
+        return [(i, i + int(ini['sensitivity_window_length']) - 1) for i in starts]
+    ends = get_year_range(ini.get('sensitivity_end_years', fit_time[-1].year))
+    return [(i, j) for i in starts for j in ends if j > i]
+
+
+def get_window_sums(X, y, valid, slot, n_years):
+    # Cumulative sums over the years of the rank-one terms x xᵀ and x y of the rows of a cell, the sums of the rows of any
+    # range of years are then the difference of two of them. The normal equations of the fit are the sums of the rows
+    # after a gap (_gap, see ar1_transform) and of all other rows. The other rows also get the sums with the previous
+    # valid row (l), which give the normal equations of the Prais-Winsten transformed X for every autocorrelation
+    rows = np.flatnonzero(valid)
+    gap = np.zeros(len(y), dtype=bool)
+    gap[rows] = True
+    if len(rows) > 1:
+        gap[rows[1:]] = X[rows[1:], 1] - X[rows[:-1], 1] > 1
+    X_lag, y_lag = np.zeros_like(X), np.zeros_like(y)
+    X_lag[rows[1:]] = X[rows[:-1]]
+    y_lag[rows[1:]] = y[rows[:-1]]
+    other = valid & ~gap
+
+    def blocks(values, mask):
+        # Values of the rows in mask on a (year, month) grid, the other rows are 0
+        grid = np.zeros((n_years * 12,) + values.shape[1:])
+        grid[slot] = np.where(mask.reshape((-1,) + (1,) * (values.ndim - 1)), values, 0)
+        return grid.reshape((n_years, 12) + values.shape[1:])
+
+    X_gap, y_gap = blocks(X, gap), blocks(y, gap)
+    X_other, y_other, X_other_lag, y_other_lag = blocks(X, other), blocks(y, other), blocks(X_lag, other), blocks(y_lag, other)
+    # Sums of the products of the rows of every year as (year, coefficient, coefficient) matrix products
+    X_gap_T, X_other_T, X_lag_T = np.swapaxes(X_gap, 1, 2), np.swapaxes(X_other, 1, 2), np.swapaxes(X_other_lag, 1, 2)
+    sums = {
+        'xx_gap': X_gap_T @ X_gap,
+        'xy_gap': (X_gap_T @ y_gap[..., None])[..., 0],
+        'xx': X_other_T @ X_other,
+        'xxl': X_other_T @ X_other_lag,
+        'xlxl': X_lag_T @ X_other_lag,
+        'xy': (X_other_T @ y_other[..., None])[..., 0],
+        'xyl': (X_other_T @ y_other_lag[..., None])[..., 0],
+        'xly': (X_lag_T @ y_other[..., None])[..., 0],
+        'xlyl': (X_lag_T @ y_other_lag[..., None])[..., 0],
+        'nonzero': np.sum(blocks((X != 0).astype(float), valid), axis=1),
+    }
+    sums = {key: np.concatenate([np.zeros((1,) + value.shape[1:]), np.cumsum(value, axis=0)]) for key, value in sums.items()}
+    return sums, gap, X_lag, y_lag
+
+
+def get_window_X_1(data, ini, X_1_string, rows):
+    # X_1 of a fit of only the rows rows of the time axis (relative to date_start), like get_X_1 builds it after setting
+    # start_date and end_date to the window. Its columns start at the window instead of the complete time series
+    window_data = copy.copy(data)
+    window_data.date_start, window_data.date_end = data.date_start + rows.start, data.date_start + rows.stop
+    if data.inflection_index is not None and data.inflection_index[0] is not None:
+        window_data.inflection_index = [int(np.clip(data.inflection_index[0] - rows.start, 0, rows.stop - rows.start))]
+    return get_X_1(np.ones(rows.stop - rows.start, dtype=bool), ini, X_1_string, window_data)
+
+
+def window_trend(X, y, valid, sums, gap, X_lag, y_lag, blocks, rows, X_string, ini, skip_percentage, X_1_window, col_index, proxy_index):
+    # Trends of one cell in the years blocks[0] to blocks[1] (exclusive) with the rows rows of the time axis, like
+    # calc_trend would calculate them for this window, from the cumulative sums of get_window_sums. X has a column for
+    # every name in X_string (col_index is their index in the X_string of the model) and then a column for every proxy
+    # column in proxy_index that is 1 where the proxy isn't 0. X_1_window is the X_1 of the window (see get_window_X_1)
+    S = {key: value[blocks[1]] - value[blocks[0]] for key, value in sums.items()}
+    window = np.arange(rows.start, rows.stop)[valid[rows]]
+    n = len(window)
+    if n == 0 or n / (rows.stop - rows.start) < skip_percentage or n - 1 < 10:
+        return None
+
+    # Columns with more than two values in the window, like in fit_cell
+    n_cols = len(X_string)
+    act = S['nonzero'][:n_cols] > 2
+    if act.sum() <= 1:
+        return None
+
+    # A fit of only the window normalizes the proxies over the window (see normalize). The normalization only changes
+    # the values that aren't 0, so the columns of the window are the linear combination T of the columns of X
+    T = np.eye(X.shape[1], n_cols)
+    for i, j in enumerate(proxy_index):
+        values = X[window, j][X[window, n_cols + i] != 0]
+        if not act[j]:
+            continue
+        if values.max() == values.min():
+            return None
+        T[j, j] = 2 / (values.max() - values.min())
+        T[n_cols + i, j] = -2 * values.min() / (values.max() - values.min()) - 1
+
+    # The rows after a gap like in a fit of only the window: ar1_transform compares the second column of the X matrix,
+    # which is taken from X_1_window if it's a column of X_1 (its values can round differently than in the complete
+    # time series). The first row of the window is always a row after a gap. Rows with another gap flag than in the
+    # complete time series are moved between the sums of the rows after a gap and the sums of the differenced rows
+    second = np.flatnonzero(act)[1]
+    if col_index[second] < X_1_window.shape[1]:
+        column = X_1_window[window - rows.start, col_index[second]]
+    else:
+        column = X[window] @ T[:, second]
+    window_gap = np.ones(n, dtype=bool)
+    window_gap[1:] = column[1:] - column[:-1] > 1
+    for f, sign in zip(window[window_gap != gap[window]], np.where(window_gap[window_gap != gap[window]], 1, -1)):
+        S['xx'] -= sign * np.outer(X[f], X[f])
+        S['xxl'] -= sign * np.outer(X[f], X_lag[f])
+        S['xlxl'] -= sign * np.outer(X_lag[f], X_lag[f])
+        S['xy'] -= sign * X[f] * y[f]
+        S['xyl'] -= sign * X[f] * y_lag[f]
+        S['xly'] -= sign * X_lag[f] * y[f]
+        S['xlyl'] -= sign * X_lag[f] * y_lag[f]
+        S['xx_gap'] += sign * np.outer(X[f], X[f])
+        S['xy_gap'] += sign * X[f] * y[f]
+    for key in ['xx', 'xxl', 'xlxl', 'xx_gap']:
+        S[key] = T.T @ S[key] @ T
+    for key in ['xy', 'xyl', 'xly', 'xlyl', 'xy_gap']:
+        S[key] = T.T @ S[key]
+    sub = np.ix_(act, act)
+    beta = np.linalg.solve((S['xx_gap'] + S['xx'])[sub], (S['xy_gap'] + S['xy'])[act])
+
+    # Autocorrelation of the residuals of the window (see calc_trend)
+    N = y[window] - (X[window] @ T)[:, act] @ beta
+    n_pairs = np.sum(valid[rows][1:] & valid[rows][:-1])
+    phi = ar1_coefficient(N, np.var(N), n_pairs, n)
+
+    XstarTXstar = (1 - phi ** 2) * S['xx_gap'] + S['xx'] - phi * (S['xxl'] + S['xxl'].T) + phi ** 2 * S['xlxl']
+    XstarTYstar = (1 - phi ** 2) * S['xy_gap'] + S['xy'] - phi * (S['xyl'] + S['xly']) + phi ** 2 * S['xlyl']
+    betaa = np.linalg.solve(XstarTXstar[sub], XstarTYstar[act])
+    return get_trend_weights(X_string[act], ini, np.mean(y[window])) @ betaa
+
+
+@timed('sensitivity')
+def sensitivity_trends(data, proxies, ini, X_1_string, X_proxy_size, X_string, results, window_trends, cell_index=None):
+    # Trends of the cells in cell_index (indices of the flattened grid, all cells if None) for every analysis window of
+    # get_sensitivity_windows, written into window_trends (the shape of the trends with an additional last axis for the
+    # windows). Instead of fitting every window again, the normal equations of a cell are summed up once per year (see
+    # get_window_sums) and the normal equations of a window are the sums of its years: the rows that enter a window are
+    # added and the rows that leave it are removed. The X matrix of the complete time series (see get_cell_X) is
+    # changed to the one of the window (normalization of the proxies, rows after a gap) in window_trend, only the
+    # anomalies use the climatology of the complete time series. Windows that are too short (see skip_percentage) stay NaN
+    windows = get_sensitivity_windows(ini, data.time)
+    skip_percentage = float(ini.get('skip_percentage', 0.75))
+
+    # The rows of the time axis on a (year, month) grid, the windows are ranges of years
+    month_number = data.month_number[data.date_start:data.date_end]
+    year_values, year_index = np.unique((month_number - 1) // 12, return_inverse=True)
+    slot = year_index * 12 + (month_number - 1) % 12
+    row_start = np.searchsorted(year_index, np.arange(len(year_values) + 1))
+    bounds = [(np.searchsorted(year_values, a), np.searchsorted(year_values, b, 'right')) for a, b in windows]
+
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    window_flat = window_trends.reshape(len(cells), -1, len(windows))
+    if cell_index is None:
+        cell_index = np.arange(len(cells))
+    window_rows = [slice(row_start[a], row_start[b]) for a, b in bounds]
+    X_1_windows = [get_window_X_1(data, ini, X_1_string, rows) for rows in window_rows]
+
+    def sensitivity_chunk(chunk):
+        it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+        for k in chunk:
+            # The X matrix of the cell is built again like in fit_cell, the one in the results is only saved as float32
+            it.multi_index = cells[k]
+            y = np.ma.filled(data.o3[(slice(data.date_start, data.date_end),) + cells[k]].astype(float), np.nan)
+            if np.all(np.isnan(y)):
+                continue
+            X_full, X_clean, row_mask, col_mask = get_cell_X(~np.isnan(y), it, data, proxies, ini, X_1_string, X_proxy_size, X_string)
+            valid = ~row_mask
+            cols = ~col_mask
+            # The proxy columns get a column that is 1 where the proxy isn't 0 or missing (see window_trend)
+            proxy_index = np.flatnonzero(np.flatnonzero(cols) >= len(X_1_string))
+            X = np.zeros((len(y), X_clean.shape[1] + len(proxy_index)))
+            X[valid, :X_clean.shape[1]] = X_clean
+            X[valid, X_clean.shape[1]:] = np.nan_to_num(X_full[valid][:, cols][:, proxy_index]) != 0
+            y = np.where(valid, y, 0)
+            sums, gap, X_lag, y_lag = get_window_sums(X, y, valid, slot, len(year_values))
+            for w, blocks in enumerate(bounds):
+                try:
+                    trends = window_trend(X, y, valid, sums, gap, X_lag, y_lag, blocks, window_rows[w], np.array(X_string)[cols], ini, skip_percentage, X_1_windows[w], np.flatnonzero(cols), proxy_index)
+                except np.linalg.LinAlgError:
+                    continue
+                # A single trend (e.g. a window without the inflection point) is used for every trend of the cell, like in fit_cell
+                if trends is not None and len(trends) in [1, window_flat.shape[1]]:
+                    window_flat[k, :, w] = trends
+
+    # The cells are distributed over jobs threads, numpy releases the GIL in the larger operations
+    jobs = int(ini.get('jobs', 1))
+    chunks = [i for i in np.array_split(cell_index, max(1, min(len(cell_index), jobs * 4))) if len(i)]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(sensitivity_chunk, chunks))
+
+
+def get_inflection_candidates(ini, fit_time):
+    # Rows of the time axis of the fits that are tested as inflection points by the scan mode: every inflection_scan_step
+    # months from the first to the last month of inflection_scan, or the years of these months if the data is averaged
+    # (see averaging_window). Returns an empty array if the scan is off
+    if not ini.get('inflection_scan'):
+        return np.array([], dtype=int)
+    if ini.get('inflection_method') not in ['pwl', 'ind'] or 'inflection_point' not in ini:
+        raise Exception('The inflection point scan needs an inflection point and an inflection method, either "pwl" for piece-wise linear trends or "ind" for independent trends. The trends are still calculated with the inflection point.')
+    months = [get_month_number(dt.datetime.strptime(i, '%Y-%m')) for i in re.split(r',\s*', ini['inflection_scan'].strip())]
+    candidates = np.arange(months[0], months[-1] + 1, int(ini.get('inflection_scan_step', 1)))
+    fit_months = to_datetime64(fit_time).astype('datetime64[M]').astype(np.int64) + 1970 * 12 + 1
+    if averaging_window_text_check(ini.get('averaging_window', '')) != 0:
+        fit_months, candidates = (fit_months - 1) // 12, np.unique((candidates - 1) // 12)
+
+    # Only candidates in the time series, an inflection point at the first time step would leave nothing before it
+    rows = np.minimum(np.searchsorted(fit_months, candidates), len(fit_months) - 1)
+    rows = rows[(fit_months[rows] == candidates) & (rows > 0)]
+    if len(rows) == 0:
+        raise Exception('No month of the inflection point scan ' + ini['inflection_scan'] + ' is in the time series of the data.')
+    return rows
+
+
+def get_inflection_rss(y, it, data, proxies, ini, X_1_string, X_proxy_size, X_string):
+    # RSS of the least squares fit (without the autocorrelation correction) of a cell with the inflection point of data,
+    # from the X matrix of get_cell_X like in fit_cell. y is the time series of the cell. NaN if the fit isn't possible
+    X, X_clean, row_mask, col_mask = get_cell_X(~np.isnan(y), it, data, proxies, ini, X_1_string, X_proxy_size, X_string)
+    if X_clean.shape[1] == 0:
+        return np.nan
+    try:
+        beta = np.linalg.lstsq(X_clean, y[~row_mask], rcond=None)[0]
+    except np.linalg.LinAlgError:
+        return np.nan
+    return np.sum((y[~row_mask] - X_clean @ beta) ** 2)
+
+
+def get_inflection_profile(X, y, rows, steps, ramps, candidates):
+    # RSS of the least squares fit (without the autocorrelation correction) of a cell for every inflection point in
+    # candidates (rows of the time axis). y are the values of the valid rows rows of the time axis and X their X matrix
+    # without an inflection point. An inflection point adds the columns steps (the seasonal terms of the intercept, only
+    # for ind) and ramps (the seasonal terms of the trend) after it, multiplied with 1 and with the time steps since the
+    # inflection point. Together with X they span the same space as the X matrix of get_X_1 with this inflection point.
+    # X is fitted once, every candidate only fits the part of its columns that X doesn't explain (Frisch-Waugh), whose
+    # normal equations are sums over the rows after the candidate, so all candidates come from the same cumulative sums
+    Q = np.linalg.qr(X)[0]
+    res = y - Q @ (Q.T @ y)
+
+    # The added columns of an inflection point c are P in the rows from c on, minus c times the ramps in the columns of
+    # the ramps (the columns after the k columns of the steps)
+    P = np.concatenate([steps, ramps * (rows + 1)[:, None]], axis=1)
+    k = steps.shape[1]
+    last = len(rows) - 1 - np.searchsorted(rows, candidates)
+
+    def suffix(values):
+        # Sums of values over the rows from every candidate to the end
+        sums = np.cumsum(values[::-1], axis=0)[np.maximum(last, 0)]
+        sums[last < 0] = 0
+        return sums
+
+    c = candidates.astype(float)[:, None, None]
+    GG = suffix(P[:, :, None] * P[:, None, :])
+    PR = c * suffix(P[:, :, None] * ramps[:, None, :])
+    GG[:, :, k:] -= PR
+    GG[:, k:, :] -= np.swapaxes(PR, 1, 2)
+    GG[:, k:, k:] += c ** 2 * suffix(ramps[:, :, None] * ramps[:, None, :])
+    QG = suffix(Q[:, :, None] * P[:, None, :])
+    QG[:, :, k:] -= c * suffix(Q[:, :, None] * ramps[:, None, :])
+    S = GG - np.swapaxes(QG, 1, 2) @ QG
+    z = suffix(P * res[:, None])
+    z[:, k:] -= c[..., 0] * suffix(ramps * res[:, None])
+
+    # Inflection points with more than two values of every added column after them (and of every intercept and trend
+    # column before them for ind). For the others fit_cell would fit without these columns, they stay NaN here and are
+    # fitted with get_inflection_rss
+    nonzero = np.concatenate([steps != 0, ramps != 0], axis=1).astype(float)
+    after = suffix(nonzero)
+    use = np.all(after > 2, axis=1)
+    if steps.shape[1]:
+        use &= np.all(nonzero.sum(axis=0) - after > 2, axis=1)
+    # Added columns that X explains almost completely (e.g. ramps that differ from the trend in only a few rows) leave
+    # S to rounding errors, these inflection points are fitted with get_inflection_rss as well
+    use &= np.all(np.diagonal(S, axis1=1, axis2=2) > 1e-6 * np.diagonal(GG, axis1=1, axis2=2), axis=1)
+
+    profile = np.full(len(candidates), np.nan)
+    try:
+        profile[use] = res @ res - np.sum(z[use] * np.linalg.solve(S[use], z[use][..., None])[..., 0], axis=1)
+    except np.linalg.LinAlgError:
+        # One of the inflection points can't be fitted, the others are solved one by one
+        for j in np.flatnonzero(use):
+            try:
+                profile[j] = res @ res - z[j] @ np.linalg.solve(S[j], z[j])
+            except np.linalg.LinAlgError:
+                continue
+    return profile
+
+
+@timed('inflection scan')
+def inflection_scan(data, proxies, ini, X_proxy_size, X_string, results, inflection_rss, candidates, cell_index=None):
+    # RSS profile of the inflection points in candidates (see get_inflection_candidates) for the cells in cell_index
+    # (indices of the flattened grid, all cells if None), written into inflection_rss (the grid with an additional last
+    # axis for the candidates). The X matrix of the trend without an inflection point (see get_cell_X) is built once
+    # per cell, the columns of every inflection point are added with get_inflection_profile. The inflection points that
+    # it can't fit (e.g. with two or less values of a column before them) are fitted one by one with get_inflection_rss
+    ini_fixed = {key: value for key, value in ini.items() if key != 'inflection_method'}
+    X_1_string_inflection = X_string[:len(X_string) - X_proxy_size]
+    X_string_inflection = X_string
+    X_1_string = calc_new_Xstring(['intercept', 'trend'], ini_fixed)
+    X_string = X_1_string + X_string[len(X_string) - X_proxy_size:]
+
+    skip_percentage = float(ini.get('skip_percentage', 0.75))
+
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    rss_flat = inflection_rss.reshape(len(cells), len(candidates))
+    if cell_index is None:
+        cell_index = np.arange(len(cells))
+
+    def scan_chunk(chunk):
+        it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+        data_candidate = copy.copy(data)
+        for k in chunk:
+            it.multi_index = cells[k]
+            y = np.ma.filled(data.o3[(slice(data.date_start, data.date_end),) + cells[k]].astype(float), np.nan)
+            # Only the cells that fit_cell doesn't skip, also if their trend couldn't be calculated
+            if np.mean(~np.isnan(y)) < skip_percentage:
+                continue
+            X, X_clean, row_mask, col_mask = get_cell_X(~np.isnan(y), it, data, proxies, ini_fixed, X_1_string, X_proxy_size, X_string)
+            rows = np.flatnonzero(~row_mask)
+            names = np.array(X_string)[~col_mask]
+            steps = X_clean[:, np.char.startswith(names, 'intercept')]
+            ramps = X_clean[:, np.char.startswith(names, 'trend')] / (rows + 1)[:, None]
+            if ini['inflection_method'] == 'pwl':
+                steps = steps[:, :0]
+            rss_flat[k] = get_inflection_profile(X_clean, y[rows], rows, steps, ramps, candidates)
+            for j in np.flatnonzero(np.isnan(rss_flat[k])):
+                data_candidate.inflection_index = [candidates[j]]
+                rss_flat[k, j] = get_inflection_rss(y, it, data_candidate, proxies, ini, X_1_string_inflection, X_proxy_size, X_string_inflection)
+
+    # The cells are distributed over jobs threads like in sensitivity_trends
+    jobs = int(ini.get('jobs', 1))
+    chunks = [i for i in np.array_split(cell_index, max(1, min(len(cell_index), jobs * 4))) if len(i)]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(scan_chunk, chunks))
+
+
+def get_best_inflection(inflection_rss, candidate_time):
+    # Fractional year of the inflection point with the smallest RSS of every cell (NaN if no candidate could be fitted)
+    years = convert_datetime_to_fractional(candidate_time)
+    valid = ~np.all(np.isnan(inflection_rss), axis=-1)
+    best = np.full(inflection_rss.shape[:-1], np.nan)
+    best[valid] = years[np.nanargmin(inflection_rss[valid], axis=-1)]
+    return best
+
+
+def get_slabs(data, ini):
+    # Splits the data into slabs along the first dimension after time, either with slab_size indices per slab or as many
+    # indices as fit into memory_budget (in MB). Returns the slab indices of the grid (without time)
+    grid_shape = data.o3.shape[1:]
+    if not grid_shape:
+        return [()]
+    if ini.get('slab_size'):
+        size = int(ini['slab_size'])
+    elif ini.get('memory_budget'):
+        # The data of a slab is held about four times (read, mask, filled copy, averaged or anomalies) and up to two slabs
+        # are in memory at once, because the next one is read while the current one is calculated
+        slab_bytes = (data.date_end - data.date_start) * int(np.prod(grid_shape[1:])) * 8 * 4 * 2
+        size = int(float(ini['memory_budget']) * 1e6 // slab_bytes)
+    else:
+        size = grid_shape[0]
+    size = max(1, size)
+    return [(slice(i, min(i + size, grid_shape[0])),) for i in range(0, grid_shape[0], size)]
+
+
+def load_slab(data, slab, ini, fit_time, time, check, month_index):
+    # Returns a shallow copy of data with the o3 values of one slab (see get_slabs) on the time axis of the fits, averaged
+    # over the averaging window and converted to anomalies if needed. The climatology of the slab is saved in data.climatology
+    data_slab = copy.copy(data)
+    o3 = data.o3[(slice(data.date_start, data.date_end),) + slab]
+    if isinstance(o3, LazyCube):
+        o3 = o3.read()
+    if check != 0:
+        o3 = np.ma.masked_invalid(average_time_windows(np.ma.filled(o3.astype(float), np.nan), time, check, month_index, float(ini.get('skip_percentage', 0.75))))
+
+    data_slab.o3 = o3
+    data_slab.time = fit_time
+    data_slab.date_start, data_slab.date_end = 0, len(fit_time)
+    if slab:
+        setattr(data_slab, data.dim_array[1], getattr(data, data.dim_array[1])[slab[0]])
+
+    data_slab.climatology = None
+    if ini.get('anomaly', 'False') == 'True':
+        data_slab.climatology = calc_anomalies(data_slab, ini)
+
+    return data_slab
+
+
+def iterate_slabs(data, ini, fit_time, time, check, month_index):
+    # Yields every slab with its data, while a background thread already loads the next slab. The thread reads the file
+    # through LazyCube.read, which holds netcdf_lock, so any other netCDF access during the loop has to hold it as well
+    slabs = get_slabs(data, ini)
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        future = reader.submit(load_slab, data, slabs[0], ini, fit_time, time, check, month_index)
+        for k, slab in enumerate(slabs):
+            data_slab = future.result()
+            if k + 1 < len(slabs):
+                future = reader.submit(load_slab, data, slabs[k + 1], ini, fit_time, time, check, month_index)
+            if len(slabs) > 1:
+                print_info('Slab ' + str(k + 1) + ' of ' + str(len(slabs)) + ': ' + data.dim_array[1] + ' ' + str(slab[0].start) + ' to ' + str(slab[0].stop - 1))
+            yield slab, data_slab
+
+
+# Settings that change the fit without changing the X matrix or the data
+cache_settings = ['solver', 'o3_var_anom', 'averaging_window', 'anomaly', 'anomaly_method', 'skip_percentage']
+
+
+@timed('cache')
+def get_cache_keys(data, proxies, ini, X_1_string, X_proxy_size, X_string):
+    # Returns a hash for every cell of the data, made from the time series of the cell, its complete X matrix (which
+    # includes the proxies, their methods and the inflection points) and the settings that change the fit
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    n_time = data.date_end - data.date_start
+    data_stack = np.ma.filled(data.o3[data.date_start:data.date_end].astype(float), np.nan).reshape(n_time, len(cells)).T
+    settings = '\n'.join([ver] + list(X_string) + [i + ' = ' + str(ini.get(i, '')) for i in cache_settings]).encode()
+
+    it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+    design_hashes = {}
+    keys = []
+    for k, cell in enumerate(cells):
+        tag_key = get_proxy_tag_key(proxies, data, cell)
+        if tag_key not in design_hashes:
+            it.multi_index = cell
+            X_full = np.concatenate([get_X_1(np.ones(n_time, dtype=bool), ini, X_1_string, data), get_X_2(proxies, np.ones(n_time, dtype=bool), X_proxy_size, it, data)], axis=1)
+            design_hashes[tag_key] = hashlib.sha256(settings + X_full.tobytes()).digest()
+        keys.append(hashlib.sha256(design_hashes[tag_key] + data_stack[k].tobytes()).hexdigest())
+
+    return keys
+
+
+def get_cache_file(ini, key):
+    return os.path.join(ini['cache_path'], key[:2], key + '.npz')
+
+
+@timed('cache')
+def load_cached_fits(ini, keys, data, results, cell_index=None):
+    # Writes the cached fits into the result arrays and returns the indices (of the flattened grid) of the cells that
+    # still have to be calculated. Only the cells in cell_index are looked up if it is given
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+    cells = list(np.ndindex(data.o3.shape[1:]))
+    if cell_index is None:
+        cell_index = np.arange(len(cells))
+    missing = []
+
+    for k in cell_index:
+        path = get_cache_file(ini, keys[k])
+        try:
+            with np.load(path) as f:
+                idx = cells[k]
+                trenda_z[idx] = f['trend']
+                siga_z[idx] = f['signi']
+                X_all[(slice(None),) + idx] = f['X']
+                beta_all[idx] = f['beta']
+                betaa_all[idx] = f['betaa']
+                covbetaa_all[idx] = f['covbetaa']
+                cond_all[idx] = f['cond']
+                data_all[(slice(None),) + idx] = np.ma.filled(data.o3[(slice(None),) + idx][data.date_start:data.date_end], np.nan)
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            missing.append(k)
+
+    print_info(str(len(cell_index) - len(missing)) + ' of ' + str(len(cell_index)) + ' cells were read from the cache')
+    return np.array(missing, dtype=int)
+
+
+@timed('cache')
+def store_cached_fits(ini, keys, cell_index, results):
+    # Saves the fits of the newly calculated cells (cells that were skipped or failed are not saved) and removes the
+    # least recently used fits if the cache is larger than cache_size (in MB)
+    trenda_z, siga_z, X_all, beta_all, betaa_all, data_all, covbetaa_all, cond_all = results
+    cells = list(np.ndindex(cond_all.shape))
+
+    for k in cell_index:
+        idx = cells[k]
+        if np.isnan(cond_all[idx]):
+            continue
+        path = get_cache_file(ini, keys[k])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, trend=trenda_z[idx], signi=siga_z[idx], X=X_all[(slice(None),) + idx], beta=beta_all[idx], betaa=betaa_all[idx], covbetaa=covbetaa_all[idx], cond=cond_all[idx])
+        os.replace(path + '.tmp', path)
+
+    evict_cache(ini['cache_path'], float(ini.get('cache_size', 1024)) * 1e6)
+
+
+def get_cached_files(cache_path):
+    if not os.path.isdir(cache_path):
+        return []
+    return [entry for folder in os.scandir(cache_path) if folder.is_dir() and len(folder.name) == 2 for entry in os.scandir(folder.path) if entry.name.endswith('.npz')]
+
+
+def evict_cache(cache_path, max_size):
+    # Removes the least recently used fits until the cache is smaller than max_size (in bytes)
+    files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in get_cached_files(cache_path))
+    size = sum(i[1] for i in files)
+    for mtime, file_size, path in files:
+        if size <= max_size:
+            break
+        os.remove(path)
+        size -= file_size
+
+
+def clear_cache(ini):
+    # Removes every cached fit from the cache folder
+    files = get_cached_files(ini.get('cache_path', ''))
+    for entry in files:
+        os.remove(entry.path)
+    print(str(len(files)) + ' cached fits were removed from ' + str(ini.get('cache_path', '')))
+
+
 # Main program to run
+@timed('iup_reg_model')
 def iup_reg_model(data, proxies, ini):
     data, proxies = get_proxy_time_overlap(ini, proxies, data)
     data = set_data_limits(data, ini)
@@ -2920,9 +3030,11 @@ def iup_reg_model(data, proxies, ini):
 
     # check how the data should be averaged
     check = averaging_window_text_check(ini.get('averaging_window', ''))
-    anom_check = ini.get('anomaly', 'False')
-    time = pd.DatetimeIndex(data.time[data.date_start:data.date_end])
-    time_log = np.unique(time.year, return_index=True)[1] if check != 0 else slice(None)
+    time = pd.DatetimeIndex(data.months[data.date_start:data.date_end])
+    month_index = None
+    if check == 2:
+        month_index = re.split(r',\s*', ini.get('averaging_window', ''))
+        month_index = np.array([int(num) for num in month_index])
 
     # Creating new X_string depending on method used for trend and intercept
     X_1_string = calc_new_Xstring(X_string, ini)
@@ -2933,129 +3045,227 @@ def iup_reg_model(data, proxies, ini):
     X_string = X_1_string + X_2_string
     groups = get_string_groups(X_string)
 
-    if check == 0:
-        X_all = np.full((data.o3[data.date_start:data.date_end, ...].shape + (len(X_string),)), np.nan, dtype='f4')
-    elif check == 1:
-        X_all = np.full(((len(np.unique(time.year)),) + data.o3[0, ...].shape + (len(X_string),)), np.nan, dtype='f4')
+    # Average the proxies over the averaging window before the trends are calculated (the data is averaged in load_slab).
+    # The time axis of the fits is then the first time step of every year
+    fit_time = data.time[data.date_start:data.date_end]
+    if check != 0:
+        skip_percentage = float(ini.get('skip_percentage', 0.75))
         for i in proxies:
-            for kk, ii in enumerate(np.unique(time.year)):
-                if len(np.nonzero(i.data[np.where(time.year == ii)])[0]) / len(np.where(time.year == ii)[0]) <= float(ini.get('skip_percentage', 0.75)):
-                    i.data[kk] = np.nan
-                    continue
-                i.data[kk] = np.nanmean(i.data[np.where(time.year == ii)])
-            i.data = i.data[:len(np.unique(time.year))]
-        if getattr(data, 'inflection_index', None)[0]:
-            for k, i in enumerate(data.inflection_index):
-                data.inflection_index[k] = np.where(np.unique(time.year) == time[i].year)[0][0]  # Change inflection point to reflect the yearly data
-    elif check == 2:
-        month_index = re.split(r',\s*', ini.get('averaging_window', ''))
-        month_index = np.array([int(num) for num in month_index])
-        X_all = np.full(((len(np.unique(time.year)),) + data.o3[0, ...].shape + (len(X_string),)), np.nan, dtype='f4')
-        for i in proxies:
-            for kk, ii in enumerate(np.unique(time.year)):
-                time_index = np.arange((kk * 12), min((kk * 12) + 12, len(time)), 1)
-                arr = i.data[time_index][np.in1d(time[time_index].month, month_index)]
-                if arr.size == 0:
-                    i.data[kk] = np.nan
-                    continue
-                elif np.count_nonzero((arr != 0) & ~np.isnan(arr)) / arr.size <= float(ini.get('skip_percentage', 0.75)):
-                    i.data[kk] = np.nan
-                    continue
-                i.data[kk] = np.nanmean(i.data[time_index][np.in1d(time[time_index].month, month_index)])
-            i.data = i.data[:len(np.unique(time.year))]
+            i.data = average_time_windows(np.asarray(i.data, dtype=float), time, check, month_index, skip_percentage)
+        fit_time = fit_time[np.unique(time.year, return_index=True)[1]]
         if getattr(data, 'inflection_index', None)[0]:
             for k, i in enumerate(data.inflection_index):
                 data.inflection_index[k] = np.where(np.unique(time.year) == time[i].year)[0][0]  # Change inflection point to reflect the yearly data
 
-    beta_all = np.empty((data.o3[0, ...].shape + (len(X_string),)), dtype='f4') * np.nan
-    betaa_all = np.empty((data.o3[0, ...].shape + (len(X_string),)), dtype='f4') * np.nan
+    grid_shape = data.o3.shape[1:]
+    X_all = np.full(((len(fit_time),) + grid_shape + (len(X_string),)), np.nan, dtype='f4')
+
+    beta_all = np.empty((grid_shape + (len(X_string),)), dtype='f4') * np.nan
+    betaa_all = np.empty((grid_shape + (len(X_string),)), dtype='f4') * np.nan
     data_all = np.empty(X_all.shape[:-1])
 
-    # Looping over every dimension but the first (time), to calculate the trends for every latitude, longitude and altitude
-    it = np.nditer(data.o3[0, ...], flags=['multi_index'])
+    covbetaa_all = np.full((grid_shape + (len(X_string),)), np.nan, dtype='f4')
+    cond_all = np.full(grid_shape, np.nan, dtype='f4')
+
+    climatology = None
+    if ini.get('anomaly', 'False') == 'True':
+        climatology = np.full(((12 if check == 0 else 1),) + grid_shape, np.nan)
+
+    # Tagged proxies are interpolated once for every tag value instead of once for every cell
+    set_proxy_tag_series(proxies, data)
+
+    # Lower and upper bound of the bootstrap intervals of the trends (see bootstrap_trends)
+    interval = None
+    if int(ini.get('bootstrap_replicates', 0)) > 0:
+        interval = np.full(trenda_z.shape + (2,), np.nan)
+
+    # Trends of every analysis window of the sensitivity mode (see sensitivity_trends)
+    window_trends = None
+    if get_sensitivity_windows(ini, fit_time):
+        window_trends = np.full(trenda_z.shape + (len(get_sensitivity_windows(ini, fit_time)),), np.nan)
+
+    # RSS of every inflection point of the scan mode and their times (see inflection_scan)
+    candidates = get_inflection_candidates(ini, fit_time)
+    inflection_rss = None
+    if len(candidates):
+        inflection_rss = np.full(grid_shape + (len(candidates),), np.nan)
+
+    diagnostic = [X_all, beta_all, betaa_all, data.dim_array, X_string, fit_time, data_all, covbetaa_all, cond_all, climatology, interval, window_trends, inflection_rss, fit_time[candidates]]
+
+    # With checkpoints the output file is created before the calculation and every slab is written as soon as it is
+    # finished. A resumed run reads the completed cells from the file instead of calculating them again
+    save_path = None
+    if ini.get('checkpoint', 'False') == 'True' or ini.get('resume', 'False') == 'True':
+        save_path = get_save_path(data, ini)
+        open_checkpoint(save_path, data, trenda_z, diagnostic, ini)
+
+    # The data is read, averaged and converted to anomalies in slabs along the first dimension after time (a single slab
+    # if neither slab_size nor memory_budget are set). The next slab is read while the current one is calculated
+    start_progress(int(np.prod(grid_shape)))
+    group_sizes = []
+    for slab, data_slab in iterate_slabs(data, ini, fit_time, time, check, month_index):
+        results = [trenda_z[slab], siga_z[slab], X_all[(slice(None),) + slab], beta_all[slab], betaa_all[slab], data_all[(slice(None),) + slab], covbetaa_all[slab], cond_all[slab]]
+        if climatology is not None:
+            climatology[(slice(None),) + slab] = data_slab.climatology
+
+        cell_index = None
+        if save_path is not None:
+            cell_index = load_checkpoint(save_path, slab, data_slab, results, None if interval is None else interval[slab], None if window_trends is None else window_trends[slab], None if inflection_rss is None else inflection_rss[slab])
+        bootstrap_index = cell_index
+
+        # Cells that were already calculated with the same data, proxies and settings are read from the cache
+        if ini.get('cache_path'):
+            cache_keys = get_cache_keys(data_slab, proxies, ini, X_1_string, X_proxy_size, X_string)
+            cell_index = load_cached_fits(ini, cache_keys, data_slab, results, cell_index)
+        if cell_index is not None:
+            report_progress(done=int(np.prod(data_slab.o3.shape[1:])) - len(cell_index))
+
+        if int(ini.get('jobs', 1)) > 1:
+            group_sizes.extend(fit_cells_parallel(data_slab, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index))
+        else:
+            group_sizes.extend(fit_cells(data_slab, proxies, ini, X_1_string, X_proxy_size, X_string, results, cell_index))
 
-    while not it.finished:
-        print(str(it.multi_index) + ': calculating trend')
+        if ini.get('cache_path'):
+            store_cached_fits(ini, cache_keys, cell_index, results)
 
-        data_arr = data.o3[(slice(None),) + it.multi_index]
-        data_arr = data_arr[data.date_start:data.date_end]
+        if interval is not None:
+            offset = slab[0].start * int(np.prod(grid_shape[1:])) if slab else 0
+            bootstrap_trends(ini, X_string, results, interval[slab], bootstrap_index, offset)
 
-        if check == 0 and anom_check == 'True':
-            for k in range(12):
-                if ini.get('anomaly_method', 'rel') == 'abs':
-                    data_arr[time.month == k + 1] = data_arr[time.month == k + 1] - np.nanmean(data_arr[time.month == k + 1].filled(np.nan))
-                else:
-                    data_arr[time.month == k + 1] = (data_arr[time.month == k + 1] - np.nanmean(data_arr[time.month == k + 1].filled(np.nan))) / np.nanmean(data_arr[time.month == k + 1].filled(np.nan))
-        elif check == 1:
-            for k, i in enumerate(np.unique(time.year)):
-                if len(np.nonzero(data_arr[np.where(time.year == i)])[0]) / len(np.where(time.year == i)[0]) <= float(ini.get('skip_percentage', 0.75)):
-                    data_arr[k] = np.nan
-                    continue
-                data_arr[k] = np.nanmean(data_arr[np.where(time.year == i)])
-            data_arr = data_arr[:len(np.unique(time.year))]
-            if anom_check == 'True':
-                if ini.get('anomaly_method', 'rel') == 'abs':
-                    data_arr = data_arr - np.nanmean(data_arr)
-                else:
-                    data_arr = (data_arr - np.nanmean(data_arr)) / np.nanmean(data_arr)
-        elif check == 2:
-            for k, i in enumerate(np.unique(time.year)):
-                time_index = np.arange((k * 12), min((k * 12) + 12, len(time)), 1)
-                if len(data_arr[time_index][np.in1d(time[time_index].month, month_index)].nonzero()[0]) / len(month_index) <= float(ini.get('skip_percentage', 0.75)):
-                    data_arr[k] = np.nan
-                    continue
-                data_arr[k] = np.nanmean(data_arr[time_index][np.in1d(time[time_index].month, month_index)])
-            data_arr = data_arr[:len(np.unique(time.year))]
-            if anom_check == 'True':
-                if ini.get('anomaly_method', 'rel') == 'abs':
-                    data_arr = data_arr - np.nanmean(data_arr)
-                else:
-                    data_arr = (data_arr - np.nanmean(data_arr)) / np.nanmean(data_arr)
+        if window_trends is not None:
+            sensitivity_trends(data_slab, proxies, ini, X_1_string, X_proxy_size, X_string, results, window_trends[slab], bootstrap_index)
 
-        nanmask = ~np.isnan(data_arr.filled(np.nan))
-        mask_time = np.where(nanmask == True)[0]
+        if inflection_rss is not None:
+            inflection_scan(data_slab, proxies, ini, X_proxy_size, X_string, results, inflection_rss[slab], candidates, bootstrap_index)
 
-        # Inquery if there are enough datapoints to even calculate a trend
-        if len(mask_time) / len(nanmask) < float(ini.get('skip_percentage', 0.75)):
-            print('Not enough values to compute the trend! ' + f'{len(mask_time) / len(nanmask)*100:.2f}' + '% of data available.')
-            it.iternext()
-            continue
-
-        X_1 = get_X_1(nanmask, ini, X_1_string, data)
-        X_2 = get_X_2(proxies, nanmask, X_proxy_size, it, data)
-
-        X = np.concatenate([X_1, X_2], axis=1)
-        X[:, np.all(X[nanmask] == 0, axis=0)] = np.nan
-
-        # Only use the X matrix without empty rows and columns
-        X[:, np.all(X[nanmask] == 0, axis=0)] = np.nan  # This changes the rows with only 0 and NaNs to only NaN rows
-        for k in range(len(X_string)):
-            nonzerosum = np.sum((X[:, k] != 0) & ~np.isnan(X[:, k]))
-            if nonzerosum <= 2:
-                X[:, k] = np.nan
-        row_mask = np.isnan(X).all(axis=1)
-        col_mask = np.isnan(X).all(axis=0)
-        X_clean = X[~row_mask][:, ~col_mask]
-        X_clean[np.isnan(X_clean)] = 0
-
-        # Normalize
-        X_clean[:, len(X_1_string):] = normalize(X_clean[:, len(X_1_string):])
-        # Calculation of the trends and uncertainties for each cell
-        trenda_z[it.multi_index], siga_z[it.multi_index], beta, betaa, covbetaa = calc_trend(X_clean, data_arr, ini, np.array(X_string)[~np.all(np.isnan(X), axis=0)], data.inflection_index)
-
-        # Save X, beta and betaa
-        X_all[(slice(None),) + it.multi_index + (slice(None),)][np.ix_(~row_mask, ~col_mask)] = X_clean
-        beta_all[it.multi_index + (slice(None),)][~col_mask] = beta
-        betaa_all[it.multi_index + (slice(None),)][~col_mask] = betaa
-        data_all[(slice(None),) + it.multi_index] = data_arr.filled(np.nan)
-        # Go to next iteration:
-        it.iternext()
-
-    diagnostic = [X_all, beta_all, betaa_all, data.dim_array, X_string, data.time[data.date_start:data.date_end][time_log], data_all]
+        if save_path is not None:
+            write_netCDF_slab(save_path, slab, trenda_z, siga_z, diagnostic, ini)
 
+    report_progress(finished=True)
+    print_failures()
+    print_design_groups(group_sizes)
     return trenda_z, siga_z, diagnostic
 
 
+# Settings that are read when the proxies or the data are loaded (every key that starts with one of them). Jobs of a
+# batch with the same values share the loaded proxies, and the loaded data if they also use the same data file
+proxy_load_settings = ['proxy_path', 'aod_path', 'default_proxy', 'default_seasonal_component', 'additional_proxy', 'comment_symbol']
+data_load_settings = ['group_name', 'o3_var', 'time_dim', 'time_var', 'time_format', 'additional_var_', 'slab_size', 'memory_budget']
+
+# Proxies and data of a batch, set by batch_init in every process that runs jobs
+batch_state = {}
+
+
+def get_load_key(ini, settings, path=''):
+    values = [key + ' = ' + str(list(value) if isinstance(value, np.ndarray) else value) for key, value in sorted(ini.items()) if key.startswith(tuple(settings))]
+    return '\n'.join([path] + values)
+
+
+def read_batch_file(path):
+    # Every line of a batch file is one job: a configuration file (in the config folder, like --config) and optionally a
+    # data file, separated by a comma. Jobs without a data file use the data_path of their configuration file
+    jobs = []
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip() or line.lstrip()[0] == '#':
+                continue
+            parts = [i.strip() for i in line.split(',', 1)]
+            jobs.append((parts[0], parts[1] if len(parts) > 1 and parts[1] else None))
+    return jobs
+
+
+def batch_init(proxies, datasets):
+    batch_state.update(proxies=proxies, datasets=datasets)
+
+
+def run_batch_job(job):
+    # Runs one job of a batch with the shared proxies and data and writes its output file. Returns a row of the summary
+    name, ini, data_path, output_name = job
+    ini = dict(ini)
+    row = {'job': name, 'data': data_path, 'output': '', 'status': 'done', 'fit_seconds': np.nan, 'write_seconds': np.nan, 'total_seconds': np.nan}
+    start = time.perf_counter()
+    try:
+        proxies = batch_state['proxies'][get_load_key(ini, proxy_load_settings)]
+        data = batch_state['datasets'][get_load_key(ini, data_load_settings, data_path)]
+        if isinstance(proxies, Exception):
+            raise proxies
+        if data is None:
+            raise Exception(data_path + ' could not be loaded')
+
+        # iup_reg_model changes the data, the proxies and the ini, so every job gets its own copies
+        data = copy.copy(data)
+        data.name = output_name
+        progress_state['quiet'] = ini.get('quiet', 'False') == 'True'
+        if ini.get('timing', 'False') == 'True':
+            start_timing()
+        else:
+            stop_timing()
+
+        trends, signi, diagnostic = iup_reg_model(data, [copy.copy(i) for i in proxies], ini)
+        row['fit_seconds'] = time.perf_counter() - start
+        # Checkpointed runs have already written the output file
+        if ini.get('checkpoint', 'False') != 'True' and ini.get('resume', 'False') != 'True':
+            save_netCDF(set_data_limits(copy.copy(data), ini), trends, signi, diagnostic, ini)
+        if timing_state['enabled']:
+            save_timing_summary(get_save_path(data, ini))
+            stop_timing()
+        row['write_seconds'] = time.perf_counter() - start - row['fit_seconds']
+        row['output'] = get_save_path(data, ini)
+    except Exception as e:
+        row['status'] = 'failed: ' + str(e)
+    row['total_seconds'] = time.perf_counter() - start
+    return row
+
+
+def iup_batch(jobs, workers=1, summary_path='batch_summary.csv'):
+    # Runs a list of jobs (name, ini, data_path) and writes one output file per job and a summary of the run times.
+    # The proxies and the data are loaded once and shared by every job with the same load settings (see
+    # proxy_load_settings and data_load_settings). With workers > 1 the jobs run at the same time in separate processes,
+    # which get the loaded proxies and data once when they start
+    start = time.perf_counter()
+    proxies = {}
+    datasets = {}
+    for name, ini, data_path in jobs:
+        key = get_load_key(ini, proxy_load_settings)
+        if key not in proxies:
+            try:
+                proxies[key] = load_additional_proxies(load_default_proxies(ini), ini)
+            except Exception as e:
+                proxies[key] = e
+        key = get_load_key(ini, data_load_settings, data_path)
+        if key not in datasets:
+            datasets[key] = load_netCDF(data_path, ini)
+    print_info('Loaded ' + str(len(proxies)) + ' proxy sets and ' + str(len(datasets)) + ' datasets for ' + str(len(jobs)) + f' jobs in {time.perf_counter() - start:.2f} s')
+
+    # Jobs that share a data file get the name of their configuration file in the name of their output file
+    data_paths = [i[2] for i in jobs]
+    batch_jobs = []
+    for name, ini, data_path in jobs:
+        data = datasets[get_load_key(ini, data_load_settings, data_path)]
+        output_name = data.name if data is not None else os.path.basename(data_path).split('.')[0]
+        if data_paths.count(data_path) > 1:
+            output_name += '_' + os.path.basename(name).split('.')[0]
+        batch_jobs.append((name, ini, data_path, output_name))
+
+    rows = []
+    if workers > 1:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=batch_init, initargs=(proxies, datasets)) as pool:
+            for k, row in enumerate(pool.map(run_batch_job, batch_jobs)):
+                print_info('Job ' + str(k + 1) + ' of ' + str(len(jobs)) + ': ' + row['job'] + ', ' + row['status'])
+                rows.append(row)
+    else:
+        batch_init(proxies, datasets)
+        for k, job in enumerate(batch_jobs):
+            print_info('Job ' + str(k + 1) + ' of ' + str(len(jobs)) + ': ' + job[0] + ', ' + job[2])
+            rows.append(run_batch_job(job))
+
+    summary = pd.DataFrame(rows)
+    summary.to_csv(summary_path, index=False)
+    print(summary.to_string(index=False, float_format=lambda i: f'{i:.2f}'))
+    print(f'Total: {time.perf_counter() - start:.2f} s, the summary was saved in ' + summary_path)
+    return summary
+
+
 # How to load data and proxies into the model:
 # Load the config.ini from the correct path
 # ini = load_config_ini('config.ini')
@@ -3079,15 +3289,54 @@ def iup_reg_model(data, proxies, ini):
 # proxies[-1].method = 2 would enable the last added proxy with harmonic components
 # proxies[3].method = 3 would enable the fourth proxy with monthly components
 
+# Anomalies are calculated inside the module if anomaly = True in the config.ini, they can also be calculated on their own (returns the climatology)
+# climatology = calc_anomalies(data, ini)
+
 # Putting the proxies, the data and the config.ini into the module will give out the trends as well as the significant values, and a list of data that consists of the X matrix, beta and betaa values, the proxy names and the time series for the proxies
 # trends, signi, diagnostic = iup_reg_model(data, proxies, ini)
 
+# The time and memory of every stage are recorded after start_timing() until stop_timing() and can be printed with print(get_timing_summary())
+
+# The progress of iup_reg_model is handed to a callback, e.g. set_progress_callback(print_progress) shows it in the console
+
+def set_console_settings(ini, args):
+    # Settings of the config.ini that are overridden by the console arguments
+    if args.engine:
+        ini['engine'] = args.engine
+    if args.solver:
+        ini['solver'] = args.solver
+    if args.jobs:
+        ini['jobs'] = str(args.jobs)
+    if args.checkpoint:
+        ini['checkpoint'] = 'True'
+    if args.resume:
+        ini['resume'] = 'True'
+    if args.timing:
+        ini['timing'] = 'True'
+    if args.profile:
+        ini['profile'] = args.profile
+    if args.quiet:
+        ini['quiet'] = 'True'
+    return ini
+
+
 def iup_ui(ui=False, config='config.ini'):
 
     # Console Arguments
     parser = argparse.ArgumentParser(description="The IUP Regression Model can compute trends from different .netCDF ozone files with a range of default proxies aswell as the option to include additional proxies.")
     parser.add_argument('-u', '--ui', action='store_true', help='Run the IUP Regression Model with a graphical user interface.')
     parser.add_argument('-c', '--config', type=str, help='Specify a configuration file for the regression model.')
+    parser.add_argument('-e', '--engine', type=str, choices=['loop', 'batched'], help='Fit the cells one after another ("loop") or in stacks with batched linear algebra ("batched"). Overrides the engine in the configuration file.')
+    parser.add_argument('-s', '--solver', type=str, choices=['inv', 'cholesky', 'qr', 'svd', 'block'], help='Solver for the least squares fits. Overrides the solver in the configuration file.')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of processes the cells are distributed over. Overrides the jobs in the configuration file.')
+    parser.add_argument('--checkpoint', action='store_true', help='Create the output file before the calculation and write the results slab by slab, so that a stopped run can be resumed.')
+    parser.add_argument('--resume', action='store_true', help='Resume a stopped checkpointed run: cells that are already completed in the output file are not calculated again.')
+    parser.add_argument('--timing', action='store_true', help='Print the wall time, the number of calls and the peak memory of every stage of the model at the end and save them in the output file.')
+    parser.add_argument('--profile', type=str, nargs='?', const='iup_profile.prof', help='Like --timing, and also profile the run with cProfile and save the statistics in the given file (default iup_profile.prof).')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Don\'t show the progress of the calculation and the informational messages of the model, only warnings and errors.')
+    parser.add_argument('-b', '--batch', type=str, help='Run every job in this file, one line per job with a configuration file and optionally a data file, separated by a comma. The proxies and data are loaded once for all jobs that use them.')
+    parser.add_argument('--batch-workers', type=int, default=1, help='Number of batch jobs that run at the same time in separate processes (default 1, one job after another).')
+    parser.add_argument('--clear-cache', action='store_true', help='Remove all cached fits from the cache folder of the configuration file and exit.')
     args = parser.parse_args()
     if args.ui:
         ui = True
@@ -3096,18 +3345,72 @@ def iup_ui(ui=False, config='config.ini'):
         config = args.config
 
     if not ui:
-        ini = load_config_ini('config folder/' + config)
+        ini = set_console_settings(load_config_ini('config folder/' + config), args)
+        if args.clear_cache:
+            clear_cache(ini)
+            return
+
+        progress_state['quiet'] = ini.get('quiet', 'False') == 'True'
+        if not progress_state['quiet']:
+            set_progress_callback(print_progress)
+
+        if args.batch:
+            jobs = []
+            for job_config, data_path in read_batch_file(args.batch):
+                job_ini = set_console_settings(load_config_ini('config folder/' + job_config), args)
+                jobs.append((job_config, job_ini, data_path or job_ini.get('data_path', '')))
+            iup_batch(jobs, args.batch_workers)
+            return
+
+        profiler = None
+        if ini.get('timing', 'False') == 'True' or ini.get('profile'):
+            start_timing()
+        if ini.get('profile'):
+            profiler = cProfile.Profile()
+            profiler.enable()
+
         data = load_netCDF(ini['data_path'], ini)
         proxies = load_default_proxies(ini)
         proxies = load_additional_proxies(proxies, ini)
         trends, signi, diagnostic = iup_reg_model(data, proxies, ini)
-        save_netCDF(data, trends, signi, diagnostic, ini)
+        # Checkpointed runs have already written the output file
+        if ini.get('checkpoint', 'False') != 'True' and ini.get('resume', 'False') != 'True':
+            save_netCDF(set_data_limits(copy.copy(data), ini), trends, signi, diagnostic, ini)
+
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(ini['profile'])
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+            print('The profile was saved in ' + ini['profile'])
+        if timing_state['enabled']:
+            print(get_timing_summary())
+            save_timing_summary(get_save_path(data, ini))
+            stop_timing()
     else:
+        from PyQt5 import QtWidgets
+        from iup_regression_gui import AppWindow
         app = QtWidgets.QApplication(sys.argv)
         Window = AppWindow()
         Window.show()
         sys.exit(app.exec())
 
 
+# Classes of the graphical user interface, they are imported from iup_regression_gui.py when they are first used
+gui_classes = ['ComboMethod', 'ComboSeasonal', 'MplCanvas', 'PreviewWindow', 'SavePlotWindow', 'VariableWindow', 'ProxyWindow', 'AppWindow']
+
+
+def __getattr__(name):
+    if name in gui_classes:
+        import iup_regression_gui
+        return getattr(iup_regression_gui, name)
+    raise AttributeError('module ' + __name__ + ' has no attribute ' + name)
+
+
+# Loading Qt or matplotlib with the model would slow down every start of the command line and of every worker process
+new_gui_modules = [i for i in gui_modules if i in sys.modules and i not in loaded_gui_modules]
+if new_gui_modules:
+    raise ImportError('iup_regression_model must not import ' + ', '.join(new_gui_modules) + ', the graphical user interface belongs in iup_regression_gui.py')
+
+
 if __name__ == "__main__":
     iup_ui()